@@ -6,6 +6,8 @@ export const useSSE = (user) => {
   const [processingSteps, setProcessingSteps] = useState([]);
   const [isConnected, setIsConnected] = useState(false);
   const eventSourceRef = useRef(null);
+  // Son alınan olay id'si: yeniden bağlanınca kaçırılan olaylar sunucudan tekrar gelir
+  const lastEventIdRef = useRef(null);
   const [connectionError, setConnectionError] = useState(null);
 
   // Processing step'i ekle
@@ -35,7 +37,8 @@ export const useSSE = (user) => {
     console.log('🔌 SSE bağlantısı kuruluyor...');
 
     try {
-      const eventSource = new EventSource(`${API_BASE_URL}/sse/stream`, {
+      const query = lastEventIdRef.current ? `?last_event_id=${encodeURIComponent(lastEventIdRef.current)}` : '';
+      const eventSource = new EventSource(`${API_BASE_URL}/sse/stream${query}`, {
         withCredentials: true
       });
 
@@ -46,6 +49,9 @@ export const useSSE = (user) => {
       };
 
       eventSource.onmessage = (event) => {
+        if (event.lastEventId) {
+          lastEventIdRef.current = event.lastEventId;
+        }
         try {
           const data = JSON.parse(event.data);
           console.log('📨 SSE mesajı alındı:', data);
@@ -128,6 +134,7 @@ export const useSSE = (user) => {
       eventSourceRef.current = null;
       setIsConnected(false);
     }
+    lastEventIdRef.current = null;
   }, []);
 
   // User değiştiğinde bağlantıyı yönet
@@ -1,12 +1,22 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query, Path
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, Query, Path, Request
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+from app.db.session import get_async_db, get_db
 from app.models.document import Document
-from app.models.user import User
-from app.services.ocr_service import ocr_service
-from app.services.nlp_service import nlp_service
-from app.services.decision_service import decision_service
+from app.services.auth_cache import AuthenticatedUser
+from app.services.decision_service import decision_service, InvalidCursorError
+from app.services.document_pipeline import document_pipeline
+from app.services.job_queue import job_queue, JobQueueFullError
+from app.services.blob_store import blob_store, materialize_document, legacy_content_size, iter_legacy_chunks
+from app.services.upload_ingest import upload_ingestor, UploadRejectedError
+from app.services.document_query import (
+    document_query_service,
+    DOCUMENT_FIELDS,
+    DEFAULT_LIST_FIELDS,
+    DEFAULT_DETAIL_FIELDS
+)
 from app.dependencies import get_current_user
 from app.core.logging_config import (
     log_document_processing_start, 
@@ -15,17 +25,27 @@ from app.core.logging_config import (
     log_error
 )
 from app.core.sse_manager import sse_manager
-from PIL import Image
-import io
+from app.core.pacing import StepPacer
+from app.core.executors import run_io
+from app.core.config import settings
+from app.core.downloads import build_download_response
 import logging
 from datetime import datetime
 import json
+import os
+from typing import Optional
 import time
-import asyncio
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
 
+def save_document(db: Session, db_document: Document):
+    """Belgeyi kaydet (thread havuzunda çalıştırılır)"""
+    db.add(db_document)
+    db.commit()
+    db.refresh(db_document)
+    document_query_service.invalidate_user_counts(db_document.user_id)
+
 @router.post(
     "/process-document/",
     summary="📄 Belge Yükleme ve İşleme",
@@ -34,12 +54,21 @@ logger = logging.getLogger(__name__)
         200: {
             "description": "Belge başarıyla işlendi"
         },
+        202: {
+            "description": "Belge kuyruğa alındı (background=true) - durum /jobs/{job_id} ile izlenir"
+        },
         400: {
-            "description": "Geçersiz dosya formatı"
+            "description": "Geçersiz veya bozuk dosya"
         },
         401: {
             "description": "Kimlik doğrulama gerekli"
         },
+        413: {
+            "description": "Dosya boyutu, sayfa sayısı veya görüntü çözünürlüğü sınırı aşıldı"
+        },
+        415: {
+            "description": "Desteklenmeyen dosya içeriği (PDF, JPEG, PNG)"
+        },
         500: {
             "description": "İşlem hatası"
         }
@@ -47,360 +76,197 @@ logger = logging.getLogger(__name__)
     tags=["documents"]
 )
 async def process_document(
+    request: Request,
     file: UploadFile = File(
         ..., 
         description="İşlenecek belge dosyası (PDF, JPG, PNG)",
         example="banking_document.pdf"
     ),
-    current_user: User = Depends(get_current_user),
+    background: bool = Query(
+        False,
+        description="True ise belge kuyruğa alınır ve hemen 202 + job_id döner; sonuç GET /jobs/{job_id} ile alınır"
+    ),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    # Pipeline job queue worker'larıyla ortak olduğu için senkron oturum kullanır;
+    # tüm DB çağrıları run_io ile thread havuzunda çalışır, event loop bloklanmaz
     db: Session = Depends(get_db)
 ):
     start_time = time.time()
+    pacer = StepPacer(current_user.id)
     
     try:
         # İşleme başlangıcını logla
         log_document_processing_start(current_user.id, file.filename)
         
         # SSE: İşlem başlangıcı
-        await sse_manager.send_processing_step(
-            current_user.id, 
+        await pacer.step(
             "İşlem Başlatıldı", 
             {"filename": file.filename}
         )
         
-        logger.info(f"Dosya işleme başlatıldı: {file.filename}")
+        logger.info("Dosya işleme başlatıldı: %s", file.filename)
         
-        # Kısa delay - UI için gerçekçi görünüm
-        await asyncio.sleep(0.5)
+        # Dosya parça parça blob store'a yazılır: SHA-256, gerçek tip (magic byte) ve
+        # boyut/sayfa sınırları yazarken kontrol edilir, bellekte tam kopya tutulmaz
+        try:
+            upload_ingestor.check_declared_size(request.headers.get("content-length"))
+            with pacer.stage("upload"):
+                ingested = await run_io(upload_ingestor.ingest, file.file)
+        except UploadRejectedError as e:
+            await sse_manager.send_processing_error(current_user.id, str(e))
+            log_error("Dosya Kontrolü", str(e), current_user.id)
+            raise HTTPException(status_code=e.status_code, detail=str(e))
         
-        # Dosya içeriğini oku
-        file_content = await file.read()
+        if file.content_type != ingested.content_type:
+            logger.warning(
+                "Bildirilen dosya tipi (%s) içerikle uyuşmuyor, %s kullanılıyor",
+                file.content_type, ingested.content_type
+            )
         
         # SSE: Dosya okuma
-        await sse_manager.send_processing_step(
-            current_user.id, 
+        await pacer.step(
             "Dosya Okundu", 
             {
-                "size": f"{len(file_content)} bytes",
-                "type": file.content_type
+                "size": f"{ingested.blob.size} bytes",
+                "type": ingested.content_type,
+                "pages": ingested.page_count
             }
         )
         
         log_processing_step("Dosya Okuma", {
             "Dosya Adı": file.filename,
-            "Dosya Boyutu": f"{len(file_content)} bytes",
-            "İçerik Tipi": file.content_type
-        })
-        
-        # Kısa delay
-        await asyncio.sleep(0.3)
-        
-        # Dosya tipini kontrol et
-        if not file.content_type:
-            await sse_manager.send_processing_error(current_user.id, "Dosya tipi belirlenemedi")
-            log_error("Dosya Tipi Kontrolü", "Dosya tipi belirlenemedi", current_user.id)
-            raise HTTPException(status_code=400, detail="Dosya tipi belirlenemedi")
-        
-        # Desteklenen dosya tiplerini kontrol et
-        supported_types = ["image/jpeg", "image/jpg", "image/png", "application/pdf"]
-        if file.content_type not in supported_types:
-            await sse_manager.send_processing_error(
-                current_user.id, 
-                f"Desteklenmeyen dosya tipi: {file.content_type}"
-            )
-            log_error("Dosya Tipi Kontrolü", f"Desteklenmeyen dosya tipi: {file.content_type}", current_user.id)
-            raise HTTPException(
-                status_code=400, 
-                detail=f"Desteklenmeyen dosya tipi: {file.content_type}. Desteklenen tipler: {', '.join(supported_types)}"
-            )
+            "Dosya Boyutu": f"{ingested.blob.size} bytes",
+            "İçerik Tipi": ingested.content_type,
+            "Sayfa": ingested.page_count
+        }, elapsed=pacer.elapsed(), duration=pacer.timings.get("upload"), user_id=current_user.id)
         
         # SSE: Dosya tipi kontrolü
-        await sse_manager.send_processing_step(
-            current_user.id, 
+        await pacer.step(
             "Dosya Tipi Kontrolü", 
             {"result": "✅ Geçerli"}
         )
         
-        log_processing_step("Dosya Tipi Kontrolü", {"Sonuç": "✅ Geçerli"})
-        
-        # Kısa delay
-        await asyncio.sleep(0.4)
+        log_processing_step(
+            "Dosya Tipi Kontrolü", {"Sonuç": "✅ Geçerli"}, elapsed=pacer.elapsed(), user_id=current_user.id
+        )
         
         # Dosyayı veritabanına kaydet
         try:
-            db_document = Document(
-                file_name=file.filename,
-                file_type=file.filename.split('.')[-1].lower() if '.' in file.filename else 'unknown',
-                content_type=file.content_type,
-                file_content=file_content,
-                file_size=len(file_content),
-                status="processing",
-                user_id=current_user.id,
-                updated_at=datetime.utcnow()
-            )
-            
-            db.add(db_document)
-            db.commit()
-            db.refresh(db_document)
+            with pacer.stage("db_insert"):
+                db_document = Document(
+                    file_name=file.filename,
+                    file_type=file.filename.split('.')[-1].lower() if '.' in file.filename else 'unknown',
+                    content_type=ingested.content_type,
+                    file_size=ingested.blob.size,
+                    content_hash=ingested.blob.content_hash,
+                    storage_key=ingested.blob.key,
+                    status="processing",
+                    user_id=current_user.id,
+                    updated_at=datetime.utcnow()
+                )
+                
+                await run_io(save_document, db, db_document)
             
             # SSE: Veritabanı kaydı
-            await sse_manager.send_document_uploaded(
-                current_user.id, 
-                db_document.id, 
-                file.filename
-            )
-            
-            # Kısa delay
-            await asyncio.sleep(0.3)
+            await pacer.document_uploaded(db_document.id, file.filename)
             
-            await sse_manager.send_processing_step(
-                current_user.id, 
+            await pacer.step(
                 "Veritabanı Kaydı", 
                 {"document_id": db_document.id}
             )
             
             log_processing_step("Veritabanı Kaydı", {
-                "Document ID": db_document.id,
                 "Durum": "✅ Başarılı"
-            })
+            }, document_id=db_document.id, elapsed=pacer.elapsed(), duration=pacer.timings.get("db_insert"), user_id=current_user.id)
             
-            logger.info(f"Dosya veritabanına kaydedildi. ID: {db_document.id}")
+            logger.info("Dosya veritabanına kaydedildi. ID: %s", db_document.id)
             
         except Exception as e:
             await sse_manager.send_processing_error(current_user.id, f"Veritabanı hatası: {str(e)}")
             log_error("Veritabanı Kaydı", str(e), current_user.id)
-            logger.error(f"Veritabanı kayıt hatası: {e}")
+            logger.error("Veritabanı kayıt hatası: %s", e)
             raise HTTPException(status_code=500, detail=f"Veritabanı kayıt hatası: {e}")
         
-        # OCR işlemini gerçekleştir
-        try:
-            # SSE: OCR başlangıcı
-            await sse_manager.send_processing_step(
-                current_user.id, 
-                "OCR İşlemi Başlatıldı", 
-                {"file_type": file.content_type}
+        # Asenkron mod: job oluştur, kuyruğa al ve hemen 202 dön
+        if background:
+            job = await run_io(job_queue.create_job, db, db_document.id, current_user.id)
+            try:
+                job_queue.enqueue(job.id)
+            except JobQueueFullError as e:
+                job.status = "failed"
+                job.error = str(e)
+                db_document.status = "failed"
+                db_document.updated_at = datetime.utcnow()
+                await run_io(db.commit)
+                await sse_manager.send_processing_error(current_user.id, str(e))
+                log_error("Job Kuyruğu", str(e), current_user.id, db_document.id)
+                raise HTTPException(status_code=503, detail=str(e))
+            
+            await pacer.step(
+                "İşlem Kuyruğa Alındı", 
+                {"document_id": db_document.id, "job_id": job.id}
             )
             
-            log_processing_step("OCR Başlatılıyor", {"İşlenen Dosya": file.content_type})
-            
-            # OCR için gerçekçi delay (1-2 saniye)
-            await asyncio.sleep(1.5)
-            
-            if file.content_type == "application/pdf":
-                # PDF için OCR
-                raw_text = ocr_service.extract_text_from_pdf(file_content)
-            else:
-                # Görüntü için OCR
-                image = Image.open(io.BytesIO(file_content))
-                raw_text = ocr_service.extract_text_from_image(image, "banking_document")
-            
-            # SSE: OCR tamamlandı
-            await sse_manager.send_processing_step(
-                current_user.id, 
-                "OCR Tamamlandı", 
-                {
-                    "text_length": len(raw_text),
-                    "preview": raw_text[:100] + "..." if len(raw_text) > 100 else raw_text
+            log_processing_step("İşlem Kuyruğa Alındı", {
+                "Job ID": job.id,
+                "Kuyruk": job_queue.get_queue_size()
+            }, document_id=db_document.id, elapsed=pacer.elapsed(), user_id=current_user.id)
+            
+            return JSONResponse(
+                status_code=202,
+                content={
+                    "job_id": job.id,
+                    "document_id": db_document.id,
+                    "status": job.status,
+                    "message": "Belge işleme kuyruğuna alındı",
+                    "status_url": f"/api/v1/jobs/{job.id}"
                 }
             )
-            
-            log_processing_step("OCR Tamamlandı", {
-                "Çıkarılan Metin Uzunluğu": f"{len(raw_text)} karakter",
-                "İlk 100 Karakter": raw_text[:100] + "..." if len(raw_text) > 100 else raw_text
-            })
-            
-            logger.info("OCR işlemi tamamlandı, NLP analizi başlıyor...")
-            
-            # Kısa delay
-            await asyncio.sleep(0.5)
-            
-            # NLP analizi yap
-            # SSE: NLP başlangıcı
-            await sse_manager.send_processing_step(
-                current_user.id, 
-                "NLP Analizi Başlatıldı", 
-                {"text_length": len(raw_text)}
-            )
-            
-            log_processing_step("NLP Analizi Başlatılıyor", {"Metin Uzunluğu": len(raw_text)})
-            
-            # NLP için gerçekçi delay (2-3 saniye)
-            await asyncio.sleep(2.0)
-            
-            nlp_result = nlp_service.analyze_document(raw_text, db_document.id)
-            
-            # SSE: NLP tamamlandı
-            await sse_manager.send_processing_step(
-                current_user.id, 
-                "NLP Analizi Tamamlandı", 
-                {
-                    "success": nlp_result.success,
-                    "document_type": nlp_result.entities.document_analysis.document_type if nlp_result.success else "N/A",
-                    "intent": nlp_result.entities.document_analysis.intent if nlp_result.success else "N/A",
-                    "processing_time": f"{nlp_result.processing_time:.2f}s"
-                }
+        
+        # OCR, NLP ve karar adımlarını çalıştır (pdf2image/PIL dosya yolundan okur)
+        file_path, is_temp = await run_io(materialize_document, db_document)
+        try:
+            return await document_pipeline.run(
+                db=db,
+                db_document=db_document,
+                user_id=current_user.id,
+                file_path=file_path,
+                start_time=start_time,
+                pacer=pacer
             )
-            
-            log_processing_step("NLP Analizi Tamamlandı", {
-                "Başarılı": "✅" if nlp_result.success else "❌",
-                "Belge Tipi": nlp_result.entities.document_analysis.document_type if nlp_result.success else "N/A",
-                "Niyet": nlp_result.entities.document_analysis.intent if nlp_result.success else "N/A",
-                "İşlem Süresi": f"{nlp_result.processing_time:.2f}s"
-            })
-            
-            # Kısa delay
-            await asyncio.sleep(0.7)
-            
-            # OCR ve NLP sonuçlarını veritabanında güncelle
-            db_document.raw_text = raw_text
-            
-            # Decision'ı ayrı tabloya kaydet
-            decision_record = None
-            if nlp_result.success:
-                extracted_data = {
-                    "nlp_analysis": nlp_result.dict(),
-                    "ocr_confidence": getattr(raw_text, 'confidence', 0),
-                    "processing_time": nlp_result.processing_time
-                }
-                db_document.extracted_data = json.dumps(extracted_data, ensure_ascii=False, default=str)
-                db_document.status = "completed"
-                
-                # Karar ver ve kaydet
-                try:
-                    # SSE: Karar verme başlangıcı
-                    await sse_manager.send_processing_step(
-                        current_user.id, 
-                        "Karar Verme Başlatıldı", 
-                        {
-                            "customer": nlp_result.entities.customer.name if nlp_result.entities.customer else "N/A",
-                            "amount": nlp_result.entities.transaction.amount if nlp_result.entities.transaction else "N/A"
-                        }
-                    )
-                    
-                    log_processing_step("Karar Verme Süreci Başlatılıyor", {
-                        "Müşteri": nlp_result.entities.customer.name if nlp_result.entities.customer else "N/A",
-                        "TCKN": nlp_result.entities.customer.tckn if nlp_result.entities.customer else "N/A",
-                        "Tutar": nlp_result.entities.transaction.amount if nlp_result.entities.transaction else "N/A"
-                    })
-                    
-                    # Karar verme için gerçekçi delay (1 saniye)
-                    await asyncio.sleep(1.0)
-                    
-                    parsed_data = nlp_result.entities.dict()
-                    decision_data = decision_service.make_decision(parsed_data)
-                    
-                    ocr_confidence = getattr(raw_text, 'confidence', 0)
-                    decision_record = decision_service.save_decision(
-                        db=db,
-                        parsed_data=parsed_data,
-                        decision_data=decision_data,
-                        document_id=db_document.id,
-                        user_id=current_user.id,
-                        ocr_confidence=ocr_confidence
-                    )
-                    
-                    # SSE: Karar tamamlandı
-                    await sse_manager.send_processing_step(
-                        current_user.id, 
-                        "Karar Verme Tamamlandı", 
-                        {
-                            "decision": decision_data["decision"],
-                            "confidence": f"{decision_data['confidence']:.1f}%",
-                            "validation_score": f"{decision_data['validation']['validation_score']:.1f}%",
-                            "reasons_count": len(decision_data["reasons"])
-                        }
-                    )
-                    
-                    log_processing_step("Karar Verme Tamamlandı", {
-                        "Decision ID": decision_record.id,
-                        "Karar": decision_data["decision"],
-                        "Güven Skoru": f"{decision_data['confidence']:.1f}%",
-                        "Validation Skoru": f"{decision_data['validation']['validation_score']:.1f}%",
-                        "Sebepler": len(decision_data["reasons"])
-                    })
-                    
-                    logger.info(f"Decision kaydedildi: ID {decision_record.id}")
-                except Exception as e:
-                    await sse_manager.send_processing_error(current_user.id, f"Karar verme hatası: {str(e)}")
-                    log_error("Karar Verme", str(e), current_user.id)
-                    logger.error(f"Decision kaydetme hatası: {e}")
-                
-                logger.info(f"NLP analizi başarılı: {nlp_result.entities.document_analysis.document_type}")
-            else:
-                db_document.status = "failed"
-                await sse_manager.send_processing_error(current_user.id, nlp_result.message)
-                log_error("NLP Analizi", nlp_result.message, current_user.id)
-                logger.error(f"NLP analizi başarısız: {nlp_result.message}")
-            
-            db_document.updated_at = datetime.utcnow()
-            db.commit()
-            
-            # Son delay - kullanıcının sonucu görmesi için
-            await asyncio.sleep(0.5)
-            
-            # İşleme bitişini logla
-            processing_time = time.time() - start_time
-            final_decision = decision_record.decision if decision_record else "FAILED"
-            log_document_processing_end(current_user.id, final_decision, processing_time)
-            
-            # Response hazırla
-            response_data = {
-                "document_id": db_document.id,
-                "status": db_document.status,
-                "message": "Belge başarıyla işlendi ve analiz edildi",
-                "raw_text_length": len(raw_text),
-                "nlp_analysis": nlp_result.dict() if nlp_result.success else None,
-                "processing_time": nlp_result.processing_time,
-                "decision_id": decision_record.id if decision_record else None,
-                "decision": decision_record.decision if decision_record else None,
-                "decision_confidence": decision_record.confidence if decision_record else None
-            }
-            
-            # SSE: İşlem tamamlandı
-            await sse_manager.send_processing_complete(current_user.id, response_data)
-            
-            return response_data
-            
         except Exception as e:
-            await sse_manager.send_processing_error(current_user.id, f"OCR/NLP hatası: {str(e)}")
-            log_error("OCR/NLP İşlemi", str(e), current_user.id)
-            logger.error(f"OCR/NLP işlemi hatası: {e}")
-            # Hata durumunda status'ü güncelle
-            db_document.status = "failed"
-            db_document.updated_at = datetime.utcnow()
-            db.commit()
-            
-            # Hata durumunda da süreyi logla
-            processing_time = time.time() - start_time
-            log_document_processing_end(current_user.id, "ERROR", processing_time)
-            
             raise HTTPException(status_code=500, detail=f"Belge analizi hatası: {e}")
+        finally:
+            if is_temp:
+                await run_io(os.remove, file_path)
         
     except HTTPException:
         raise
     except Exception as e:
         await sse_manager.send_processing_error(current_user.id, f"Sistem hatası: {str(e)}")
         log_error("Genel Hata", str(e), current_user.id)
-        logger.error(f"Genel hata: {e}")
+        logger.error("Genel hata: %s", e)
         
         # Beklenmeyen hata durumunda da süreyi logla
         processing_time = time.time() - start_time
-        log_document_processing_end(current_user.id, "SYSTEM_ERROR", processing_time)
+        log_document_processing_end(current_user.id, "SYSTEM_ERROR", processing_time, timings=pacer.get_timings())
         
         raise HTTPException(status_code=500, detail=f"İşlem hatası: {e}")
 
 @router.post("/process-text/")
 async def process_text(
     text: str = Form(...),
-    current_user: User = Depends(get_current_user),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    # Pipeline job queue worker'larıyla ortak olduğu için senkron oturum kullanır;
+    # tüm DB çağrıları run_io ile thread havuzunda çalışır, event loop bloklanmaz
     db: Session = Depends(get_db)
 ):
     start_time = time.time()
+    pacer = StepPacer(current_user.id)
     
     try:
         # SSE: Metin işleme başlangıcı
-        await sse_manager.send_processing_step(
-            current_user.id, 
+        await pacer.step(
             "Metin İşleme Başlatıldı", 
             {"text_length": len(text)}
         )
@@ -411,201 +277,77 @@ async def process_text(
             await sse_manager.send_processing_error(current_user.id, "Boş metin gönderilemez")
             raise HTTPException(status_code=400, detail="Boş metin gönderilemez")
         
-        # Kısa delay
-        await asyncio.sleep(0.3)
-        
         # Metni veritabanına kaydet
         try:
             # SSE: Veritabanı kaydı başlangıcı
-            await sse_manager.send_processing_step(
-                current_user.id, 
+            await pacer.step(
                 "Metin Veritabanına Kaydediliyor", 
                 {"size": f"{len(text.encode('utf-8'))} bytes"}
             )
             
-            db_document = Document(
-                file_name="text_input.txt",
-                file_type="txt",
-                content_type="text/plain",
-                file_content=text.encode('utf-8'),
-                file_size=len(text.encode('utf-8')),
-                raw_text=text,
-                status="processing",
-                user_id=current_user.id,
-                updated_at=datetime.utcnow()
-            )
-            
-            db.add(db_document)
-            db.commit()
-            db.refresh(db_document)
+            with pacer.stage("blob_write"):
+                blob = await run_io(blob_store.put_bytes, text.encode('utf-8'))
+            
+            with pacer.stage("db_insert"):
+                db_document = Document(
+                    file_name="text_input.txt",
+                    file_type="txt",
+                    content_type="text/plain",
+                    file_size=blob.size,
+                    content_hash=blob.content_hash,
+                    storage_key=blob.key,
+                    raw_text=text,
+                    status="processing",
+                    user_id=current_user.id,
+                    updated_at=datetime.utcnow()
+                )
+                
+                await run_io(save_document, db, db_document)
             
             # SSE: Veritabanı kaydı tamamlandı
-            await sse_manager.send_processing_step(
-                current_user.id, 
+            await pacer.step(
                 "Veritabanı Kaydı Tamamlandı", 
                 {"document_id": db_document.id}
             )
             
-            logger.info(f"Metin veritabanına kaydedildi. ID: {db_document.id}")
+            logger.info("Metin veritabanına kaydedildi. ID: %s", db_document.id)
             
         except Exception as e:
             await sse_manager.send_processing_error(current_user.id, f"Veritabanı hatası: {str(e)}")
-            logger.error(f"Veritabanı kayıt hatası: {e}")
+            logger.error("Veritabanı kayıt hatası: %s", e)
             raise HTTPException(status_code=500, detail=f"Veritabanı kayıt hatası: {e}")
         
-        # Kısa delay
-        await asyncio.sleep(0.5)
-        
-        # NLP analizi yap
+        # NLP ve karar adımlarını çalıştır
         try:
-            # SSE: NLP başlangıcı
-            await sse_manager.send_processing_step(
-                current_user.id, 
-                "NLP Analizi Başlatıldı", 
-                {"text_length": len(text)}
-            )
-            
-            logger.info("NLP analizi başlıyor...")
-            
-            # NLP için gerçekçi delay (1.5 saniye)
-            await asyncio.sleep(1.5)
-            
-            nlp_result = nlp_service.analyze_document(text, db_document.id)
-            
-            # SSE: NLP tamamlandı
-            await sse_manager.send_processing_step(
-                current_user.id, 
-                "NLP Analizi Tamamlandı", 
-                {
-                    "success": nlp_result.success,
-                    "document_type": nlp_result.entities.document_analysis.document_type if nlp_result.success else "N/A",
-                    "intent": nlp_result.entities.document_analysis.intent if nlp_result.success else "N/A",
-                    "processing_time": f"{nlp_result.processing_time:.2f}s"
-                }
+            return await document_pipeline.run_text(
+                db=db,
+                db_document=db_document,
+                user_id=current_user.id,
+                text=text,
+                start_time=start_time,
+                pacer=pacer
             )
-            
-            # Kısa delay
-            await asyncio.sleep(0.5)
-            
-            # Decision'ı ayrı tabloya kaydet
-            decision_record = None
-            if nlp_result.success:
-                extracted_data = {
-                    "nlp_analysis": nlp_result.dict(),
-                    "processing_time": nlp_result.processing_time
-                }
-                db_document.extracted_data = json.dumps(extracted_data, ensure_ascii=False, default=str)
-                db_document.status = "completed"
-                
-                # Karar ver ve kaydet
-                try:
-                    # SSE: Karar verme başlangıcı
-                    await sse_manager.send_processing_step(
-                        current_user.id, 
-                        "Karar Verme Başlatıldı", 
-                        {
-                            "customer": nlp_result.entities.customer.name if nlp_result.entities.customer else "N/A",
-                            "amount": nlp_result.entities.transaction.amount if nlp_result.entities.transaction else "N/A"
-                        }
-                    )
-                    
-                    # Karar verme için delay
-                    await asyncio.sleep(0.8)
-                    
-                    parsed_data = nlp_result.entities.dict()
-                    decision_data = decision_service.make_decision(parsed_data)
-                    
-                    decision_record = decision_service.save_decision(
-                        db=db,
-                        parsed_data=parsed_data,
-                        decision_data=decision_data,
-                        document_id=db_document.id,
-                        user_id=current_user.id,
-                        ocr_confidence=100.0  # Text input için %100
-                    )
-                    
-                    # SSE: Karar tamamlandı
-                    await sse_manager.send_processing_step(
-                        current_user.id, 
-                        "Karar Verme Tamamlandı", 
-                        {
-                            "decision": decision_data["decision"],
-                            "confidence": f"{decision_data['confidence']:.1f}%",
-                            "validation_score": f"{decision_data['validation']['validation_score']:.1f}%",
-                            "reasons_count": len(decision_data["reasons"])
-                        }
-                    )
-                    
-                    logger.info(f"Decision kaydedildi: ID {decision_record.id}")
-                except Exception as e:
-                    await sse_manager.send_processing_error(current_user.id, f"Karar verme hatası: {str(e)}")
-                    logger.error(f"Decision kaydetme hatası: {e}")
-                
-                logger.info(f"NLP analizi başarılı: {nlp_result.entities.document_analysis.document_type}")
-            else:
-                db_document.status = "failed"
-                await sse_manager.send_processing_error(current_user.id, nlp_result.message)
-                logger.error(f"NLP analizi başarısız: {nlp_result.message}")
-            
-            db_document.updated_at = datetime.utcnow()
-            db.commit()
-            
-            # Son delay
-            await asyncio.sleep(0.3)
-            
-            # İşleme bitişini logla
-            processing_time = time.time() - start_time
-            final_decision = decision_record.decision if decision_record else "FAILED"
-            log_document_processing_end(current_user.id, final_decision, processing_time)
-            
-            # Response hazırla
-            response_data = {
-                "document_id": db_document.id,
-                "status": db_document.status,
-                "message": "Metin başarıyla analiz edildi",
-                "raw_text_length": len(text),
-                "nlp_analysis": nlp_result.dict() if nlp_result.success else None,
-                "processing_time": nlp_result.processing_time,
-                "decision_id": decision_record.id if decision_record else None,
-                "decision": decision_record.decision if decision_record else None,
-                "decision_confidence": decision_record.confidence if decision_record else None
-            }
-            
-            # SSE: İşlem tamamlandı
-            await sse_manager.send_processing_complete(current_user.id, response_data)
-            
-            return response_data
-            
         except Exception as e:
-            await sse_manager.send_processing_error(current_user.id, f"NLP hatası: {str(e)}")
-            logger.error(f"NLP analizi hatası: {e}")
-            # Hata durumunda status'ü güncelle
-            db_document.status = "failed"
-            db_document.updated_at = datetime.utcnow()
-            db.commit()
-            
-            # Hata durumunda da süreyi logla
-            processing_time = time.time() - start_time
-            log_document_processing_end(current_user.id, "ERROR", processing_time)
-            
             raise HTTPException(status_code=500, detail=f"Metin analizi hatası: {e}")
         
     except HTTPException:
         raise
     except Exception as e:
         await sse_manager.send_processing_error(current_user.id, f"Sistem hatası: {str(e)}")
-        logger.error(f"Genel hata: {e}")
+        logger.error("Genel hata: %s", e)
         
         # Beklenmeyen hata durumunda da süreyi logla
         processing_time = time.time() - start_time
-        log_document_processing_end(current_user.id, "SYSTEM_ERROR", processing_time)
+        log_document_processing_end(current_user.id, "SYSTEM_ERROR", processing_time, timings=pacer.get_timings())
         
         raise HTTPException(status_code=500, detail=f"İşlem hatası: {e}")
 
 @router.get(
     "/decisions/",
     summary="📊 Kullanıcı Kararları Listesi",
-    description="Kullanıcının geçmiş belge işleme kararlarını listeler. Sayfalama destekler.",
+    description="Kullanıcının geçmiş belge işleme kararlarını en yeniden eskiye listeler. "
+                "İmleç tabanlı sayfalama: yanıttaki next_cursor bir sonraki istekte cursor olarak gönderilir. "
+                "decision, document_type ve risk_level ile filtrelenebilir; include_total=true toplam sayıyı ekler.",
     responses={
         200: {
             "description": "Kullanıcı kararları başarıyla getirildi"
@@ -620,8 +362,8 @@ async def process_text(
     tags=["documents"]
 )
 async def get_user_decisions(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
     limit: int = Query(
         100, 
         ge=1, 
@@ -629,20 +371,56 @@ async def get_user_decisions(
         description="Sayfa başına döndürülecek kayıt sayısı",
         example=50
     ),
+    cursor: Optional[str] = Query(
+        None,
+        description="Önceki yanıttaki next_cursor değeri"
+    ),
     offset: int = Query(
         0, 
         ge=0, 
-        description="Başlangıç kayıt pozisyonu",
-        example=0
+        description="Başlangıç kayıt pozisyonu (eski istemciler için; cursor tercih edilmeli)",
+        example=0,
+        deprecated=True
+    ),
+    decision: Optional[str] = Query(
+        None,
+        description="Karar filtresi (APPROVED, REJECTED, MANUAL_REVIEW, PENDING)",
+        example="APPROVED"
+    ),
+    document_type: Optional[str] = Query(
+        None,
+        description="Belge tipi filtresi",
+        example="eft_form"
+    ),
+    risk_level: Optional[str] = Query(
+        None,
+        description="Risk seviyesi filtresi (LOW, MEDIUM, HIGH, CRITICAL)",
+        example="HIGH"
+    ),
+    include_total: bool = Query(
+        False,
+        description="Filtreye uyan toplam kayıt sayısını ekle (kısa süreli önbellekli)"
     )
 ):
     """Kullanıcının kararlarını getir"""
-    decisions = decision_service.get_user_decisions(
-        db=db,
-        user_id=current_user.id,
-        limit=limit,
-        offset=offset
-    )
+    filters = {"decision": decision, "document_type": document_type, "risk_level": risk_level}
+    try:
+        decisions, next_cursor = await db.run_sync(
+            lambda session: decision_service.get_user_decisions(
+                session,
+                user_id=current_user.id,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+                filters=filters
+            )
+        )
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    total = None
+    if include_total:
+        total = await db.run_sync(decision_service.count_user_decisions, current_user.id, filters)
     
     return {
         "decisions": [
@@ -665,17 +443,101 @@ async def get_user_decisions(
             }
             for d in decisions
         ],
-        "total": len(decisions)
+        "next_cursor": next_cursor,
+        "has_more": next_cursor is not None,
+        "total": total
+    }
+
+@router.get(
+    "/documents/",
+    summary="🗂️ Belge Listesi",
+    description="Kullanıcının belgelerini listeler. Varsayılan olarak sadece meta veriler döner; "
+                "fields parametresiyle alan seçilebilir (ör. fields=id,status,updated_at). "
+                "raw_text ve extracted_data sadece açıkça istenirse okunur. count sayfadaki kayıt "
+                "sayısıdır; include_total=true filtreye uyan toplam sayıyı ekler.",
+    responses={
+        200: {
+            "description": "Belgeler başarıyla getirildi"
+        },
+        400: {
+            "description": "Geçersiz alan adı"
+        },
+        401: {
+            "description": "Kimlik doğrulama gerekli"
+        }
+    },
+    tags=["documents"]
+)
+async def list_documents(
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+    fields: Optional[str] = Query(
+        None,
+        description=f"Virgülle ayrılmış alanlar. Geçerli alanlar: {', '.join(DOCUMENT_FIELDS)}",
+        example="id,file_name,status,updated_at"
+    ),
+    status: Optional[str] = Query(
+        None,
+        description="Durum filtresi (pending, processing, completed, failed)",
+        example="completed"
+    ),
+    limit: int = Query(
+        100,
+        ge=1,
+        le=1000,
+        description="Sayfa başına döndürülecek kayıt sayısı",
+        example=50
+    ),
+    offset: int = Query(
+        0,
+        ge=0,
+        description="Başlangıç kayıt pozisyonu",
+        example=0
+    ),
+    include_total: bool = Query(
+        False,
+        description="Filtreye uyan toplam kayıt sayısını ekle (kısa süreli önbellekli)"
+    )
+):
+    """Kullanıcının belgelerini sütun projeksiyonuyla getir"""
+    try:
+        selected = document_query_service.parse_fields(fields, DEFAULT_LIST_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    documents = await db.run_sync(
+        lambda session: document_query_service.list_documents(
+            session,
+            current_user.id,
+            selected,
+            status=status,
+            limit=limit,
+            offset=offset
+        )
+    )
+    
+    total = None
+    if include_total:
+        total = await db.run_sync(document_query_service.count_documents, current_user.id, status)
+    
+    return {
+        "documents": documents,
+        "count": len(documents),
+        "total": total
     }
 
 @router.get(
     "/document/{document_id}",
     summary="📄 Belge Detayları",
-    description="Belge bilgilerini ve işlem sonuçlarını getirir. Sadece belge sahibi erişebilir.",
+    description="Belge bilgilerini ve işlem sonuçlarını getirir. Sadece belge sahibi erişebilir. "
+                "fields parametresiyle sadece gereken alanlar istenebilir (ör. fields=status,updated_at).",
     responses={
         200: {
             "description": "Belge bilgileri başarıyla getirildi"
         },
+        400: {
+            "description": "Geçersiz alan adı"
+        },
         404: {
             "description": "Belge bulunamadı veya erişim izni yok"
         },
@@ -692,47 +554,50 @@ async def get_document(
         example=123,
         gt=0
     ),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    fields: Optional[str] = Query(
+        None,
+        description=f"Virgülle ayrılmış alanlar (varsayılan: tümü). Geçerli alanlar: {', '.join(DOCUMENT_FIELDS)}",
+        example="status,extracted_data"
+    ),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Belgeyi veritabanından al
-    document = db.query(Document).filter(
-        Document.id == document_id,
-        Document.user_id == current_user.id
-    ).first()
+    try:
+        selected = document_query_service.parse_fields(fields, DEFAULT_DETAIL_FIELDS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    # Sadece seçilen sütunlar okunur; extracted_data parse edilmiş haliyle önbellekten gelir
+    document = await db.run_sync(
+        document_query_service.get_document,
+        current_user.id,
+        document_id,
+        selected
+    )
     
     if not document:
         raise HTTPException(status_code=404, detail="Belge bulunamadı veya erişim izniniz yok")
     
-    # Extracted data'yı parse et
-    extracted_data = None
-    if document.extracted_data:
-        try:
-            extracted_data = json.loads(document.extracted_data)
-        except json.JSONDecodeError:
-            logger.warning(f"Document {document_id} extracted_data parse edilemedi")
-    
-    return {
-        "id": document.id,
-        "file_name": document.file_name,
-        "file_type": document.file_type,
-        "content_type": document.content_type,
-        "file_size": document.file_size,
-        "raw_text": document.raw_text,
-        "extracted_data": extracted_data,
-        "status": document.status,
-        "created_at": document.created_at,
-        "updated_at": document.updated_at
-    }
+    return document
 
 @router.get(
     "/document/{document_id}/download",
     summary="📥 Belge İndirme",
-    description="Orijinal belge dosyasını indirir. Sadece belge sahibi indirebilir.",
+    description="Orijinal belge dosyasını indirir. Sadece belge sahibi indirebilir. "
+                "Range (kaldığı yerden devam) ve ETag/If-None-Match (304) desteklenir.",
     responses={
         200: {
             "description": "Belge başarıyla indirildi"
         },
+        206: {
+            "description": "İstenen bayt aralığı (Range)"
+        },
+        304: {
+            "description": "Belge değişmedi (If-None-Match)"
+        },
+        416: {
+            "description": "İstenen aralık dosya boyutunun dışında"
+        },
         404: {
             "description": "Belge bulunamadı veya dosya içeriği mevcut değil"
         },
@@ -743,33 +608,58 @@ async def get_document(
     tags=["documents"]
 )
 async def download_document(
+    request: Request,
     document_id: int = Path(
         ..., 
         description="İndirilecek belgenin ID'si",
         example=123,
         gt=0
     ),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    # Belgeyi veritabanından al
-    document = db.query(Document).filter(
-        Document.id == document_id,
-        Document.user_id == current_user.id
-    ).first()
+    # Sadece indirme için gereken sütunlar okunur (metin ve JSON sütunları hariç)
+    document = (await db.execute(
+        select(Document).options(load_only(
+            Document.file_name,
+            Document.content_type,
+            Document.content_hash,
+            Document.storage_key
+        )).where(
+            Document.id == document_id,
+            Document.user_id == current_user.id
+        )
+    )).scalars().first()
     
     if not document:
         raise HTTPException(status_code=404, detail="Belge bulunamadı veya erişim izniniz yok")
     
-    if not document.file_content:
-        raise HTTPException(status_code=404, detail="Dosya içeriği bulunamadı")
-    
-    # Dosyayı stream olarak döndür
-    def generate():
-        yield document.file_content
+    # Blob store'daki dosya parça parça okunur; taşınmamış eski kayıtlar veritabanından
+    # SQL substring ile parça parça gelir. İçerik adresli olduğu için hash güçlü bir ETag'dir.
+    accel_redirect = None
+    if document.storage_key and await run_io(blob_store.exists, document.storage_key):
+        storage_key = document.storage_key
+        size = await run_io(blob_store.size, storage_key)
+        etag = f'"{document.content_hash or storage_key.rsplit("/", 1)[-1]}"'
+        read_range = lambda start, end: blob_store.iter_chunks(storage_key, start, end)
+        if settings.download_x_accel_redirect and blob_store.local_path(storage_key) is not None:
+            accel_redirect = settings.download_x_accel_prefix + storage_key
+    else:
+        size = await run_io(legacy_content_size, document.id)
+        if not size:
+            raise HTTPException(status_code=404, detail="Dosya içeriği bulunamadı")
+        etag = f'"{document.content_hash}"' if document.content_hash else f'W/"legacy-{document.id}-{size}"'
+        read_range = lambda start, end: iter_legacy_chunks(
+            document.id, start, end, settings.blob_store_chunk_size
+        )
     
-    return StreamingResponse(
-        generate(),
+    return build_download_response(
+        request,
+        size=size,
+        etag=etag,
         media_type=document.content_type,
-        headers={"Content-Disposition": f"attachment; filename={document.file_name}"}
-    ) 
\ No newline at end of file
+        file_name=document.file_name,
+        read_range=read_range,
+        cache_control=f"private, max-age={settings.download_cache_max_age}",
+        accel_redirect=accel_redirect
+    ) 
@@ -0,0 +1,69 @@
+from fastapi import APIRouter, Depends, HTTPException, Path
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
+from app.models.job import ProcessingJob
+from app.services.auth_cache import AuthenticatedUser
+from app.dependencies import get_current_user
+import json
+import logging
+
+router = APIRouter()
+logger = logging.getLogger(__name__)
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="⏳ İşlem Durumu",
+    description="Asenkron gönderilen belge işleme job'ının durumunu ve sonucunu getirir. Sadece job sahibi erişebilir.",
+    responses={
+        200: {
+            "description": "Job durumu başarıyla getirildi"
+        },
+        404: {
+            "description": "Job bulunamadı veya erişim izni yok"
+        },
+        401: {
+            "description": "Kimlik doğrulama gerekli"
+        }
+    },
+    tags=["jobs"]
+)
+async def get_job(
+    job_id: str = Path(
+        ...,
+        description="Job ID'si (UUID)",
+        example="3f2b8c1e-7d4a-4e9b-9a61-2c5d8e0f1a23"
+    ),
+    current_user: AuthenticatedUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    job = (await db.execute(
+        select(ProcessingJob).where(
+            ProcessingJob.id == job_id,
+            ProcessingJob.user_id == current_user.id
+        )
+    )).scalars().first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Job bulunamadı veya erişim izniniz yok")
+    
+    # Sonucu parse et
+    result = None
+    if job.result:
+        try:
+            result = json.loads(job.result)
+        except json.JSONDecodeError:
+            logger.warning("Job %s sonucu parse edilemedi", job_id)
+    
+    return {
+        "job_id": job.id,
+        "document_id": job.document_id,
+        "status": job.status,
+        "current_step": job.current_step,
+        "attempts": job.attempts,
+        "result": result,
+        "error": job.error,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at
+    }
@@ -1,10 +1,14 @@
-from fastapi import APIRouter, Depends, Request
+from fastapi import APIRouter, Depends, Header, Query, Request
 from fastapi.responses import StreamingResponse
 from app.dependencies import get_current_user
-from app.models.user import User
-from app.core.sse_manager import sse_manager
-import asyncio
+from app.services.auth_cache import AuthenticatedUser
+from app.core.sse_manager import sse_manager, format_sse_frame, KEEPALIVE_FRAME
+from app.core.config import settings
+from app.core.metrics import metrics
+from datetime import datetime
+import json
 import logging
+from typing import Optional
 
 router = APIRouter()
 logger = logging.getLogger(__name__)
@@ -12,7 +16,11 @@ logger = logging.getLogger(__name__)
 @router.get(
     "/stream",
     summary="📡 Gerçek Zamanlı Veri Akışı",
-    description="Server-Sent Events ile belge işleme süreçlerinin gerçek zamanlı takibi. JWT token gereklidir.",
+    description=(
+        "Server-Sent Events ile belge işleme süreçlerinin gerçek zamanlı takibi. JWT token gereklidir. "
+        "Olaylar id taşır; yeniden bağlanırken Last-Event-ID header'ı (veya last_event_id parametresi) "
+        "gönderilirse kaçırılan olaylar önce gönderilir."
+    ),
     responses={
         200: {
             "description": "SSE stream başarıyla başlatıldı"
@@ -25,52 +33,61 @@ logger = logging.getLogger(__name__)
 )
 async def stream_updates(
     request: Request,
-    current_user: User = Depends(get_current_user)
+    last_event_id_param: Optional[str] = Query(None, alias="last_event_id", description="Son alınan olay id'si (EventSource'u yeniden oluşturan istemciler için)"),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """
     Server-Sent Events endpoint for real-time updates
     """
+    last_event_id = _parse_event_id(last_event_id_header or last_event_id_param)
+    
     async def event_stream():
-        # SSE bağlantısı oluştur
-        queue = await sse_manager.connect(current_user.id)
+        # SSE bağlantısı oluştur (Last-Event-ID varsa kaçırılan olaylar kuyruğa önce girer)
+        connection = await sse_manager.connect(current_user.id, last_event_id)
         
         try:
-            logger.info(f"SSE stream başlatıldı: User {current_user.id}")
+            logger.info("SSE stream başlatıldı: User %s", current_user.id)
             
             # İlk bağlantı mesajı gönder
             initial_message = {
                 "type": "connected",
-                "timestamp": "2024-01-01T00:00:00",
+                "timestamp": datetime.utcnow().isoformat(),
                 "data": {
                     "message": "Real-time bağlantı kuruldu",
                     "user_id": current_user.id
                 }
             }
             
-            yield f"data: {str(initial_message).replace('{', '{{').replace('}', '}}')}\n\n"
+            yield format_sse_frame(json.dumps(initial_message, ensure_ascii=False))
             
+            # İstemci koptuğunda StreamingResponse http.disconnect ile bu generator'ı
+            # iptal eder (finally çalışır); ayrıca her mesajdan önce sorgulamaya gerek yok.
+            # Yarı açık TCP bağlantıları keepalive yazımı başarısız olunca düşer.
             while True:
-                # Client bağlantısı koptu mu kontrol et
-                if await request.is_disconnected():
-                    logger.info(f"Client bağlantısı koptu: User {current_user.id}")
+                # Bekleyen bütün çerçeveler tek yazımda (yoksa keepalive süresi kadar bekle)
+                batch = await connection.get_batch(
+                    timeout=settings.sse_keepalive_seconds,
+                    max_events=settings.sse_write_batch_max_events
+                )
+                if connection.closed:
+                    # Yavaş tüketici veya bağlantı sınırı nedeniyle sunucu tarafından kapatıldı
+                    logger.info("SSE bağlantısı sunucu tarafından kapatıldı (%s): User %s", connection.close_reason, current_user.id)
                     break
                 
-                try:
-                    # Queue'dan mesaj bekle (timeout ile)
-                    message = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    yield f"data: {message}\n\n"
-                    
-                except asyncio.TimeoutError:
-                    # Keepalive mesajı gönder
-                    yield f"data: {{'type': 'keepalive', 'timestamp': '2024-01-01T00:00:00'}}\n\n"
+                if batch is not None:
+                    metrics.observe("sse_write_batch_events", len(batch))
+                    yield batch[0] if len(batch) == 1 else b"".join(batch)
+                else:
+                    yield KEEPALIVE_FRAME
                     
         except Exception as e:
-            logger.error(f"SSE stream hatası: {e}")
+            logger.error("SSE stream hatası: %s", e)
             
         finally:
             # Bağlantıyı temizle
-            await sse_manager.disconnect(current_user.id, queue)
-            logger.info(f"SSE stream kapatıldı: User {current_user.id}")
+            await sse_manager.disconnect(current_user.id, connection)
+            logger.info("SSE stream kapatıldı: User %s", current_user.id)
     
     return StreamingResponse(
         event_stream(),
@@ -81,4 +98,14 @@ async def stream_updates(
             "Access-Control-Allow-Origin": "*",
             "Access-Control-Allow-Credentials": "true",
         }
-    ) 
\ No newline at end of file
+    )
+
+def _parse_event_id(value: Optional[str]) -> Optional[int]:
+    """Last-Event-ID değeri; geçersizse None (tam akış, replay yok)"""
+    if value is None:
+        return None
+    try:
+        return int(value.strip())
+    except ValueError:
+        logger.warning("Geçersiz Last-Event-ID: %r", value)
+        return None
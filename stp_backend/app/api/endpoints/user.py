@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Response
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
-from app.db.session import get_db
-from app.services.user_service import create_user, authenticate_user, get_user_by_username
-from app.services.jwt_service import create_access_token
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.session import get_async_db
+from app.services.user_service import create_user, authenticate_user
+from app.services.jwt_service import create_access_token, verify_token
+from app.services.auth_cache import auth_cache, AuthenticatedUser
 from app.schemas.user import UserCreate, User, UserLogin, UserResponse
-from app.dependencies import get_current_user
-from app.models.user import User as UserModel
+from app.dependencies import get_current_user, get_token_from_cookie, oauth2_scheme
 import logging
+from typing import Optional
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
@@ -42,15 +43,15 @@ router = APIRouter()
         }
     }
 )
-def register(
+async def register(
     user: UserCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Yeni kullanıcı kaydı"""
     try:
-        return create_user(db, user)
+        return await create_user(db, user)
     except Exception as e:
-        logger.error(f"Kullanıcı kaydı hatası: {str(e)}")
+        logger.error("Kullanıcı kaydı hatası: %s", str(e))
         raise HTTPException(
             status_code=400,
             detail="Kullanıcı kaydı başarısız. Kullanıcı adı veya email zaten kullanımda olabilir."
@@ -83,10 +84,10 @@ def register(
 async def login(
     response: Response,
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Kullanıcı girişi ve token oluşturma"""
-    user = authenticate_user(db, form_data.username, form_data.password)
+    user = await authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -94,10 +95,10 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"},
         )
     
-    # Token oluştur
-    access_token = create_access_token(
-        data={"sub": user.username}
-    )
+    # Token oluştur: kullanıcı claim'leri token'da taşınır, doğrulamada veritabanına gidilmez
+    authenticated_user = AuthenticatedUser.from_model(user)
+    access_token = create_access_token(data=authenticated_user.to_claims())
+    auth_cache.put(user.username, authenticated_user)
     
     # Token'ı HttpOnly cookie olarak ayarla
     response.set_cookie(
@@ -127,8 +128,18 @@ async def login(
         }
     }
 )
-async def logout(response: Response):
+async def logout(
+    response: Response,
+    token: Optional[str] = Depends(oauth2_scheme),
+    cookie_token: Optional[str] = Depends(get_token_from_cookie)
+):
     """Kullanıcı çıkışı"""
+    final_token = cookie_token or token
+    if final_token:
+        try:
+            auth_cache.invalidate(verify_token(final_token)["sub"])
+        except (ValueError, KeyError):
+            pass
     response.delete_cookie(key="access_token")
     return {"message": "Başarıyla çıkış yapıldı"}
 
@@ -147,7 +158,7 @@ async def logout(response: Response):
     }
 )
 async def read_users_me(
-    current_user: UserModel = Depends(get_current_user)
+    current_user: AuthenticatedUser = Depends(get_current_user)
 ):
     """Mevcut kullanıcı bilgilerini getir"""
     return {
@@ -0,0 +1,113 @@
+import re
+from typing import Callable, Dict, Iterator, Optional, Tuple
+from urllib.parse import quote
+from fastapi import Request
+from fastapi.responses import Response, StreamingResponse
+from app.core.metrics import metrics
+
+RANGE_PATTERN = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+class RangeNotSatisfiableError(Exception):
+    """İstenen aralık dosya boyutunun dışındaysa fırlatılır (416)"""
+    pass
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    'Range: bytes=...' başlığından (başlangıç, bitiş) (bitiş dahil).
+    Başlık yoksa, sözdizimi geçersizse, birden fazla aralık istenmişse veya içerik
+    boşsa None (tam içerik gönderilir, RFC 9110 buna izin verir).
+    """
+    if not header or size <= 0:
+        # Boş içerikte geçerli bir bayt aralığı yoktur (bytes 0--1/0 üretilmemeli)
+        return None
+    match = RANGE_PATTERN.match(header.strip())
+    if not match:
+        return None
+    start_text, end_text = match.groups()
+    if not start_text and not end_text:
+        return None
+
+    if not start_text:
+        # Son N bayt: bytes=-500
+        suffix = int(end_text)
+        if suffix == 0:
+            raise RangeNotSatisfiableError()
+        return max(0, size - suffix), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        raise RangeNotSatisfiableError()
+    return start, min(end, size - 1)
+
+def etag_matches(header: Optional[str], etag: str) -> bool:
+    """If-None-Match / If-Range karşılaştırması (W/ önekli değerler de eşleşir)"""
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    candidates = [value.strip() for value in header.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+def content_disposition(file_name: str) -> str:
+    """Türkçe karakterli dosya adları için ASCII yedekli RFC 6266 başlığı"""
+    fallback = file_name.encode("ascii", "replace").decode("ascii").replace("?", "_").replace('"', "")
+    return f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(file_name)}"
+
+def build_download_response(
+    request: Request,
+    size: int,
+    etag: str,
+    media_type: str,
+    file_name: str,
+    read_range: Callable[[int, int], Iterator[bytes]],
+    cache_control: str = "private, max-age=86400",
+    accel_redirect: Optional[str] = None
+) -> Response:
+    """
+    Koşullu (ETag/If-None-Match) ve aralıklı (Range/If-Range) indirme yanıtı.
+    read_range(başlangıç, bitiş) içeriği parça parça üretir; accel_redirect verilirse
+    bayt aktarımı nginx'e (X-Accel-Redirect) bırakılır.
+    """
+    headers: Dict[str, str] = {
+        "ETag": etag,
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control,
+        "Content-Disposition": content_disposition(file_name)
+    }
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        metrics.inc("download_not_modified_total")
+        return Response(status_code=304, headers={k: v for k, v in headers.items() if k != "Content-Disposition"})
+
+    if accel_redirect is not None:
+        # nginx dosyayı kendisi gönderir (Range dahil); uygulama sadece yetkilendirir
+        metrics.inc("download_accel_redirect_total")
+        headers["X-Accel-Redirect"] = accel_redirect
+        return Response(status_code=200, media_type=media_type, headers=headers)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    # If-Range eşleşmiyorsa (dosya değişmiş) aralık yok sayılır ve tüm içerik gönderilir
+    if if_range is None or etag_matches(if_range, etag):
+        try:
+            byte_range = parse_range(request.headers.get("range"), size)
+        except RangeNotSatisfiableError:
+            metrics.inc("download_range_not_satisfiable_total")
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}", "ETag": etag})
+
+    if byte_range is None:
+        start, end, status_code = 0, size - 1, 200
+    else:
+        (start, end), status_code = byte_range, 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        metrics.inc("download_partial_total")
+
+    headers["Content-Length"] = str(end - start + 1 if size else 0)
+    metrics.inc("download_bytes_total", end - start + 1 if size else 0)
+    return StreamingResponse(
+        read_range(start, end) if size else iter(()),
+        status_code=status_code,
+        media_type=media_type,
+        headers=headers
+    )
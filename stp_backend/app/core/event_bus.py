@@ -0,0 +1,279 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+import socket
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# Yerel teslim fonksiyonu: (user_id, olay id'si (None = id'siz), olay tipi, serialize edilmiş mesaj)
+DeliverFn = Callable[[int, Optional[int], str, str], None]
+
+EVENT_BUS_BACKENDS = ("inprocess", "postgres")
+
+# Postgres NOTIFY payload sınırı 8000 byte; zarf alanları için pay bırakılır
+NOTIFY_PAYLOAD_LIMIT = 8000
+
+class EventBus(ABC):
+    """
+    SSE olaylarını süreçler arasında dağıtan veri yolu. publish her süreçten
+    çağrılabilir; start ile dinlemeye başlayan her süreç olayı deliver ile
+    kendi yerel bağlantılarına teslim eder. Olay id'sini yayın sırasında bus
+    verir; bütün süreçler aynı olayı aynı id ile görür (Last-Event-ID için).
+    """
+
+    @abstractmethod
+    async def publish(self, user_id: int, event_type: str, message: str) -> Optional[int]:
+        """Olayı bütün dinleyen süreçlere yayınla; verilen olay id'sini döndür"""
+
+    async def start(self, deliver: Optional[DeliverFn] = None):
+        """deliver verilirse yayınlanan olayları dinlemeye başla (None = sadece yayınla)"""
+
+    async def stop(self):
+        """Bağlantıları kapat"""
+
+    def is_connected(self) -> bool:
+        return True
+
+class InProcessEventBus(EventBus):
+    """
+    Tek süreç: olay doğrudan yerel bağlantılara teslim edilir. Id'ler mikrosaniye
+    cinsinden başlangıç zamanından artar; süreç yeniden başlasa da geriye gitmez.
+    """
+
+    def __init__(self):
+        self._deliver: Optional[DeliverFn] = None
+        self._ids = itertools.count(time.time_ns() // 1000)
+
+    async def start(self, deliver: Optional[DeliverFn] = None):
+        self._deliver = deliver
+
+    async def stop(self):
+        self._deliver = None
+
+    async def publish(self, user_id: int, event_type: str, message: str) -> Optional[int]:
+        event_id = next(self._ids)
+        if self._deliver is not None:
+            self._deliver(user_id, event_id, event_type, message)
+        return event_id
+
+def to_asyncpg_dsn(url: str) -> str:
+    """SQLAlchemy adresinin asyncpg.connect'in kabul ettiği postgresql:// karşılığı"""
+    for prefix in ("postgresql+asyncpg://", "postgresql+psycopg2://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql://" + url[len(prefix):]
+    return url
+
+class PostgresEventBus(EventBus):
+    """
+    Postgres LISTEN/NOTIFY üzerinden süreçler arası dağıtım; ek altyapı gerekmez.
+
+    - Yayın: ayrı bir bağlantıdan pg_notify(kanal, "<id>|<zarf>"). Id aynı
+      sorguda sse_event_id_seq sequence'ından alınır; zarf
+      {"u": user_id, "t": olay tipi, "m": mesaj, "o": kaynak süreç} JSON'udur.
+      Eşzamanlı yayıncılarda NOTIFY sırası id sırasından az da olsa sapabilir.
+    - Payload sınırı: zarf NOTIFY sınırını aşarsa mesaj sse_event_spill
+      tablosuna yazılır ve sadece satır id'si ({"r": id}) yayınlanır; dinleyen
+      süreçler mesajı tablodan okur. Eski satırlar spill_ttl_seconds sonra silinir.
+    - Dinleme: adanmış LISTEN bağlantısı. Bağlantı koparsa üstel beklemeyle
+      (reconnect_max_seconds'a kadar) yeniden bağlanılır. Kopukluk sırasında
+      gelen NOTIFY'lar kaybolur; SSE istemcisi sonraki olayla devam eder.
+    - Sıra: bildirimler tek bir tüketici görevinde sırayla işlenir, spill
+      okuması sonraki olayların önüne geçmez.
+    - Yayın başarısız olursa olay en azından bu sürecin bağlantılarına teslim edilir.
+    """
+
+    def __init__(
+        self,
+        dsn: str,
+        channel: str = "stp_sse_events",
+        max_payload_bytes: int = 7900,
+        reconnect_max_seconds: float = 30.0,
+        spill_ttl_seconds: float = 300.0,
+    ):
+        self.dsn = to_asyncpg_dsn(dsn)
+        self.channel = channel
+        self.max_payload_bytes = min(max_payload_bytes, NOTIFY_PAYLOAD_LIMIT - 1)
+        self.reconnect_max_seconds = reconnect_max_seconds
+        self.spill_ttl_seconds = spill_ttl_seconds
+        self.origin = f"{socket.gethostname()}:{os.getpid()}"
+        self._deliver: Optional[DeliverFn] = None
+        self._publish_conn = None
+        self._publish_lock = asyncio.Lock()
+        self._listen_conn = None
+        self._listen_task: Optional[asyncio.Task] = None
+        self._consumer_task: Optional[asyncio.Task] = None
+        self._inbox: Optional[asyncio.Queue] = None
+        self._connected = False
+        self._last_spill_cleanup = 0.0
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def start(self, deliver: Optional[DeliverFn] = None):
+        self._deliver = deliver
+        if deliver is None or self._listen_task is not None:
+            return
+        self._inbox = asyncio.Queue()
+        self._consumer_task = asyncio.create_task(self._consume())
+        self._listen_task = asyncio.create_task(self._listen_loop())
+        logger.info("SSE event bus dinleniyor: postgres kanal=%s, süreç=%s", self.channel, self.origin)
+
+    async def stop(self):
+        for task in (self._listen_task, self._consumer_task):
+            if task is not None:
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._listen_task = None
+        self._consumer_task = None
+        for conn in (self._listen_conn, self._publish_conn):
+            if conn is not None and not conn.is_closed():
+                await conn.close()
+        self._listen_conn = None
+        self._publish_conn = None
+        self._connected = False
+
+    # --- Yayın ---
+
+    async def publish(self, user_id: int, event_type: str, message: str) -> Optional[int]:
+        envelope = json.dumps(
+            {"u": user_id, "t": event_type, "m": message, "o": self.origin}, ensure_ascii=False
+        )
+        try:
+            async with self._publish_lock:
+                conn = await self._get_publish_conn()
+                if len(envelope.encode("utf-8")) > self.max_payload_bytes:
+                    envelope = await self._spill(conn, user_id, event_type, message)
+                event_id = await conn.fetchval(
+                    "SELECT pg_notify($1, id::text || '|' || $2), id "
+                    "FROM (SELECT nextval('sse_event_id_seq') AS id) s",
+                    self.channel, envelope, column=1,
+                )
+            metrics.inc("sse_bus_published_total")
+            return event_id
+        except Exception as e:
+            metrics.inc("sse_bus_publish_errors_total")
+            logger.error("SSE event bus yayın hatası (%s, User %s): %s", event_type, user_id, e)
+            await self._reset_publish_conn()
+            # Diğer süreçlere ulaşılamadı; en azından bu sürecin bağlantılarına teslim et
+            # (id'siz olay replay tamponuna girmez)
+            if self._deliver is not None:
+                self._deliver(user_id, None, event_type, message)
+            return None
+
+    async def _get_publish_conn(self):
+        if self._publish_conn is None or self._publish_conn.is_closed():
+            import asyncpg
+            self._publish_conn = await asyncpg.connect(self.dsn)
+        return self._publish_conn
+
+    async def _reset_publish_conn(self):
+        conn, self._publish_conn = self._publish_conn, None
+        if conn is not None:
+            try:
+                await conn.close(timeout=1)
+            except Exception:
+                conn.terminate()
+
+    async def _spill(self, conn, user_id: int, event_type: str, message: str) -> str:
+        """Sınırı aşan mesajı tabloya yaz, yerine referans zarfını döndür"""
+        now = datetime.utcnow()
+        row_id = await conn.fetchval(
+            "INSERT INTO sse_event_spill (user_id, event_type, payload, created_at) "
+            "VALUES ($1, $2, $3, $4) RETURNING id",
+            user_id, event_type, message, now,
+        )
+        metrics.inc("sse_bus_spilled_total")
+        loop_time = asyncio.get_running_loop().time()
+        if loop_time - self._last_spill_cleanup > self.spill_ttl_seconds:
+            self._last_spill_cleanup = loop_time
+            await conn.execute(
+                "DELETE FROM sse_event_spill WHERE created_at < $1",
+                now - timedelta(seconds=self.spill_ttl_seconds),
+            )
+        return json.dumps({"u": user_id, "t": event_type, "r": row_id, "o": self.origin})
+
+    # --- Dinleme ---
+
+    async def _listen_loop(self):
+        import asyncpg
+        backoff = 0.5
+        while True:
+            lost = asyncio.Event()
+            try:
+                conn = await asyncpg.connect(self.dsn)
+                conn.add_termination_listener(lambda _conn: lost.set())
+                await conn.add_listener(self.channel, self._on_notify)
+                self._listen_conn = conn
+                self._connected = True
+                logger.info("SSE event bus LISTEN bağlantısı kuruldu: %s", self.channel)
+                backoff = 0.5
+                # Bağlantı kopana kadar bekle; sessiz kopuşları yakalamak için periyodik yokla
+                while not lost.is_set():
+                    try:
+                        await asyncio.wait_for(lost.wait(), timeout=30.0)
+                    except asyncio.TimeoutError:
+                        await conn.execute("SELECT 1")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("SSE event bus bağlantı hatası: %s", e)
+            finally:
+                self._connected = False
+                if self._listen_conn is not None and not self._listen_conn.is_closed():
+                    self._listen_conn.terminate()
+                self._listen_conn = None
+            metrics.inc("sse_bus_reconnects_total")
+            logger.info("SSE event bus %.1fs sonra yeniden bağlanacak", backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, self.reconnect_max_seconds)
+
+    def _on_notify(self, _conn, _pid, _channel, payload: str):
+        self._inbox.put_nowait(payload)
+
+    async def _consume(self):
+        while True:
+            payload = await self._inbox.get()
+            try:
+                event_id, _, body = payload.partition("|")
+                envelope = json.loads(body)
+                message = envelope.get("m")
+                if message is None:
+                    message = await self._load_spilled(envelope["r"])
+                    if message is None:
+                        logger.warning("SSE event bus: spill kaydı bulunamadı (id=%s)", envelope['r'])
+                        continue
+                metrics.inc("sse_bus_received_total")
+                if self._deliver is not None:
+                    self._deliver(envelope["u"], int(event_id), envelope["t"], message)
+            except Exception as e:
+                logger.error("SSE event bus bildirim işleme hatası: %s", e)
+
+    async def _load_spilled(self, row_id: int) -> Optional[str]:
+        async with self._publish_lock:
+            conn = await self._get_publish_conn()
+            return await conn.fetchval("SELECT payload FROM sse_event_spill WHERE id = $1", row_id)
+
+def create_event_bus(backend: str) -> EventBus:
+    """Ayarlardaki backend adına göre event bus oluştur"""
+    if backend not in EVENT_BUS_BACKENDS:
+        raise ValueError(f"Geçersiz SSE event bus: {backend} ({', '.join(EVENT_BUS_BACKENDS)})")
+    if backend == "postgres":
+        return PostgresEventBus(
+            dsn=settings.async_database_url or settings.database_url,
+            channel=settings.sse_bus_channel,
+            max_payload_bytes=settings.sse_bus_max_payload_bytes,
+            reconnect_max_seconds=settings.sse_bus_reconnect_max_seconds,
+            spill_ttl_seconds=settings.sse_bus_spill_ttl_seconds,
+        )
+    return InProcessEventBus()
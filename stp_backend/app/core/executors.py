@@ -0,0 +1,83 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class ExecutorPools:
+    """
+    Event loop'u bloklayan işler için havuzlar:
+    - cpu: Tesseract / pdf2image gibi CPU yoğun işler (ProcessPoolExecutor)
+    - io: senkron OpenAI client ve SQLAlchemy çağrıları (ThreadPoolExecutor)
+    Havuzlar ilk kullanımda oluşturulur.
+    """
+
+    def __init__(self, cpu_workers: int, io_workers: int):
+        self.cpu_workers = cpu_workers
+        self.io_workers = io_workers
+        self._cpu_pool: Optional[ProcessPoolExecutor] = None
+        self._io_pool: Optional[ThreadPoolExecutor] = None
+
+    @property
+    def cpu_pool(self) -> ProcessPoolExecutor:
+        if self._cpu_pool is None:
+            # spawn: uvicorn'un thread'leri ve açık DB bağlantıları child'a kopyalanmasın
+            self._cpu_pool = ProcessPoolExecutor(
+                max_workers=self.cpu_workers,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+            logger.info("CPU process havuzu oluşturuldu: %s process", self.cpu_workers)
+        return self._cpu_pool
+
+    @property
+    def io_pool(self) -> ThreadPoolExecutor:
+        if self._io_pool is None:
+            self._io_pool = ThreadPoolExecutor(
+                max_workers=self.io_workers,
+                thread_name_prefix="stp-io"
+            )
+            logger.info("I/O thread havuzu oluşturuldu: %s thread", self.io_workers)
+        return self._io_pool
+
+    async def _run(self, pool, kind: str, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        try:
+            return await loop.run_in_executor(pool, functools.partial(func, *args, **kwargs))
+        finally:
+            metrics.observe(f"executor_{kind}_seconds", time.perf_counter() - started)
+
+    async def run_cpu(self, func: Callable, *args, **kwargs) -> Any:
+        """CPU yoğun, picklable bir fonksiyonu process havuzunda çalıştır"""
+        return await self._run(self.cpu_pool, "cpu", func, *args, **kwargs)
+
+    async def run_io(self, func: Callable, *args, **kwargs) -> Any:
+        """Bloklayan I/O çağrısını thread havuzunda çalıştır"""
+        return await self._run(self.io_pool, "io", func, *args, **kwargs)
+
+    def shutdown(self):
+        """Havuzları kapat"""
+        if self._cpu_pool is not None:
+            self._cpu_pool.shutdown(wait=False, cancel_futures=True)
+            self._cpu_pool = None
+        if self._io_pool is not None:
+            self._io_pool.shutdown(wait=False, cancel_futures=True)
+            self._io_pool = None
+        logger.info("Executor havuzları kapatıldı")
+
+executor_pools = ExecutorPools(
+    cpu_workers=settings.ocr_process_workers,
+    io_workers=settings.io_thread_workers
+)
+
+async def run_cpu(func: Callable, *args, **kwargs) -> Any:
+    return await executor_pools.run_cpu(func, *args, **kwargs)
+
+async def run_io(func: Callable, *args, **kwargs) -> Any:
+    return await executor_pools.run_io(func, *args, **kwargs)
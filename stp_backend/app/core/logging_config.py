@@ -1,36 +1,108 @@
+import atexit
+import json
 import logging
 import logging.handlers
 import os
+import queue
 from datetime import datetime
+from typing import Any, Dict, Optional
+from app.core.config import settings
+from app.core.metrics import metrics
 
-def setup_logging():
+# Arka plan yazıcısı (QueueListener); setup_logging başlatır, süreç kapanırken durdurulur
+_listener: Optional[logging.handlers.QueueListener] = None
+
+# Standart LogRecord alanları dışında JSON'a eklenecek yapısal alanların attribute adı
+FIELDS_ATTR = "fields"
+
+class StructuredTextFormatter(logging.Formatter):
+    """Terminal formatı; kayıtta yapısal alanlar varsa mesajın sonuna key=value olarak eklenir"""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        message = super().formatMessage(record)
+        fields = getattr(record, FIELDS_ATTR, None)
+        if fields:
+            message += " | " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return message
+
+class JsonFormatter(logging.Formatter):
+    """Her kayıt tek satır JSON: zaman, seviye, logger, fonksiyon, mesaj ve yapısal alanlar"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": f"{self.formatTime(record, '%Y-%m-%dT%H:%M:%S')}.{int(record.msecs):03d}",
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "message": record.getMessage(),
+        }
+        fields = getattr(record, FIELDS_ATTR, None)
+        if fields:
+            entry.update(fields)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Kaydı sınırlı kuyruğa koyar; dosya/terminal yazımı QueueListener thread'inde
+    yapılır. Kuyruk doluysa INFO ve altı kayıtlar beklemeden atılır
+    (log_records_dropped_total), WARNING ve üstü için kısa süre beklenir.
+
+    Kayıt biçimlendirilmeden kuyruğa konur: %-stil mesaj birleştirme ve traceback
+    metni listener thread'indeki formatter'da üretilir (JSON'da "exc" alanı ayrı
+    kalır). Bu yüzden log argümanları çağrıdan sonra değiştirilmemelidir.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # QueueHandler.prepare mesajı çağıran thread'de biçimlendirir ve traceback'i
+        # mesaja katar; kuyruk süreç içi olduğundan kayıt olduğu gibi aktarılır
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            if record.levelno >= logging.WARNING:
+                self.queue.put(record, timeout=1.0)
+            else:
+                self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log_records_dropped_total")
+
+def setup_logging(log_dir: str = "logs"):
     """
-    Logging konfigürasyonu - hem terminale hem dosyaya yazar
+    Logging konfigürasyonu - hem terminale hem dosyaya yazar.
+    Uygulama thread'leri sadece kuyruğa yazar; biçimlendirme ve I/O arka plandaki
+    QueueListener thread'indedir (mesaj birleştirme dahil). Seviye settings.log_level'dan gelir; kapalı
+    seviyedeki çağrılar (%-stil argümanlarla) hiç biçimlendirilmez.
     """
+    global _listener
+
     # Log dizinini oluştur
-    log_dir = "logs"
     if not os.path.exists(log_dir):
         os.makedirs(log_dir)
-    
+
     # Log dosyası adı (günlük)
     log_filename = f"{log_dir}/stp_system_{datetime.now().strftime('%Y%m%d')}.log"
-    
+
     # Root logger'ı ayarla
+    level = logging.getLevelName(settings.log_level.upper())
     root_logger = logging.getLogger()
-    root_logger.setLevel(logging.DEBUG)
-    
+    root_logger.setLevel(level)
+
     # Formatter - detaylı log formatı
-    formatter = logging.Formatter(
+    text_formatter = StructuredTextFormatter(
         fmt='%(asctime)s | %(levelname)-8s | %(name)-20s | %(funcName)-15s | %(message)s',
         datefmt='%Y-%m-%d %H:%M:%S'
     )
-    
+
     # Console handler (terminale yazma) - mevcut davranış
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    
-    # File handler (dosyaya yazma) - YENİ
+    console_handler.setFormatter(text_formatter)
+
+    # File handler (dosyaya yazma): satır başına bir JSON kaydı (log_json=False ise metin)
     file_handler = logging.handlers.RotatingFileHandler(
         filename=log_filename,
         maxBytes=10*1024*1024,  # 10MB
@@ -38,65 +110,106 @@ def setup_logging():
         encoding='utf-8'
     )
     file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(formatter)
-    
+    file_handler.setFormatter(JsonFormatter() if settings.log_json else text_formatter)
+
+    # Önceki listener varsa (setup_logging tekrar çağrıldıysa) kuyruğunu boşaltıp durdur
+    if _listener is not None:
+        _listener.stop()
+
+    log_queue = queue.Queue(maxsize=settings.log_queue_max_size)
+    _listener = logging.handlers.QueueListener(
+        log_queue, console_handler, file_handler, respect_handler_level=True
+    )
+    _listener.start()
+
     # Handler'ları ekle (mevcut handler'ları temizle önce)
     root_logger.handlers.clear()
-    root_logger.addHandler(console_handler)
-    root_logger.addHandler(file_handler)
-    
-    # Uvicorn logger'larını da aynı şekilde ayarla
-    uvicorn_logger = logging.getLogger("uvicorn")
-    uvicorn_access_logger = logging.getLogger("uvicorn.access")
-    
+    root_logger.addHandler(NonBlockingQueueHandler(log_queue))
+
     # FastAPI request logger'ı özelleştir
-    logging.getLogger("app").setLevel(logging.INFO)
-    
+    logging.getLogger("app").setLevel(level)
+
     return log_filename
 
-def log_document_processing_start(user_id: int, document_name: str):
+def stop_logging():
+    """Kuyrukta kalan kayıtları yaz ve arka plan yazıcısını durdur"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+atexit.register(stop_logging)
+
+def get_queue_size() -> int:
+    """Yazılmayı bekleyen log kaydı sayısı"""
+    return _listener.queue.qsize() if _listener is not None else 0
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return round(seconds * 1000, 1) if seconds is not None else None
+
+def _fields(**values: Any) -> Dict[str, Dict[str, Any]]:
+    """None olmayan alanlar -> logger çağrısının extra'sı"""
+    return {FIELDS_ATTR: {key: value for key, value in values.items() if value is not None}}
+
+def log_document_processing_start(user_id: int, document_name: str, document_id: int = None):
     """
-    Belge işleme başlangıcını logla
+    Belge işleme başlangıcını logla (tek kayıt)
     """
     logger = logging.getLogger("app.document_processing")
-    logger.info("="*80)
-    logger.info(f"🚀 YENİ BELGE İŞLEME BAŞLADI")
-    logger.info(f"👤 Kullanıcı ID: {user_id}")
-    logger.info(f"📄 Belge Adı: {document_name}")
-    logger.info(f"⏰ Başlangıç Zamanı: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info("="*80)
-
-def log_processing_step(step_name: str, details: dict = None):
+    logger.info(
+        "🚀 Belge işleme başladı: %s", document_name,
+        extra=_fields(event="document_start", user_id=user_id, document_id=document_id, document_name=document_name)
+    )
+
+def log_processing_step(
+    step_name: str,
+    details: dict = None,
+    document_id: int = None,
+    elapsed: float = None,
+    duration: float = None,
+    user_id: int = None
+):
     """
-    İşleme adımını logla
+    İşleme adımını logla (tek kayıt). elapsed: belge işleme başından beri geçen,
+    duration: adımın kendi süresi (saniye); kayıtta milisaniye olarak yer alır.
     """
     logger = logging.getLogger("app.processing_steps")
-    logger.info(f"📍 ADIM: {step_name}")
-    if details:
-        for key, value in details.items():
-            logger.info(f"   └── {key}: {value}")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info(
+        "📍 ADIM: %s", step_name,
+        extra=_fields(
+            event="processing_step", step=step_name, user_id=user_id, document_id=document_id,
+            elapsed_ms=_ms(elapsed), duration_ms=_ms(duration), details=details or None
+        )
+    )
 
-def log_document_processing_end(user_id: int, decision: str, processing_time: float):
+def log_document_processing_end(
+    user_id: int,
+    decision: str,
+    processing_time: float,
+    document_id: int = None,
+    timings: dict = None
+):
     """
-    Belge işleme sonucunu logla
+    Belge işleme sonucunu logla (tek kayıt; timings: aşama süreleri, saniye)
     """
     logger = logging.getLogger("app.document_processing")
-    logger.info("="*80)
-    logger.info(f"🏁 BELGE İŞLEME TAMAMLANDI")
-    logger.info(f"👤 Kullanıcı ID: {user_id}")
-    logger.info(f"✅ Karar: {decision}")
-    logger.info(f"⏱️ Toplam Süre: {processing_time:.2f} saniye")
-    logger.info(f"⏰ Bitiş Zamanı: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-    logger.info("="*80)
-
-def log_error(error_location: str, error_message: str, user_id: int = None):
+    logger.info(
+        "🏁 Belge işleme tamamlandı: %s (%.2f saniye)", decision, processing_time,
+        extra=_fields(
+            event="document_end", user_id=user_id, document_id=document_id, decision=decision,
+            duration_ms=_ms(processing_time),
+            stage_ms={name: _ms(value) for name, value in timings.items()} if timings else None
+        )
+    )
+
+def log_error(error_location: str, error_message: str, user_id: int = None, document_id: int = None):
     """
-    Hata durumlarını özel olarak logla
+    Hata durumlarını özel olarak logla (tek kayıt)
     """
     logger = logging.getLogger("app.errors")
-    logger.error("❌ HATA OLUŞTU!")
-    logger.error(f"📍 Konum: {error_location}")
-    logger.error(f"💬 Hata: {error_message}")
-    if user_id:
-        logger.error(f"👤 Kullanıcı ID: {user_id}")
-    logger.error("-"*40) 
\ No newline at end of file
+    logger.error(
+        "❌ HATA (%s): %s", error_location, error_message,
+        extra=_fields(event="error", location=error_location, user_id=user_id, document_id=document_id)
+    )
@@ -0,0 +1,46 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+class LoopLagMonitor:
+    """
+    Event loop gecikmesini ölçer: belirli aralıklarla uyur ve planlanandan
+    ne kadar geç uyandığını 'event_loop_lag_seconds' histogramına yazar.
+    Loop bloklandığında bu değer bloklama süresi kadar büyür.
+    """
+
+    def __init__(self, interval: float = 0.1, warn_threshold: float = 0.5):
+        self.interval = interval
+        self.warn_threshold = warn_threshold
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self):
+        while True:
+            scheduled = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - scheduled - self.interval)
+            metrics.observe("event_loop_lag_seconds", lag)
+            metrics.set_gauge("event_loop_lag_last_seconds", lag)
+            if lag > self.warn_threshold:
+                logger.warning("Event loop %.3fs bloklandı", lag)
+
+    def start(self):
+        """Ölçümü başlat"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Ölçümü durdur"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+loop_monitor = LoopLagMonitor()
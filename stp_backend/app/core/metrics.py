@@ -0,0 +1,90 @@
+import threading
+from collections import deque
+from typing import Callable, Deque, Dict
+
+class MetricsRegistry:
+    """
+    Basit in-process metrik kaydı: sayaçlar, anlık değerler (gauge) ve
+    son N gözlemden percentile hesaplayan histogramlar.
+    Worker thread'lerinden de güvenle çağrılabilir.
+    """
+
+    def __init__(self, histogram_size: int = 2048):
+        self.histogram_size = histogram_size
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._gauge_callbacks: Dict[str, Callable[[], float]] = {}
+        self._histograms: Dict[str, Deque[float]] = {}
+        self._histogram_totals: Dict[str, int] = {}
+
+    def inc(self, name: str, value: float = 1):
+        """Sayacı artır"""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float):
+        """Anlık değeri ayarla"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def register_gauge(self, name: str, callback: Callable[[], float]):
+        """Snapshot anında hesaplanacak gauge kaydet"""
+        with self._lock:
+            self._gauge_callbacks[name] = callback
+
+    def observe(self, name: str, value: float):
+        """Histogram'a gözlem ekle"""
+        with self._lock:
+            if name not in self._histograms:
+                self._histograms[name] = deque(maxlen=self.histogram_size)
+                self._histogram_totals[name] = 0
+            self._histograms[name].append(value)
+            self._histogram_totals[name] += 1
+
+    def get_counter(self, name: str) -> float:
+        """Sayaç değerini döndür"""
+        return self._counters.get(name, 0)
+
+    @staticmethod
+    def _percentile(sorted_values, q: float) -> float:
+        if not sorted_values:
+            return 0.0
+        index = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+        return sorted_values[index]
+
+    def snapshot(self) -> dict:
+        """Tüm metriklerin JSON uyumlu anlık görüntüsünü döndür"""
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            callbacks = dict(self._gauge_callbacks)
+            histograms = {name: list(values) for name, values in self._histograms.items()}
+            totals = dict(self._histogram_totals)
+
+        for name, callback in callbacks.items():
+            try:
+                gauges[name] = callback()
+            except Exception:
+                gauges[name] = None
+
+        summaries = {}
+        for name, values in histograms.items():
+            values.sort()
+            summaries[name] = {
+                "count": totals[name],
+                "avg": sum(values) / len(values) if values else 0.0,
+                "p50": self._percentile(values, 0.50),
+                "p95": self._percentile(values, 0.95),
+                "p99": self._percentile(values, 0.99),
+                "max": values[-1] if values else 0.0
+            }
+
+        return {
+            "counters": counters,
+            "gauges": gauges,
+            "histograms": summaries
+        }
+
+# Global metrics instance
+metrics = MetricsRegistry()
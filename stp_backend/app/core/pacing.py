@@ -0,0 +1,63 @@
+import inspect
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Optional
+from app.core.sse_manager import sse_manager
+
+class StepPacer:
+    """
+    İşlem adımlarını SSE ile yayınlar ve her aşamanın gerçek süresini ölçer.
+
+    Olaylar beklemeden yayınlanır. Demo pacing (settings.demo_min_step_duration > 0)
+    SSE bağlantısının gönderim tarafında uygulanır (SSEConnection); işlem süresi,
+    HTTP yanıtı ve job tamamlanması gecikmez.
+    """
+
+    def __init__(self, user_id: int, on_step: Optional[Callable[[str], Any]] = None):
+        self.user_id = user_id
+        self.on_step = on_step
+        self.started_at = time.perf_counter()
+        self.timings: Dict[str, float] = {}
+
+    async def step(self, step: str, details: dict = None):
+        """İşlem adımı olayını gönder"""
+        if self.on_step:
+            result = self.on_step(step)
+            if inspect.isawaitable(result):
+                await result
+        await sse_manager.send_processing_step(self.user_id, step, details)
+
+    async def document_uploaded(self, document_id: int, filename: str):
+        """Belge yükleme olayını gönder"""
+        await sse_manager.send_document_uploaded(self.user_id, document_id, filename)
+
+    async def page_processed(self, document_id: int, page: int, total_pages: int, text_length: int, method: str):
+        """Sayfa ilerleme olayını gönder"""
+        await sse_manager.send_page_processed(self.user_id, document_id, page, total_pages, text_length, method)
+
+    async def complete(self, result: dict):
+        """İşlem tamamlanma olayını gönder"""
+        await sse_manager.send_processing_complete(self.user_id, result)
+
+    async def error(self, error: str):
+        """Hata olayını gönder"""
+        await sse_manager.send_processing_error(self.user_id, error)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Bir aşamanın süresini ölç"""
+        stage_start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + (time.perf_counter() - stage_start)
+
+    def elapsed(self) -> float:
+        """İşlem başından beri geçen süre (saniye)"""
+        return time.perf_counter() - self.started_at
+
+    def get_timings(self) -> Dict[str, float]:
+        """Aşama sürelerini ve toplam süreyi saniye cinsinden döndür"""
+        timings = {name: round(duration, 4) for name, duration in self.timings.items()}
+        timings["total"] = round(time.perf_counter() - self.started_at, 4)
+        return timings
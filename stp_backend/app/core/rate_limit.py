@@ -0,0 +1,57 @@
+import asyncio
+import time
+from typing import Optional
+
+class AsyncTokenBucket:
+    """
+    Asyncio token bucket: saniyede `rate` token dolar, en fazla `capacity` birikir.
+    acquire(n) yeterli token olana kadar bekler. İstek/dakika ve token/dakika
+    gibi kota sınırlarına uymak için kullanılır.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    @classmethod
+    def per_minute(cls, limit: float) -> "AsyncTokenBucket":
+        """Dakikalık kotadan bucket oluştur (bir dakikalık patlamaya izin verir)"""
+        return cls(rate=limit / 60.0, capacity=limit)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, amount: float = 1.0) -> float:
+        """Token al; beklenen süreyi saniye olarak döndür"""
+        # Kapasiteden büyük istekler sonsuza kadar beklemesin
+        amount = min(amount, self.capacity)
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        waited = 0.0
+        # Kilit sırayı korur: önce gelen önce token alır
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return waited
+                delay = (amount - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+    def refund(self, amount: float):
+        """Tahminden az kullanılan tokenları geri ver"""
+        if amount > 0:
+            self._refill()
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+    def available(self) -> float:
+        """Şu anki token miktarı"""
+        self._refill()
+        return self._tokens
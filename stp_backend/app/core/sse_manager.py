@@ -1,49 +1,310 @@
 import asyncio
 import json
 import logging
-from typing import Dict, List, Optional
+import sys
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
 from datetime import datetime
 from fastapi import Request
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.core.event_bus import EventBus, InProcessEventBus, create_event_bus
 
 logger = logging.getLogger(__name__)
 
+# Kuyruk dolduğunda uygulanabilecek politikalar
+OVERFLOW_POLICIES = ("drop_oldest", "coalesce", "disconnect")
+
+# Yorum satırı: EventSource onmessage tetiklemez, proxy'lerin bağlantıyı kapatmasını önler
+KEEPALIVE_FRAME = b": keepalive\n\n"
+
+# Demo pacing uygulanan olay tipleri (sayfa ilerlemesi ve hata beklemeden gider)
+PACED_EVENT_TYPES = frozenset({"processing_step", "document_uploaded", "processing_complete"})
+
+def format_sse_frame(message: str, event_id: Optional[int] = None) -> bytes:
+    """Mesajı yazılmaya hazır SSE çerçevesine çevir (olay başına bir kez)"""
+    if event_id is None:
+        return f"data: {message}\n\n".encode("utf-8")
+    return f"id: {event_id}\ndata: {message}\n\n".encode("utf-8")
+
+class SSEConnection:
+    """
+    Tek bir SSE akışının sınırlı çerçeve kuyruğu. Kuyrukta hazır SSE çerçeveleri
+    (bytes) durur; okuyan taraf bekleyenlerin hepsini tek yazımda gönderir.
+    Gönderen taraf hiç beklemez (offer senkron); kuyruk dolduğunda politika uygulanır:
+    - drop_oldest: en eski mesaj atılır
+    - coalesce: bekleyen en eski processing_step atılır (yenisi onu geçersiz kılar);
+      kuyrukta adım olayı yoksa en eski mesaj atılır
+    - disconnect: yavaş tüketici bağlantısı kapatılır, tarayıcı yeniden bağlanır
+
+    Demo pacing (min_event_interval > 0): PACED_EVENT_TYPES olayları bu bağlantıya
+    aralarında en az min_event_interval olacak şekilde bırakılır. Bekleme sadece
+    okuyan (gönderen) taraftadır; pipeline ve HTTP yanıtı gecikmez.
+    """
+
+    def __init__(self, user_id: int, max_size: int, policy: str, min_event_interval: float = 0.0):
+        self.user_id = user_id
+        self.max_size = max_size
+        self.policy = policy
+        self.min_event_interval = min_event_interval
+        self.closed = False
+        self.close_reason: Optional[str] = None
+        # (olay tipi, SSE çerçevesi)
+        self._buffer: Deque[Tuple[str, bytes]] = deque()
+        self._ready = asyncio.Event()
+        # Sıradaki pacing'li olayın en erken gönderilebileceği an (loop zamanı)
+        self._release_at = 0.0
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    def offer(self, event_type: str, frame: bytes) -> bool:
+        """Çerçeveyi kuyruğa ekle; bağlantı kapandıysa (veya kapatıldıysa) False"""
+        if self.closed:
+            return False
+        if len(self._buffer) >= self.max_size:
+            if self.policy == "disconnect":
+                metrics.inc("sse_slow_consumer_evictions_total")
+                self.close("slow_consumer")
+                return False
+            if self.policy == "coalesce" and self._drop_oldest_step():
+                metrics.inc("sse_messages_coalesced_total")
+            else:
+                self._buffer.popleft()
+                metrics.inc("sse_messages_dropped_total")
+        self._buffer.append((event_type, frame))
+        self._ready.set()
+        return True
+
+    def _drop_oldest_step(self) -> bool:
+        for index, (event_type, _) in enumerate(self._buffer):
+            if event_type == "processing_step":
+                del self._buffer[index]
+                return True
+        return False
+
+    async def get_batch(self, timeout: float, max_events: int = 64) -> Optional[List[bytes]]:
+        """Bekleyen çerçeveler (en fazla max_events); timeout dolarsa veya bağlantı kapatılırsa None"""
+        if not self._buffer and not self.closed:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                return None
+        if self.closed or not self._buffer:
+            return None
+        if self.min_event_interval > 0:
+            return await self._get_paced_batch(max_events)
+        buffer = self._buffer
+        return [buffer.popleft()[1] for _ in range(min(len(buffer), max_events))]
+
+    async def _get_paced_batch(self, max_events: int) -> Optional[List[bytes]]:
+        """Sıra korunarak: pacing'li olay release anından önce gönderilmez, diğerleri beklemez"""
+        loop = asyncio.get_running_loop()
+        batch: List[bytes] = []
+        while self._buffer and len(batch) < max_events:
+            event_type, frame = self._buffer[0]
+            if event_type in PACED_EVENT_TYPES:
+                delay = self._release_at - loop.time()
+                if delay > 0:
+                    if batch:
+                        # Önce hazır olanları gönder
+                        break
+                    await asyncio.sleep(delay)
+                    if self.closed:
+                        return None
+                    # Beklerken baştaki olay coalesce ile atılmış olabilir
+                    continue
+                self._release_at = loop.time() + self.min_event_interval
+            self._buffer.popleft()
+            batch.append(frame)
+        return batch or None
+
+    def close(self, reason: str):
+        if not self.closed:
+            self.closed = True
+            self.close_reason = reason
+            self._buffer.clear()
+            self._ready.set()
+
+# Tampondaki bir olayın mesaj dışındaki yaklaşık maliyeti (tuple, id, süre, deque yuvası)
+_REPLAY_ENTRY_OVERHEAD = 136
+
+class SSEReplayBuffer:
+    """
+    Kullanıcı başına son olayların sınırlı halkası (Last-Event-ID ile yeniden
+    bağlanan istemciye kaçırdığı olayları göndermek için). Her kayıt ttl_seconds
+    sonra, kullanıcı başına max_events aşılınca en eskiden başlayarak düşer.
+    Düşen en büyük id tutulur; istemcinin son id'si bundan küçükse arada kaybolan
+    olay vardır (gap). Kayıtlar hazır SSE çerçeveleridir (bağlantı kuyruklarıyla
+    aynı bytes nesnesi paylaşılır); bellek kullanımı bunlardan yaklaşık hesaplanır.
+    """
+
+    def __init__(self, max_events: int = 200, ttl_seconds: float = 300.0, sweep_every: int = 1024):
+        self.max_events = max_events
+        self.ttl_seconds = ttl_seconds
+        self.sweep_every = sweep_every
+        # {user_id: deque[(olay id'si, son geçerlilik, olay tipi, çerçeve)]}
+        self._events: Dict[int, Deque[Tuple[int, float, str, bytes]]] = {}
+        self._dropped_upto: Dict[int, int] = {}
+        self._bytes = 0
+        self._count = 0
+        self._records_since_sweep = 0
+
+    @staticmethod
+    def _entry_size(frame: bytes) -> int:
+        return sys.getsizeof(frame) + _REPLAY_ENTRY_OVERHEAD
+
+    def record(self, user_id: int, event_id: int, event_type: str, frame: bytes):
+        """Olayı kullanıcının halkasına ekle"""
+        if self.max_events <= 0 or self.ttl_seconds <= 0:
+            return
+        now = time.monotonic()
+        events = self._events.get(user_id)
+        if events is None:
+            events = self._events[user_id] = deque()
+        self._prune(user_id, events, now)
+        while len(events) >= self.max_events:
+            self._drop_oldest(user_id, events)
+        events.append((event_id, now + self.ttl_seconds, event_type, frame))
+        self._bytes += self._entry_size(frame)
+        self._count += 1
+
+        self._records_since_sweep += 1
+        if self._records_since_sweep >= self.sweep_every:
+            self._records_since_sweep = 0
+            self.sweep(now)
+
+    def since(self, user_id: int, last_event_id: int) -> Tuple[List[Tuple[int, str, bytes]], bool]:
+        """
+        last_event_id'den sonraki olaylar [(id, tip, çerçeve)] ve aradaki olayların
+        tamamının tamponda olup olmadığı
+        """
+        events = self._events.get(user_id)
+        if events:
+            self._prune(user_id, events, time.monotonic())
+        missed = [(event_id, event_type, frame) for event_id, _, event_type, frame in events or () if event_id > last_event_id]
+        complete = last_event_id >= self._dropped_upto.get(user_id, 0)
+        return missed, complete
+
+    def sweep(self, now: Optional[float] = None):
+        """Bütün kullanıcılarda süresi dolan olayları at, boş kalan kullanıcıları sil"""
+        now = time.monotonic() if now is None else now
+        for user_id in list(self._events):
+            events = self._events[user_id]
+            self._prune(user_id, events, now)
+            if not events:
+                del self._events[user_id]
+                self._dropped_upto.pop(user_id, None)
+
+    def _prune(self, user_id: int, events: Deque, now: float):
+        while events and events[0][1] <= now:
+            self._drop_oldest(user_id, events)
+
+    def _drop_oldest(self, user_id: int, events: Deque):
+        event_id, _, _, frame = events.popleft()
+        self._bytes -= self._entry_size(frame)
+        self._count -= 1
+        if event_id > self._dropped_upto.get(user_id, 0):
+            self._dropped_upto[user_id] = event_id
+
+    def get_event_count(self) -> int:
+        return self._count
+
+    def get_user_count(self) -> int:
+        return len(self._events)
+
+    def get_memory_bytes(self) -> int:
+        """Tampondaki olayların yaklaşık bellek kullanımı (byte)"""
+        return self._bytes
+
 class SSEManager:
-    def __init__(self):
-        # Aktif bağlantıları store et: {user_id: [connection1, connection2, ...]}
-        self.connections: Dict[int, List[asyncio.Queue]] = {}
-        self.lock = asyncio.Lock()
-    
-    async def connect(self, user_id: int) -> asyncio.Queue:
-        """Yeni SSE bağlantısı oluştur"""
-        async with self.lock:
-            queue = asyncio.Queue()
-            
-            if user_id not in self.connections:
-                self.connections[user_id] = []
-            
-            self.connections[user_id].append(queue)
-            logger.info(f"SSE bağlantısı açıldı: User {user_id}, Total: {len(self.connections[user_id])}")
-            
-            return queue
-    
-    async def disconnect(self, user_id: int, queue: asyncio.Queue):
+    """
+    Bu sürecin SSE bağlantıları. send_update olayı event bus'a yayınlar; bus olayı
+    dinleyen her sürece (uvicorn worker'ı) ulaştırır ve her süreç deliver_local
+    ile kendi bağlantılarına teslim eder. Varsayılan bus süreç içidir.
+    Teslim edilen her olay replay tamponuna da yazılır; istemci hangi worker'a
+    yeniden bağlanırsa bağlansın kaçırdığı olaylar oradan gönderilir.
+
+    Olay her süreçte bir kez SSE çerçevesine çevrilir; kullanıcının bütün
+    bağlantıları ve replay tamponu aynı bytes nesnesini paylaşır. Bağlantı kaydı
+    copy-on-write'tır: connect/disconnect kullanıcının tuple'ını yenisiyle
+    değiştirir, teslim yolu kilit almadan ve kopyalamadan mevcut tuple'ı gezer.
+    """
+
+    def __init__(
+        self,
+        queue_max_size: int = 100,
+        overflow_policy: str = "coalesce",
+        max_connections_per_user: int = 5,
+        bus: Optional[EventBus] = None,
+        replay_max_events: int = 200,
+        replay_ttl_seconds: float = 300.0,
+        min_event_interval: float = 0.0
+    ):
+        if overflow_policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Geçersiz SSE taşma politikası: {overflow_policy} ({', '.join(OVERFLOW_POLICIES)})")
+        self.queue_max_size = queue_max_size
+        self.overflow_policy = overflow_policy
+        self.max_connections_per_user = max_connections_per_user
+        # Demo pacing: bağlantı başına pacing'li olaylar arası minimum süre
+        self.min_event_interval = min_event_interval
+        # Aktif bağlantılar: {user_id: (connection1, connection2, ...)} - tuple'lar değiştirilmez, yenisi konur
+        self.connections: Dict[int, Tuple[SSEConnection, ...]] = {}
+        self.replay = SSEReplayBuffer(replay_max_events, replay_ttl_seconds)
+        self.bus = bus or InProcessEventBus()
+        # Süreç içi bus'ta start çağrılmadan da (script'ler, benchmark'lar) teslim edilsin
+        if isinstance(self.bus, InProcessEventBus):
+            self.bus._deliver = self.deliver_local
+    
+    async def start(self, listen: bool = True):
+        """Event bus'ı başlat. listen=False: sadece yayın yapan süreç (ayrı job runner)"""
+        await self.bus.start(self.deliver_local if listen else None)
+    
+    async def stop(self):
+        await self.bus.stop()
+    
+    async def connect(self, user_id: int, last_event_id: Optional[int] = None) -> SSEConnection:
+        """
+        Yeni SSE bağlantısı oluştur; kullanıcı sınırı aşılırsa en eski bağlantısı kapatılır.
+        last_event_id verilirse ondan sonraki olaylar önce kuyruğa konur (araya canlı olay girmez).
+        """
+        # Arada await yok: replay ile kayıt arasına canlı olay giremez
+        connection = SSEConnection(user_id, self.queue_max_size, self.overflow_policy, self.min_event_interval)
+        if last_event_id is not None:
+            self._replay(connection, last_event_id)
+        
+        user_connections = self.connections.get(user_id, ())
+        while len(user_connections) >= self.max_connections_per_user:
+            oldest, user_connections = user_connections[0], user_connections[1:]
+            oldest.close("connection_limit")
+            metrics.inc("sse_connection_limit_evictions_total")
+            logger.info("SSE bağlantı sınırı aşıldı, en eski bağlantı kapatıldı: User %s", user_id)
+        
+        self.connections[user_id] = user_connections + (connection,)
+        logger.info("SSE bağlantısı açıldı: User %s, Total: %s", user_id, len(user_connections) + 1)
+        
+        return connection
+    
+    async def disconnect(self, user_id: int, connection: SSEConnection):
         """SSE bağlantısını kapat"""
-        async with self.lock:
-            if user_id in self.connections:
-                try:
-                    self.connections[user_id].remove(queue)
-                    if not self.connections[user_id]:
-                        del self.connections[user_id]
-                    logger.info(f"SSE bağlantısı kapatıldı: User {user_id}")
-                except ValueError:
-                    pass
+        connection.close(connection.close_reason or "client_closed")
+        self._remove(user_id, connection)
     
-    async def send_update(self, user_id: int, event_type: str, data: dict):
-        """Kullanıcıya real-time update gönder"""
-        if user_id not in self.connections:
-            logger.debug(f"User {user_id} için aktif SSE bağlantısı yok")
+    def _remove(self, user_id: int, connection: SSEConnection):
+        user_connections = self.connections.get(user_id, ())
+        if connection not in user_connections:
             return
-        
+        remaining = tuple(c for c in user_connections if c is not connection)
+        if remaining:
+            self.connections[user_id] = remaining
+        else:
+            del self.connections[user_id]
+        logger.info("SSE bağlantısı kapatıldı: User %s", user_id)
+    
+    async def send_update(self, user_id: int, event_type: str, data: dict):
+        """Kullanıcıya real-time update gönder (bağlantısı hangi süreçte olursa olsun)"""
         # Event formatı
         event = {
             "type": event_type,
@@ -54,19 +315,36 @@ class SSEManager:
         # JSON serialize et
         message = json.dumps(event, ensure_ascii=False)
         
-        # Aktif bağlantılara gönder
-        async with self.lock:
-            connections = self.connections.get(user_id, []).copy()
+        await self.bus.publish(user_id, event_type, message)
+    
+    def _replay(self, connection: SSEConnection, last_event_id: int):
+        missed, complete = self.replay.since(connection.user_id, last_event_id)
+        for _, event_type, frame in missed:
+            connection.offer(event_type, frame)
+        metrics.inc("sse_replayed_events_total", len(missed))
+        if not complete:
+            metrics.inc("sse_replay_gaps_total")
+            logger.info("SSE replay eksik: User %s, Last-Event-ID %s tampondan düşmüş", connection.user_id, last_event_id)
+        logger.info("SSE replay: User %s, %s olay", connection.user_id, len(missed))
+    
+    def deliver_local(self, user_id: int, event_id: Optional[int], event_type: str, message: str):
+        """Bus'tan gelen olayı bu süreçteki bağlantılara teslim et (beklemeden; dolu kuyrukta taşma politikası uygulanır)"""
+        frame = format_sse_frame(message, event_id)
+        if event_id is not None:
+            self.replay.record(user_id, event_id, event_type, frame)
         
-        for queue in connections:
-            try:
-                await queue.put(message)
-            except Exception as e:
-                logger.error(f"SSE message gönderme hatası: {e}")
-                # Hatalı bağlantıyı temizle
-                await self.disconnect(user_id, queue)
+        connections = self.connections.get(user_id)
+        if not connections:
+            logger.debug("User %s için bu süreçte aktif SSE bağlantısı yok", user_id)
+            return
         
-        logger.debug(f"SSE update gönderildi: User {user_id}, Event: {event_type}")
+        # Tuple değiştirilmez; _remove yeni tuple koyar, gezilen anlık görüntü etkilenmez
+        for connection in connections:
+            if not connection.offer(event_type, frame) and connection.closed:
+                # Yavaş tüketici kapatıldı; kaydını temizle
+                self._remove(user_id, connection)
+        
+        logger.debug("SSE update gönderildi: User %s, Event: %s", user_id, event_type)
     
     async def send_processing_step(self, user_id: int, step: str, details: dict = None):
         """İşlem adımı update'i gönder"""
@@ -92,6 +370,16 @@ class SSEManager:
             "filename": filename
         })
     
+    async def send_page_processed(self, user_id: int, document_id: int, page: int, total_pages: int, text_length: int, method: str):
+        """PDF sayfa işleme ilerleme update'i gönder (method: text_layer | ocr)"""
+        await self.send_update(user_id, "page_processed", {
+            "document_id": document_id,
+            "page": page,
+            "total_pages": total_pages,
+            "text_length": text_length,
+            "method": method
+        })
+    
     def get_connection_count(self, user_id: int) -> int:
         """Kullanıcının aktif bağlantı sayısını döndür"""
         return len(self.connections.get(user_id, []))
@@ -99,6 +387,22 @@ class SSEManager:
     def get_total_connections(self) -> int:
         """Toplam aktif bağlantı sayısını döndür"""
         return sum(len(queues) for queues in self.connections.values())
+    
+    def get_queued_messages(self) -> int:
+        """Tüm bağlantılarda bekleyen toplam mesaj"""
+        return sum(len(connection) for queues in self.connections.values() for connection in queues)
+    
+    def get_max_queue_depth(self) -> int:
+        """En dolu bağlantı kuyruğunun derinliği"""
+        return max((len(connection) for queues in self.connections.values() for connection in queues), default=0)
 
 # Global SSE manager instance
-sse_manager = SSEManager() 
\ No newline at end of file
+sse_manager = SSEManager(
+    queue_max_size=settings.sse_queue_max_size,
+    overflow_policy=settings.sse_overflow_policy,
+    max_connections_per_user=settings.sse_max_connections_per_user,
+    bus=create_event_bus(settings.sse_event_bus),
+    replay_max_events=settings.sse_replay_max_events,
+    replay_ttl_seconds=settings.sse_replay_ttl_seconds,
+    min_event_interval=settings.demo_min_step_duration
+) 
\ No newline at end of file
@@ -0,0 +1,48 @@
+"""
+Mevcut tablolara sonradan eklenen sütunlar ve indexleri.
+
+create_all sadece eksik tabloları oluşturur; var olan tabloya sütun eklemez.
+upgrade_schema create_all'dan hemen sonra, uygulama (ve tabloya dokunan
+script'ler) başlarken çalışır. Bütün ifadeler idempotent'tir; aynı anda
+başlayan worker'lar Postgres'te advisory lock ile sıraya girer.
+"""
+import logging
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# (tablo, sütun, SQL tipi) - modele sonradan eklenen, nullable sütunlar
+ADDED_COLUMNS = [
+    ("documents", "content_hash", "VARCHAR(64)"),
+    ("documents", "storage_key", "VARCHAR(255)"),
+]
+
+# (index adı, tablo, sütun) - create_all'ın index=True için verdiği adlarla aynı
+ADDED_INDEXES = [
+    ("ix_documents_content_hash", "documents", "content_hash"),
+]
+
+# pg_advisory_xact_lock anahtarı (şema yükseltmesi için sabit)
+SCHEMA_UPGRADE_LOCK_ID = 728101
+
+def upgrade_schema(bind: Engine):
+    """Eksik sütun ve indexleri ekle (tekrar çalıştırmak güvenli)"""
+    postgres = bind.dialect.name == "postgresql"
+    with bind.begin() as connection:
+        if postgres:
+            connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": SCHEMA_UPGRADE_LOCK_ID})
+        inspector = inspect(connection)
+        tables = set(inspector.get_table_names())
+        for table, column, sql_type in ADDED_COLUMNS:
+            if table not in tables:
+                continue
+            if postgres:
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column} {sql_type}"))
+            elif column not in {c["name"] for c in inspector.get_columns(table)}:
+                # SQLite vb. ADD COLUMN IF NOT EXISTS desteklemez
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {sql_type}"))
+                logger.info("🗄️ %s.%s sütunu eklendi", table, column)
+        for name, table, column in ADDED_INDEXES:
+            if table in tables:
+                connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({column})"))
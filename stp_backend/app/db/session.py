@@ -1,13 +1,83 @@
-from sqlalchemy import create_engine
+import time
+from typing import AsyncIterator
+from sqlalchemy import create_engine, exc
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.metrics import metrics
 
-engine = create_engine(settings.database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def to_async_url(url: str) -> str:
+    """Senkron bağlantı adresinin async sürücülü karşılığı (asyncpg / aiosqlite)"""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    if url.startswith("sqlite://"):
+        return "sqlite+aiosqlite://" + url[len("sqlite://"):]
+    return url
+
+class _TimedCheckoutMixin:
+    """Havuzdan bağlantı alma süresini (bekleme + gerekirse yeni bağlantı) ölçer"""
+    metrics_prefix = "db_pool"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            metrics.inc(f"{self.metrics_prefix}_checkout_timeouts_total")
+            raise
+        finally:
+            metrics.observe(f"{self.metrics_prefix}_checkout_wait_seconds", time.perf_counter() - started)
+
+class InstrumentedQueuePool(_TimedCheckoutMixin, QueuePool):
+    metrics_prefix = "db_sync_pool"
+
+class InstrumentedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    metrics_prefix = "db_pool"
+
+def _pool_options(pool_size: int, max_overflow: int) -> dict:
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.db_pool_timeout_seconds,
+        "pool_recycle": settings.db_pool_recycle_seconds,
+        "pool_pre_ping": True,
+    }
+
+# Senkron engine: worker thread'leri (job queue, pipeline, toplu işler, script'ler) için
+engine = create_engine(
+    settings.database_url,
+    poolclass=InstrumentedQueuePool,
+    **_pool_options(settings.db_pool_size, settings.db_max_overflow)
+)
+# expire_on_commit=False: commit run_io ile thread'de yapılır; sonrasında event loop'ta
+# okunan attribute'lar (document.id, status vb.) loop'u bloklayan lazy SELECT tetiklemez
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+# Async engine: endpoint'ler event loop'u bloklamadan sorgu çalıştırır
+async_engine = create_async_engine(
+    settings.async_database_url or to_async_url(settings.database_url),
+    poolclass=InstrumentedAsyncQueuePool,
+    **_pool_options(settings.db_async_pool_size, settings.db_async_max_overflow)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+def register_pool_gauges():
+    """Kullanımdaki / boştaki / taşma bağlantı sayıları (/metrics)"""
+    for pool in (engine.pool, async_engine.sync_engine.pool):
+        prefix = pool.metrics_prefix
+        metrics.register_gauge(f"{prefix}_in_use", pool.checkedout)
+        metrics.register_gauge(f"{prefix}_idle", pool.checkedin)
+        metrics.register_gauge(f"{prefix}_overflow", lambda pool=pool: max(0, pool.overflow()))
 
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -1,10 +1,12 @@
 from fastapi import Depends, HTTPException, status, Cookie, Request
 from fastapi.security import OAuth2PasswordBearer
 from app.services.jwt_service import verify_token
-from app.services.user_service import get_user_by_username
-from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.services.user_service import get_user_by_id, get_user_by_username
+from app.services.auth_cache import auth_cache, AuthenticatedUser
+from app.db.session import AsyncSessionLocal
+from app.core.metrics import metrics
 import logging
+import time
 from typing import Optional
 
 logger = logging.getLogger(__name__)
@@ -23,13 +25,23 @@ async def get_token_from_cookie(
 async def get_current_user(
     request: Request,
     token: Optional[str] = Depends(oauth2_scheme),
-    cookie_token: Optional[str] = Depends(get_token_from_cookie),
-    db: Session = Depends(get_db)
-):
-    """Token'dan mevcut kullanıcıyı getir"""
+    cookie_token: Optional[str] = Depends(get_token_from_cookie)
+) -> AuthenticatedUser:
+    """
+    Token'dan mevcut kullanıcıyı getir. Kullanıcı imzası doğrulanmış token
+    claim'lerinden (uid, sub, email, name) oluşturulur; veritabanına gidilmez.
+    Claim'leri eksik eski token'lar önce önbellekten, yoksa veritabanından çözülür.
+    Kullanıcı silme/güncelleme endpoint'i olmadığından claim'ler token ömrü
+    (access_token_expire_minutes) boyunca geçerli kabul edilir.
+    """
+    started = time.perf_counter()
+    try:
+        return await _resolve_user(cookie_token or token)
+    finally:
+        metrics.observe("auth_overhead_seconds", time.perf_counter() - started)
+
+async def _resolve_user(final_token: Optional[str]) -> AuthenticatedUser:
     # Önce cookie'den token'ı kontrol et, yoksa header'dan al
-    final_token = cookie_token or token
-    
     if not final_token:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -49,11 +61,29 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    user = get_user_by_username(db, username)
-    if user is None:
+    user = AuthenticatedUser.from_claims(payload)
+    if user is not None:
+        return user
+
+    # Claim'leri eksik eski token: önbellek, yoksa uid ile birincil anahtardan,
+    # o da yoksa kullanıcı adıyla bak
+    user = auth_cache.get(username)
+    if user is not None:
+        return user
+
+    user_id = payload.get("uid")
+    async with AsyncSessionLocal() as db:
+        if user_id is not None:
+            db_user = await get_user_by_id(db, user_id)
+        else:
+            db_user = await get_user_by_username(db, username)
+    if db_user is None or db_user.username != username:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Kullanıcı bulunamadı",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    return user 
\ No newline at end of file
+
+    user = AuthenticatedUser.from_model(db_user)
+    auth_cache.put(username, user)
+    return user
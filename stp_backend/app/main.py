@@ -2,10 +2,21 @@ from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 from app.core.config import settings
-from app.core.logging_config import setup_logging
-from app.api.endpoints import document, user, sse
+from app.core.logging_config import setup_logging, get_queue_size as get_log_queue_size
+from app.api.endpoints import document, user, sse, job
 from app.db.base_class import Base
-from app.db.session import engine
+from app.db.session import engine, async_engine, register_pool_gauges
+from app.db.schema_upgrade import upgrade_schema
+from app.services.job_queue import job_queue
+from app.services.result_cache import result_cache
+from app.services.nlp_service import nlp_service
+from app.services.pre_extractor import pre_extractor
+from app.services.prompt_builder import prompt_builder
+from app.services.auth_cache import auth_cache
+from app.core.executors import executor_pools
+from app.core.loop_monitor import loop_monitor
+from app.core.metrics import metrics
+from app.core.sse_manager import sse_manager
 import logging
 
 # Logging'i başlat - uygulama başlarken
@@ -14,10 +25,12 @@ log_filename = setup_logging()
 # Logger'ı al ve sistem başlatma mesajını logla
 logger = logging.getLogger("app.startup")
 logger.info("🔧 STP Banking System başlatılıyor...")
-logger.info(f"📝 Log dosyası: {log_filename}")
+logger.info("📝 Log dosyası: %s", log_filename)
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
+# create_all mevcut tablolara sütun eklemez; sonradan eklenen sütun/indexler
+upgrade_schema(engine)
 logger.info("🗄️ Veritabanı tabloları oluşturuldu")
 
 # Custom OpenAPI schema function
@@ -47,6 +60,10 @@ Bu API, bankacılık süreçlerinde müşteri talimatlarını yapay zeka ile oto
                 "name": "documents", 
                 "description": "📄 Belge işleme - Dosya yükleme, OCR, NLP analizi, karar verme"
             },
+            {
+                "name": "jobs",
+                "description": "⏳ Asenkron işlemler - Kuyruğa alınan belgelerin durum takibi"
+            },
             {
                 "name": "real-time",
                 "description": "📡 Gerçek zamanlı iletişim - Server-Sent Events"
@@ -119,6 +136,42 @@ logger.info("🌐 CORS middleware konfigüre edildi")
 app.include_router(user.router, prefix="/api/v1/users", tags=["users"])
 app.include_router(document.router, prefix="/api/v1", tags=["documents"])
 app.include_router(sse.router, prefix="/api/v1/sse", tags=["real-time"])
+app.include_router(job.router, prefix="/api/v1", tags=["jobs"])
+
+@app.on_event("startup")
+async def start_background_services():
+    """Loop gecikme ölçümünü ve asenkron belge işleme worker'larını başlat"""
+    loop_monitor.start()
+    metrics.register_gauge("job_queue_size", job_queue.get_queue_size)
+    metrics.register_gauge("log_queue_size", get_log_queue_size)
+    metrics.register_gauge("result_cache_memory_entries", result_cache.get_memory_size)
+    metrics.register_gauge("openai_in_flight", nlp_service.get_in_flight)
+    register_pool_gauges()
+    metrics.register_gauge("auth_cache_entries", auth_cache.get_size)
+    metrics.register_gauge("auth_cache_hit_rate", auth_cache.get_hit_rate)
+    metrics.register_gauge("sse_connections", sse_manager.get_total_connections)
+    metrics.register_gauge("sse_queued_messages", sse_manager.get_queued_messages)
+    metrics.register_gauge("sse_max_queue_depth", sse_manager.get_max_queue_depth)
+    metrics.register_gauge("sse_bus_connected", lambda: int(sse_manager.bus.is_connected()))
+    metrics.register_gauge("sse_replay_events", sse_manager.replay.get_event_count)
+    metrics.register_gauge("sse_replay_users", sse_manager.replay.get_user_count)
+    metrics.register_gauge("sse_replay_memory_bytes", sse_manager.replay.get_memory_bytes)
+    result_cache.start()
+    # tiktoken encoding'i ilk istekten önce arka planda yüklensin
+    prompt_builder.counter.start_loading()
+    await sse_manager.start()
+    await job_queue.start()
+
+@app.on_event("shutdown")
+async def stop_background_services():
+    """Worker'ları, ölçümü ve executor havuzlarını durdur"""
+    await job_queue.stop()
+    await sse_manager.stop()
+    await result_cache.stop()
+    await nlp_service.aclose()
+    await loop_monitor.stop()
+    await async_engine.dispose()
+    executor_pools.shutdown()
 
 # Root endpoint
 @app.get("/", tags=["root"])
@@ -152,7 +205,16 @@ async def health_check():
         "timestamp": "2024-01-01T00:00:00Z"
     }
 
+# Metrics endpoint
+@app.get("/metrics", tags=["health"])
+async def get_metrics():
+    """Uygulama metrikleri - event loop gecikmesi, executor süreleri, kuyruk boyutları, GPT atlama oranları"""
+    snapshot = metrics.snapshot()
+    snapshot["pre_extraction"] = pre_extractor.get_report()
+    return snapshot
+
 logger.info("🚀 API routes yüklendi - Sistem hazır!")
 logger.info("📡 SSE endpoint: /api/v1/sse/stream")
+logger.info("⏳ Job durumu: /api/v1/jobs/{job_id}")
 logger.info("📚 API Documentation: http://localhost:8000/docs")
 logger.info("📖 ReDoc Documentation: http://localhost:8000/redoc") 
\ No newline at end of file
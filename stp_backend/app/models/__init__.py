@@ -1,5 +1,9 @@
 from .user import User
 from .document import Document
 from .decision import Decision
+from .job import ProcessingJob
+from .result_cache import ResultCacheEntry
+from .bulk_nlp_job import BulkNLPJob
+from .sse_event_spill import SSEEventSpill
 
-__all__ = ["User", "Document", "Decision"] 
\ No newline at end of file
+__all__ = ["User", "Document", "Decision", "ProcessingJob", "ResultCacheEntry", "BulkNLPJob", "SSEEventSpill"] 
\ No newline at end of file
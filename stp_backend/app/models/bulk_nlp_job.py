@@ -0,0 +1,31 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from app.db.base_class import Base
+from datetime import datetime
+import uuid
+
+class BulkNLPJob(Base):
+    __tablename__ = "bulk_nlp_jobs"
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    
+    # İşlem modu ve analiz parametreleri
+    mode = Column(String(20), nullable=False)  # packed (anlık, paketli) | batch (OpenAI Batch API)
+    model = Column(String(50), nullable=False)
+    prompt_version = Column(String(10), nullable=False)
+    
+    # Job durumu
+    status = Column(String(20), default="pending", index=True)  # pending, running, submitted, completed, failed
+    total = Column(Integer, default=0)
+    document_ids = Column(Text, nullable=False)  # JSON: işlenecek belge id'leri
+    completed_ids = Column(Text, default="[]")  # JSON: sonucu kaydedilen belge id'leri
+    failed = Column(Text, default="{}")  # JSON: belge id -> hata mesajı
+    error = Column(Text, nullable=True)
+    
+    # Batch modu: gönderilen batch ve custom_id -> belge id eşlemesi (devam ettirmek için)
+    remote_batch_id = Column(String(64), nullable=True)
+    remote_request_map = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON, types
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, JSON, Index, types
 from sqlalchemy.orm import relationship
 from app.db.base_class import Base
 from datetime import datetime
@@ -15,12 +15,22 @@ class JSONType(types.TypeDecorator):
 
 class Decision(Base):
     __tablename__ = "decisions"
+    __table_args__ = (
+        # Kullanıcı karar listesi: WHERE user_id = ? ORDER BY created_at DESC, id DESC
+        # keyset sayfalaması bu index üzerinde geriye doğru taranır (sıralama/OFFSET yok)
+        Index("ix_decisions_user_created_id", "user_id", "created_at", "id"),
+        # Filtreli listeler için aynı sıralamayı koruyan indexler
+        Index("ix_decisions_user_decision_created_id", "user_id", "decision", "created_at", "id"),
+        Index("ix_decisions_user_doctype_created_id", "user_id", "document_type", "created_at", "id"),
+        Index("ix_decisions_user_risk_created_id", "user_id", "risk_level", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     
     # Foreign Keys
     document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    # Tek sütunlu user_id indexi yok; bileşik indexlerin ilk sütunu aynı işi görür
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     
     # Decision Results
     decision = Column(String(20), nullable=False, index=True)  # APPROVED, REJECTED, MANUAL_REVIEW, PENDING
@@ -1,5 +1,5 @@
 from sqlalchemy import Column, Integer, String, DateTime, Text, LargeBinary, ForeignKey
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.db.base_class import Base
 from datetime import datetime
 
@@ -10,10 +10,16 @@ class Document(Base):
     file_name = Column(String(255), nullable=False)
     file_type = Column(String(10), nullable=False)
     content_type = Column(String(100), nullable=False)
-    file_content = Column(LargeBinary, nullable=True)  # Dosya içeriği
+    # Eski kayıtların dosya içeriği; scripts/migrate_blobs.py ile blob store'a taşınır ve NULL'lanır.
+    # deferred: belge satırı yüklenirken içerik okunmaz
+    file_content = deferred(Column(LargeBinary, nullable=True))
     file_size = Column(Integer, nullable=True)  # Dosya boyutu (bytes)
-    raw_text = Column(Text, nullable=True)  # OCR'dan çıkan ham metin
-    extracted_data = Column(Text, nullable=True)  # JSON formatında çıkarılan veriler
+    content_hash = Column(String(64), nullable=True, index=True)  # İçeriğin SHA-256 özeti (tekrar tespiti)
+    storage_key = Column(String(255), nullable=True)  # Blob store anahtarı (sha256/ab/cd/<hash>)
+    # Ağır metin sütunları varsayılan olarak yüklenmez; gerektiğinde undefer() veya
+    # sütun projeksiyonu ile okunur (app/services/document_query.py)
+    raw_text = deferred(Column(Text, nullable=True))  # OCR'dan çıkan ham metin
+    extracted_data = deferred(Column(Text, nullable=True))  # JSON formatında çıkarılan veriler
     status = Column(String(20), default="pending")  # pending, processing, completed, failed
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey
+from sqlalchemy.orm import relationship
+from app.db.base_class import Base
+from datetime import datetime
+import uuid
+
+class ProcessingJob(Base):
+    __tablename__ = "processing_jobs"
+    
+    id = Column(String(36), primary_key=True, default=lambda: str(uuid.uuid4()))
+    
+    # Foreign Keys
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    
+    # Job durumu
+    status = Column(String(20), default="queued", index=True)  # queued, running, completed, failed
+    current_step = Column(String(100), nullable=True)  # Son SSE adımı
+    attempts = Column(Integer, default=0)
+    result = Column(Text, nullable=True)  # JSON formatında pipeline sonucu
+    error = Column(Text, nullable=True)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    
+    # Relationships
+    document = relationship("Document")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, DateTime, Text
+from app.db.base_class import Base
+from datetime import datetime
+
+class ResultCacheEntry(Base):
+    __tablename__ = "result_cache"
+    
+    # sha256(kind + içerik hash'i + OCR ayarları + model + prompt versiyonu)
+    cache_key = Column(String(64), primary_key=True)
+    kind = Column(String(10), nullable=False)  # ocr, nlp
+    content_hash = Column(String(64), nullable=False, index=True)
+    payload = Column(Text, nullable=False)  # JSON formatında önbelleklenen sonuç
+    hit_count = Column(Integer, default=0)
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_accessed_at = Column(DateTime, default=datetime.utcnow, index=True)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, BigInteger, Integer, Sequence, String, DateTime, Text
+from app.db.base_class import Base
+from datetime import datetime
+
+class SSEEventSpill(Base):
+    __tablename__ = "sse_event_spill"
+    
+    # Postgres NOTIFY sınırını (8000 byte) aşan SSE mesajları; NOTIFY ile sadece id gider
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    user_id = Column(Integer, nullable=False)
+    event_type = Column(String(50), nullable=False)
+    payload = Column(Text, nullable=False)  # Serialize edilmiş SSE mesajı
+    
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+
+# Süreçler arası SSE olay id'leri (Last-Event-ID); sadece Postgres'te oluşturulur
+sse_event_id_seq = Sequence("sse_event_id_seq", metadata=Base.metadata)
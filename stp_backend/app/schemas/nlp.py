@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from enum import Enum
 
 class DocumentType(str, Enum):
@@ -70,4 +70,27 @@ class NLPAnalysisResult(BaseModel):
     success: bool = False
     message: str = ""
     entities: Optional[ExtractedEntities] = None
-    processing_time: float = 0.0 
\ No newline at end of file
+    processing_time: float = 0.0
+
+
+class BuiltPrompt(BaseModel):
+    """Token bütçesine göre hazırlanmış GPT mesajları"""
+    messages: List[Dict[str, str]]
+    prompt_tokens: int  # Mesajların tahmini toplam token sayısı
+    max_tokens: int  # Yanıt için ayrılan token
+    document_tokens: int  # Kırpma sonrası belge metni
+    original_document_tokens: int
+    dropped_pages: List[int] = []  # Özetlenerek çıkarılan sayfa numaraları
+    truncated: bool = False  # Sayfa içi satır kırpma yapıldı mı
+    token_counter: str = "heuristic"  # tiktoken encoding adı veya heuristic
+    document_ids: List[int] = []  # Toplu analizde bu istekteki belgeler
+
+class PreExtractionResult(BaseModel):
+    """Regex + checksum ile LLM'siz çıkarım sonucu"""
+    document_type: DocumentType = DocumentType.OTHER
+    document_type_confidence: float = 0.0
+    known_values: Dict[str, Dict[str, Any]] = {}  # bölüm -> alan -> değer (yüksek güvenli alanlar)
+    field_confidence: Dict[str, float] = {}  # "bölüm.alan" -> 0-1 güven
+    missing_fields: List[str] = []  # LLM'e sorulacak "bölüm.alan" listesi
+    complete: bool = False  # Karar için gereken tüm alanlar yüksek güvenle bulundu
+    processing_time: float = 0.0
@@ -0,0 +1,89 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+
+class AuthenticatedUser(NamedTuple):
+    """
+    Doğrulanmış kullanıcının değişmez kopyası. Endpoint'ler ORM nesnesi yerine bunu
+    alır; oturumdan bağımsız olduğu için istekler arasında güvenle paylaşılabilir.
+    """
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+
+    @classmethod
+    def from_model(cls, user) -> "AuthenticatedUser":
+        return cls(id=user.id, username=user.username, email=user.email, full_name=user.full_name)
+
+    def to_claims(self) -> dict:
+        """Access token'a yazılan kullanıcı claim'leri (doğrulamada veritabanına gidilmez)"""
+        return {"sub": self.username, "uid": self.id, "email": self.email, "name": self.full_name}
+
+    @classmethod
+    def from_claims(cls, payload: dict) -> Optional["AuthenticatedUser"]:
+        """İmzası doğrulanmış token payload'ından; claim'leri eksik eski token'larda None"""
+        if payload.get("uid") is None or payload.get("email") is None:
+            return None
+        return cls(id=payload["uid"], username=payload["sub"], email=payload["email"], full_name=payload.get("name"))
+
+class AuthCache:
+    """
+    Token subject'i (kullanıcı adı) -> AuthenticatedUser; kullanıcı claim'leri
+    olmayan eski token'ları veritabanına gitmeden çözmek için. TTL ve boyut sınırlı
+    süreç içi LRU (OrderedDict, thread-safe). Kullanıcı değiştiğinde veya çıkış
+    yaptığında invalidate edilir; diğer worker süreçlerinde kayıt en geç TTL
+    sonunda yenilenir.
+    """
+
+    def __init__(self, ttl_seconds: float = 60.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, AuthenticatedUser]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, subject: str) -> Optional[AuthenticatedUser]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(subject)
+                self._hits += 1
+                metrics.inc("auth_cache_hits_total")
+                return entry[1]
+            if entry is not None:
+                del self._entries[subject]
+            self._misses += 1
+        metrics.inc("auth_cache_misses_total")
+        return None
+
+    def put(self, subject: str, user: AuthenticatedUser):
+        if self.ttl_seconds <= 0:
+            return
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + self.ttl_seconds, user)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, subject: str):
+        with self._lock:
+            self._entries.pop(subject, None)
+        metrics.inc("auth_cache_invalidations_total")
+
+    def get_size(self) -> int:
+        return len(self._entries)
+
+    def get_hit_rate(self) -> float:
+        total = self._hits + self._misses
+        return self._hits / total if total else 0.0
+
+auth_cache = AuthCache(
+    ttl_seconds=settings.auth_cache_ttl_seconds,
+    max_entries=settings.auth_cache_max_entries
+)
@@ -0,0 +1,251 @@
+import hashlib
+import logging
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from typing import BinaryIO, Callable, Iterable, Iterator, NamedTuple, Optional, Tuple
+from sqlalchemy import func
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.db.session import SessionLocal
+from app.models.document import Document
+
+logger = logging.getLogger(__name__)
+
+class BlobInfo(NamedTuple):
+    """Kaydedilen blob: depolama anahtarı, SHA-256 özeti ve boyutu"""
+    key: str
+    content_hash: str
+    size: int
+
+class BlobNotFoundError(Exception):
+    """Anahtara karşılık gelen blob yoksa fırlatılır"""
+    pass
+
+def iter_file_chunks(file: BinaryIO, chunk_size: int) -> Iterator[bytes]:
+    """Dosya benzeri nesneyi parça parça oku"""
+    while True:
+        chunk = file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+class BlobStore(ABC):
+    """
+    İçerik adresli blob deposu arayüzü. Anahtar içeriğin SHA-256 özetinden
+    türetilir; aynı dosya ikinci kez yüklendiğinde tekrar yazılmaz.
+    Metotlar bloklayan I/O yapar, async koddan run_io ile çağrılmalıdır.
+    S3 uyumlu bir backend aynı metotları (put_stream/iter_chunks/...) sağlamalıdır.
+    """
+
+    def __init__(self, chunk_size: int = 1024 * 1024):
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def key_for(content_hash: str) -> str:
+        """sha256/ab/cd/abcd... (iki seviyeli dağıtım, dizin başına en fazla 256 alt dizin)"""
+        return f"sha256/{content_hash[:2]}/{content_hash[2:4]}/{content_hash}"
+
+    @abstractmethod
+    def put_stream(self, chunks: Iterable[bytes], validate: Optional[Callable[[str], None]] = None) -> BlobInfo:
+        """
+        Parça akışını kaydet; hash yazarken hesaplanır.
+        validate verilirse geçici dosyanın yolu ile, blob kalıcı hale gelmeden önce
+        çağrılır; hata fırlatırsa hiçbir şey kaydedilmez.
+        """
+
+    @abstractmethod
+    def iter_chunks(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Blob'u [start, end] bayt aralığında (end dahil) parça parça oku"""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        pass
+
+    @abstractmethod
+    def size(self, key: str) -> int:
+        pass
+
+    @abstractmethod
+    def delete(self, key: str) -> bool:
+        pass
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Blob yerel diskteyse dosya yolu (pdf2image/PIL'e yol vermek için); değilse None"""
+        return None
+
+    def put_bytes(self, data: bytes) -> BlobInfo:
+        return self.put_stream(
+            data[offset:offset + self.chunk_size] for offset in range(0, len(data), self.chunk_size)
+        )
+
+    def put_file(self, file: BinaryIO, validate: Optional[Callable[[str], None]] = None) -> BlobInfo:
+        return self.put_stream(iter_file_chunks(file, self.chunk_size), validate)
+
+    def read_bytes(self, key: str) -> bytes:
+        """Tüm blob'u belleğe oku (sadece OCR gibi tüm içeriğe ihtiyaç duyan yerler için)"""
+        return b"".join(self.iter_chunks(key))
+
+class LocalBlobStore(BlobStore):
+    """
+    Yerel dosya sistemi backend'i. Yazma aynı dosya sisteminde geçici dosyaya
+    yapılır ve hash belli olunca atomik rename ile yerine taşınır; yarım kalan
+    yazma hiçbir zaman geçerli bir anahtar altında görünmez.
+    """
+
+    def __init__(self, root: str, chunk_size: int = 1024 * 1024):
+        super().__init__(chunk_size)
+        self.root = os.path.abspath(root)
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        # Anahtar kök dizin dışına çıkamaz
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Geçersiz blob anahtarı: {key}")
+        return path
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    def put_stream(self, chunks: Iterable[bytes], validate: Optional[Callable[[str], None]] = None) -> BlobInfo:
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir, prefix="upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp_file:
+                for chunk in chunks:
+                    digest.update(chunk)
+                    tmp_file.write(chunk)
+                    size += len(chunk)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+
+            if validate is not None:
+                validate(tmp_path)
+
+            content_hash = digest.hexdigest()
+            key = self.key_for(content_hash)
+            path = self._path(key)
+            if os.path.exists(path):
+                # Aynı içerik zaten var (tekrar yükleme)
+                os.unlink(tmp_path)
+                metrics.inc("blob_store_dedup_total")
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+                metrics.inc("blob_store_writes_total")
+                metrics.inc("blob_store_written_bytes_total", size)
+            return BlobInfo(key=key, content_hash=content_hash, size=size)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    def iter_chunks(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        path = self._path(key)
+        try:
+            file = open(path, "rb")
+        except FileNotFoundError:
+            raise BlobNotFoundError(key)
+        with file:
+            file.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = file.read(self.chunk_size if remaining is None else min(self.chunk_size, remaining))
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def exists(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def size(self, key: str) -> int:
+        try:
+            return os.path.getsize(self._path(key))
+        except FileNotFoundError:
+            raise BlobNotFoundError(key)
+
+    def delete(self, key: str) -> bool:
+        try:
+            os.unlink(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+def create_blob_store(backend: str, root: str, chunk_size: int) -> BlobStore:
+    """Ayarlara göre blob store oluştur (şimdilik sadece 'local')"""
+    if backend == "local":
+        return LocalBlobStore(root, chunk_size)
+    raise ValueError(f"Desteklenmeyen blob store backend'i: {backend}")
+
+def materialize_document(document) -> Tuple[Optional[str], bool]:
+    """
+    OCR için belgenin dosya yolu: (yol, geçici_mi). Blob yerel diskteyse doğrudan
+    onun yolu döner; taşınmamış eski kayıtlar geçici dosyaya yazılır (çağıran siler).
+    """
+    if document.storage_key:
+        path = blob_store.local_path(document.storage_key)
+        if path is not None:
+            if os.path.exists(path):
+                return path, False
+            logger.error("Document %s blob'u bulunamadı: %s", document.id, document.storage_key)
+            return None, False
+
+    content = read_document_content(document)
+    if not content:
+        return None, False
+    fd, path = tempfile.mkstemp(prefix="stp_document_")
+    with os.fdopen(fd, "wb") as tmp_file:
+        tmp_file.write(content)
+    return path, True
+
+def read_document_content(document) -> Optional[bytes]:
+    """
+    Belgenin dosya içeriği: blob store'da ise oradan, henüz taşınmamış eski
+    kayıtlarda documents.file_content sütunundan okunur.
+    """
+    if document.storage_key:
+        try:
+            return blob_store.read_bytes(document.storage_key)
+        except BlobNotFoundError:
+            logger.error("Document %s blob'u bulunamadı: %s", document.id, document.storage_key)
+            return None
+    return document.file_content
+
+def legacy_content_size(document_id: int) -> int:
+    """Taşınmamış kaydın file_content boyutu (içerik belleğe alınmadan, SQL length ile)"""
+    db = SessionLocal()
+    try:
+        return db.query(func.length(Document.file_content)).filter(Document.id == document_id).scalar() or 0
+    finally:
+        db.close()
+
+def iter_legacy_chunks(document_id: int, start: int, end: int, chunk_size: int) -> Iterator[bytes]:
+    """
+    Taşınmamış kaydın file_content sütununu [start, end] aralığında SQL substring ile
+    parça parça oku; büyük dosyalar tek seferde belleğe alınmaz.
+    """
+    db = SessionLocal()
+    try:
+        offset = start
+        while offset <= end:
+            length = min(chunk_size, end - offset + 1)
+            chunk = db.query(
+                func.substr(Document.file_content, offset + 1, length)
+            ).filter(Document.id == document_id).scalar()
+            if not chunk:
+                return
+            yield bytes(chunk)
+            offset += len(chunk)
+    finally:
+        db.close()
+
+blob_store = create_blob_store(
+    settings.blob_store_backend,
+    settings.blob_store_path,
+    settings.blob_store_chunk_size
+)
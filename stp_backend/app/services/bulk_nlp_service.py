@@ -0,0 +1,257 @@
+import asyncio
+import json
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy.orm import Session, undefer
+from app.core.config import settings
+from app.core.executors import run_io
+from app.core.metrics import metrics
+from app.db.session import SessionLocal
+from app.models.bulk_nlp_job import BulkNLPJob
+from app.models.document import Document
+from app.schemas.nlp import NLPAnalysisResult
+from app.services.nlp_service import nlp_service
+
+logger = logging.getLogger(__name__)
+
+BULK_MODES = ("packed", "batch")
+BATCH_TERMINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+class BulkNLPService:
+    """
+    Birikmiş belgelerin (günlük backlog, prompt değişikliği sonrası yeniden çıkarım)
+    toplu NLP analizi. Metin Document.raw_text'ten okunur, sonuç
+    Document.extracted_data["nlp_analysis"] alanına yazılır.
+    İlerleme bulk_nlp_jobs tablosunda tutulur; yarıda kalan job aynı id ile
+    çalıştırıldığında sadece işlenmemiş belgelerle devam eder.
+    - packed: kısa belgeler tek istekte paketlenir, anlık çağrılar (chunk_size belgede bir kayıt)
+    - batch: OpenAI Batch API; batch id saklanır, devam ederken yeniden gönderilmez
+    """
+
+    def __init__(self, chunk_size: int = 50, poll_interval: float = 60.0):
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+
+    # ----- Job oluşturma -----
+
+    def select_documents(
+        self,
+        db: Session,
+        user_id: Optional[int] = None,
+        status: Optional[str] = None,
+        since: Optional[datetime] = None,
+        limit: Optional[int] = None
+    ) -> List[int]:
+        """Metni olan belgelerin id'leri (eskiden yeniye)"""
+        query = db.query(Document.id).filter(Document.raw_text.isnot(None))
+        if user_id is not None:
+            query = query.filter(Document.user_id == user_id)
+        if status is not None:
+            query = query.filter(Document.status == status)
+        if since is not None:
+            query = query.filter(Document.created_at >= since)
+        query = query.order_by(Document.id)
+        if limit:
+            query = query.limit(limit)
+        return [document_id for (document_id,) in query.all()]
+
+    def create_job(self, db: Session, document_ids: List[int], mode: str = "packed") -> BulkNLPJob:
+        """Job kaydını oluştur (çalıştırmadan)"""
+        if mode not in BULK_MODES:
+            raise ValueError(f"Geçersiz toplu analiz modu: {mode}")
+        job = BulkNLPJob(
+            mode=mode,
+            model=nlp_service.model,
+            prompt_version=nlp_service.prompt_version,
+            status="pending",
+            total=len(document_ids),
+            document_ids=json.dumps(document_ids),
+            completed_ids="[]",
+            failed="{}"
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        logger.info("Toplu NLP job'ı oluşturuldu: %s (%s, %s belge)", job.id, mode, len(document_ids))
+        return job
+
+    # ----- Yardımcılar -----
+
+    @staticmethod
+    def _remaining_ids(job: BulkNLPJob) -> List[int]:
+        done = set(json.loads(job.completed_ids or "[]")) | {int(key) for key in json.loads(job.failed or "{}")}
+        return [document_id for document_id in json.loads(job.document_ids) if document_id not in done]
+
+    @staticmethod
+    def _load_texts(db: Session, document_ids: List[int]) -> List[Tuple[int, str]]:
+        rows = db.query(Document.id, Document.raw_text).filter(Document.id.in_(document_ids)).all()
+        texts = {document_id: raw_text for document_id, raw_text in rows}
+        # Sıra korunur; metni olmayan belgeler atlanır
+        return [(document_id, texts[document_id]) for document_id in document_ids if texts.get(document_id)]
+
+    def _apply_results(self, db: Session, job: BulkNLPJob, document_ids: List[int], results: Dict[int, NLPAnalysisResult]):
+        """Sonuçları belgelere yaz ve job ilerlemesini aynı transaction'da kaydet"""
+        completed_ids = json.loads(job.completed_ids or "[]")
+        failed = json.loads(job.failed or "{}")
+        documents = {
+            document.id: document
+            for document in db.query(Document).options(undefer(Document.extracted_data)).filter(
+                Document.id.in_(document_ids)
+            ).all()
+        }
+        analyzed_at = datetime.utcnow().isoformat()
+
+        for document_id in document_ids:
+            result = results.get(document_id)
+            document = documents.get(document_id)
+            if document is None or result is None:
+                failed[str(document_id)] = "Belge veya metin bulunamadı"
+                continue
+            if not result.success:
+                failed[str(document_id)] = result.message
+                continue
+
+            try:
+                extracted_data = json.loads(document.extracted_data) if document.extracted_data else {}
+            except json.JSONDecodeError:
+                extracted_data = {}
+            extracted_data["nlp_analysis"] = result.dict()
+            extracted_data["bulk_nlp"] = {
+                "job_id": job.id,
+                "mode": job.mode,
+                "model": job.model,
+                "prompt_version": job.prompt_version,
+                "analyzed_at": analyzed_at
+            }
+            document.extracted_data = json.dumps(extracted_data, ensure_ascii=False, default=str)
+            completed_ids.append(document_id)
+
+        job.completed_ids = json.dumps(completed_ids)
+        job.failed = json.dumps(failed, ensure_ascii=False)
+        db.commit()
+
+        metrics.inc("nlp_bulk_documents_total", len(document_ids))
+        logger.info(
+            "Toplu NLP job %s: %s/%s tamamlandı, %s başarısız",
+            job.id, len(completed_ids), job.total, len(failed)
+        )
+
+    @staticmethod
+    def get_summary(job: BulkNLPJob) -> Dict[str, Any]:
+        """Job durumu ve ilerleme özeti"""
+        failed = json.loads(job.failed or "{}")
+        return {
+            "job_id": job.id,
+            "mode": job.mode,
+            "status": job.status,
+            "total": job.total,
+            "completed": len(json.loads(job.completed_ids or "[]")),
+            "failed": len(failed),
+            "failed_documents": failed,
+            "remote_batch_id": job.remote_batch_id,
+            "prompt_version": job.prompt_version,
+            "error": job.error
+        }
+
+    def _finish(self, db: Session, job: BulkNLPJob, status: str, error: Optional[str] = None):
+        job.status = status
+        job.error = error
+        job.finished_at = datetime.utcnow()
+        db.commit()
+
+    # ----- Çalıştırma -----
+
+    async def run_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job'ı çalıştır veya kaldığı yerden devam ettir; bitişte get_summary() döner"""
+        db = SessionLocal()
+        try:
+            job = await run_io(lambda: db.query(BulkNLPJob).filter(BulkNLPJob.id == job_id).first())
+            if job is None:
+                logger.error("Toplu NLP job'ı bulunamadı: %s", job_id)
+                return None
+            if job.status in ("completed", "failed"):
+                logger.info("Toplu NLP job %s zaten bitmiş: %s", job_id, job.status)
+                return self.get_summary(job)
+            if job.prompt_version != nlp_service.prompt_version or job.model != nlp_service.model:
+                # Ayarlar job başladıktan sonra değiştiyse kalan belgeler yeni ayarlarla işlenir; kayıt güncellenir
+                logger.warning(
+                    "Job %s %s/v%s ile başlatıldı, şu an %s/v%s; kalan belgeler yeni ayarlarla işlenecek",
+                    job_id, job.model, job.prompt_version, nlp_service.model, nlp_service.prompt_version
+                )
+                job.model = nlp_service.model
+                job.prompt_version = nlp_service.prompt_version
+
+            try:
+                if job.mode == "batch":
+                    await self._run_batch(db, job)
+                else:
+                    await self._run_packed(db, job)
+            except Exception as e:
+                # Yarıda kalan job 'running/submitted' kalır ve tekrar çalıştırılabilir
+                logger.error("Toplu NLP job %s hatası: %s", job_id, e)
+                job.error = str(e)
+                await run_io(db.commit)
+                raise
+            return await run_io(self.get_summary, job)
+        finally:
+            db.close()
+
+    async def _run_packed(self, db: Session, job: BulkNLPJob):
+        job.status = "running"
+        await run_io(db.commit)
+
+        remaining = self._remaining_ids(job)
+        if len(remaining) < job.total:
+            logger.info("Toplu NLP job %s devam ediyor: %s belge kaldı", job.id, len(remaining))
+
+        for offset in range(0, len(remaining), self.chunk_size):
+            chunk = remaining[offset:offset + self.chunk_size]
+            items = await run_io(self._load_texts, db, chunk)
+            results = await nlp_service.analyze_documents_bulk(items)
+            await run_io(self._apply_results, db, job, chunk, results)
+
+        await run_io(self._finish, db, job, "completed")
+
+    async def _run_batch(self, db: Session, job: BulkNLPJob):
+        if job.remote_batch_id is None:
+            remaining = self._remaining_ids(job)
+            items = await run_io(self._load_texts, db, remaining)
+            if not items:
+                await run_io(self._apply_results, db, job, remaining, {})
+                await run_io(self._finish, db, job, "completed")
+                return
+            batch, request_map = await nlp_service.submit_batch(items, metadata={"bulk_nlp_job": job.id})
+            job.remote_batch_id = batch["id"]
+            job.remote_request_map = json.dumps(request_map)
+            job.status = "submitted"
+            await run_io(db.commit)
+        else:
+            logger.info("Toplu NLP job %s: gönderilmiş batch %s izleniyor", job.id, job.remote_batch_id)
+
+        while True:
+            batch = await nlp_service.get_batch(job.remote_batch_id)
+            counts = batch.get("request_counts") or {}
+            logger.info(
+                "Batch %s: %s (%s/%s istek)",
+                job.remote_batch_id, batch.get('status'), counts.get('completed', 0), counts.get('total', 0)
+            )
+            if batch.get("status") in BATCH_TERMINAL_STATUSES:
+                break
+            await asyncio.sleep(self.poll_interval)
+
+        request_map = json.loads(job.remote_request_map or "{}")
+        if batch["status"] == "failed":
+            await run_io(self._finish, db, job, "failed", json.dumps(batch.get("errors"), ensure_ascii=False))
+            return
+
+        # expired/cancelled batch'lerde de tamamlanan istekler çıktı dosyasında bulunur
+        results = await nlp_service.fetch_batch_results(batch, request_map)
+        # Gönderilmeyen (metni olmayan) belgeler de başarısız olarak işaretlenir
+        await run_io(self._apply_results, db, job, self._remaining_ids(job), results)
+        await run_io(self._finish, db, job, "completed")
+
+bulk_nlp_service = BulkNLPService(
+    chunk_size=settings.bulk_nlp_chunk_size,
+    poll_interval=settings.openai_batch_poll_seconds
+)
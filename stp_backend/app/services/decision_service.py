@@ -1,15 +1,46 @@
 import logging
-from typing import Optional, Dict, Any
+import threading
+import time
+from typing import Optional, Dict, Any, List, Tuple
+from sqlalchemy import func, tuple_
 from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import metrics
 from app.models.decision import Decision
 from app.services.validation_service import validation_service
 from datetime import datetime
+import base64
 import json
 
 logger = logging.getLogger(__name__)
 
+# Karar listesinde index'li filtrelenebilen alanlar
+DECISION_FILTERS = ("decision", "document_type", "risk_level")
+
+class InvalidCursorError(ValueError):
+    """Sayfalama imleci çözülemezse fırlatılır"""
+    pass
+
+def encode_cursor(created_at: datetime, decision_id: int) -> str:
+    """Son satırın (created_at, id) değerinden opak imleç"""
+    payload = json.dumps({"c": created_at.isoformat(), "i": decision_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload["c"]), int(payload["i"])
+    except Exception:
+        raise InvalidCursorError("Geçersiz sayfalama imleci")
+
 class DecisionService:
     
+    def __init__(self, count_cache_seconds: float = 30.0):
+        self.count_cache_seconds = count_cache_seconds
+        # (user_id, filtreler) -> (geçerlilik sonu, toplam)
+        self._count_cache: Dict[Tuple, Tuple[float, int]] = {}
+        self._count_lock = threading.Lock()
+    
     def make_decision(self, parsed_data: Dict[Any, Any]) -> Dict[str, Any]:
         """
         NLP'den gelen verilere göre karar ver - Sadece APPROVED veya REJECTED
@@ -204,7 +235,7 @@ class DecisionService:
             }
             
         except Exception as e:
-            logger.error(f"Karar verme hatası: {e}")
+            logger.error("Karar verme hatası: %s", e)
             return {
                 "decision": "REJECTED",
                 "confidence": 0.0,
@@ -270,32 +301,97 @@ class DecisionService:
             db.add(decision)
             db.commit()
             db.refresh(decision)
+            self.invalidate_user_counts(user_id)
             
-            logger.info(f"Decision kaydedildi: ID {decision.id}, Decision: {decision.decision}")
+            logger.info("Decision kaydedildi: ID %s, Decision: %s", decision.id, decision.decision)
             return decision
             
         except Exception as e:
-            logger.error(f"Decision kaydetme hatası: {e}")
+            logger.error("Decision kaydetme hatası: %s", e)
             db.rollback()
             raise
     
+    def _filtered_query(self, db: Session, query, user_id: int, filters: Dict[str, Optional[str]]):
+        query = query.filter(Decision.user_id == user_id)
+        for name in DECISION_FILTERS:
+            value = filters.get(name)
+            if value:
+                query = query.filter(getattr(Decision, name) == value)
+        return query
+    
+    def _page_query(
+        self,
+        db: Session,
+        user_id: int,
+        limit: int,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Optional[str]]] = None
+    ):
+        query = self._filtered_query(db, db.query(Decision), user_id, filters or {})
+        if cursor:
+            created_at, decision_id = decode_cursor(cursor)
+            query = query.filter(tuple_(Decision.created_at, Decision.id) < (created_at, decision_id))
+        query = query.order_by(Decision.created_at.desc(), Decision.id.desc())
+        if offset and not cursor:
+            query = query.offset(offset)
+        return query.limit(limit)
+    
     def get_user_decisions(
         self, 
         db: Session, 
         user_id: int, 
         limit: int = 100, 
-        offset: int = 0
-    ):
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        filters: Optional[Dict[str, Optional[str]]] = None
+    ) -> Tuple[List[Decision], Optional[str]]:
         """
-        Kullanıcının kararlarını getir
+        Kullanıcının kararlarını getir (en yeniden eskiye): (kararlar, sonraki_imleç).
+        İmleç verilirse keyset sayfalaması yapılır; (user_id, created_at, id) indexinde
+        doğrudan imlecin konumuna gidilir, sayfa derinliği sorgu süresini etkilemez.
+        offset sadece eski istemciler için desteklenir.
         """
-        return (
-            db.query(Decision)
-            .filter(Decision.user_id == user_id)
-            .order_by(Decision.created_at.desc())
-            .offset(offset)
-            .limit(limit)
-            .all()
-        )
+        # Bir fazlası okunur; varsa sonraki sayfa vardır
+        rows = self._page_query(db, user_id, limit + 1, offset, cursor, filters).all()
+        decisions = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            last = decisions[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+        return decisions, next_cursor
+    
+    def count_user_decisions(
+        self,
+        db: Session,
+        user_id: int,
+        filters: Optional[Dict[str, Optional[str]]] = None
+    ) -> int:
+        """
+        Filtreye uyan toplam karar sayısı. COUNT bileşik index üzerinden sayılır ve
+        kısa süre önbellekte tutulur; kullanıcı yeni karar kaydettiğinde geçersiz olur.
+        """
+        filters = filters or {}
+        key = (user_id,) + tuple(filters.get(name) or None for name in DECISION_FILTERS)
+        now = time.monotonic()
+        with self._count_lock:
+            cached = self._count_cache.get(key)
+            if cached and cached[0] > now:
+                metrics.inc("decision_count_cache_hits_total")
+                return cached[1]
+        
+        metrics.inc("decision_count_cache_misses_total")
+        total = self._filtered_query(db, db.query(func.count(Decision.id)), user_id, filters).scalar() or 0
+        with self._count_lock:
+            self._count_cache[key] = (now + self.count_cache_seconds, total)
+            # Süresi dolanlar arada temizlenir (sınırsız büyümesin)
+            if len(self._count_cache) > 10000:
+                self._count_cache = {k: v for k, v in self._count_cache.items() if v[0] > now}
+        return total
+    
+    def invalidate_user_counts(self, user_id: int):
+        with self._count_lock:
+            for key in [key for key in self._count_cache if key[0] == user_id]:
+                del self._count_cache[key]
 
-decision_service = DecisionService() 
\ No newline at end of file
+decision_service = DecisionService(count_cache_seconds=settings.decision_count_cache_seconds) 
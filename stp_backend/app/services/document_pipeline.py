@@ -0,0 +1,436 @@
+import json
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.document import Document
+from app.services.ocr_service import ocr_service, ocr_image_file
+from app.services.pdf_ocr_engine import pdf_ocr_engine
+from app.services.nlp_service import nlp_service
+from app.services.result_cache import result_cache, compute_content_hash, compute_file_hash
+from app.services.pre_extractor import pre_extractor
+from app.schemas.nlp import NLPAnalysisResult, ExtractedEntities
+from app.services.decision_service import decision_service
+from app.core.logging_config import (
+    log_processing_step,
+    log_document_processing_end,
+    log_error
+)
+from app.core.pacing import StepPacer
+from app.core.executors import run_cpu, run_io
+
+logger = logging.getLogger(__name__)
+
+class DocumentPipeline:
+    """
+    OCR -> NLP -> Karar zinciri.
+    Hem senkron endpoint'ler hem de job worker'ları tarafından kullanılır.
+    """
+
+    async def run(
+        self,
+        db: Session,
+        db_document: Document,
+        user_id: int,
+        file_path: str,
+        start_time: Optional[float] = None,
+        pacer: Optional[StepPacer] = None
+    ) -> Dict[str, Any]:
+        """
+        Kaydedilmiş belge için OCR, NLP ve karar adımlarını çalıştır.
+        file_path: belgenin diskteki yolu (blob store); içerik belleğe kopyalanmaz.
+        """
+        start_time = start_time or time.time()
+        pacer = pacer or StepPacer(user_id)
+        content_type = db_document.content_type
+
+        try:
+            if not db_document.content_hash:
+                db_document.content_hash = await run_io(compute_file_hash, file_path)
+            content_hash = db_document.content_hash
+
+            # Aynı içerik daha önce aynı OCR ayarlarıyla işlendiyse OCR atlanır
+            ocr_cache_key = result_cache.ocr_key(content_hash)
+            with pacer.stage("cache_lookup"):
+                cached_ocr, ocr_cache_tier = await result_cache.get("ocr", ocr_cache_key)
+
+            ocr_details = None
+            if cached_ocr is not None:
+                raw_text = cached_ocr["text"]
+                ocr_details = cached_ocr.get("ocr_details")
+                logger.info("OCR sonucu önbellekten alındı (%s): %s", ocr_cache_tier, content_hash[:12])
+            else:
+                # SSE: OCR başlangıcı
+                await pacer.step(
+                    "OCR İşlemi Başlatıldı",
+                    {"file_type": content_type, "document_id": db_document.id}
+                )
+
+                log_processing_step(
+                    "OCR Başlatılıyor", {"İşlenen Dosya": content_type},
+                    document_id=db_document.id, elapsed=pacer.elapsed(), user_id=user_id
+                )
+
+                # OCR CPU yoğun: event loop'u bloklamamak için process havuzunda çalıştır
+                with pacer.stage("ocr"):
+                    if content_type == "application/pdf":
+                        # PDF için sayfa paralel metin katmanı / OCR
+                        raw_text, ocr_details = await self._ocr_pdf(file_path, db_document.id, pacer)
+                    else:
+                        # Görüntü için OCR
+                        raw_text = await run_cpu(ocr_image_file, file_path, "banking_document")
+
+                if raw_text.strip():
+                    await result_cache.set(
+                        "ocr", ocr_cache_key, content_hash,
+                        {"text": raw_text, "ocr_details": ocr_details}
+                    )
+
+            # SSE: OCR tamamlandı
+            ocr_step_details = {
+                "text_length": len(raw_text),
+                "preview": raw_text[:100] + "..." if len(raw_text) > 100 else raw_text,
+                "cache_hit": cached_ocr is not None
+            }
+            if ocr_cache_tier:
+                ocr_step_details["cache_tier"] = ocr_cache_tier
+            if ocr_details:
+                ocr_step_details["text_layer_pages"] = ocr_details["text_layer_pages"]
+                ocr_step_details["ocr_pages"] = ocr_details["ocr_pages"]
+            await pacer.step("OCR Tamamlandı", ocr_step_details)
+
+            log_processing_step("OCR Tamamlandı", {
+                "Çıkarılan Metin Uzunluğu": f"{len(raw_text)} karakter",
+                "İlk 100 Karakter": raw_text[:100] + "..." if len(raw_text) > 100 else raw_text
+            }, document_id=db_document.id, elapsed=pacer.elapsed(), duration=pacer.timings.get("ocr"), user_id=user_id)
+
+            logger.info("OCR işlemi tamamlandı, NLP analizi başlıyor...")
+
+            # OCR sonucunu veritabanında güncelle
+            db_document.raw_text = raw_text
+
+            return await self._analyze_and_decide(
+                db=db,
+                db_document=db_document,
+                user_id=user_id,
+                text=raw_text,
+                pacer=pacer,
+                start_time=start_time,
+                ocr_confidence=getattr(raw_text, 'confidence', 0),
+                success_message="Belge başarıyla işlendi ve analiz edildi",
+                ocr_details=ocr_details,
+                content_hash=content_hash,
+                ocr_cache_tier=ocr_cache_tier
+            )
+
+        except Exception as e:
+            await self._handle_failure(db, db_document, user_id, pacer, start_time, "OCR/NLP", e)
+            raise
+
+    async def _ocr_pdf(self, file_path: str, document_id: int, pacer: StepPacer) -> Tuple[str, Dict[str, Any]]:
+        """
+        PDF sayfalarını paralel işle (metin katmanı veya OCR), her sayfa bitince
+        ilerleme olayı gönder. Birleşik metin ve sayfa bazında yol özetini döndürür.
+        """
+        page_results = []
+        async for page_count, page_result in pdf_ocr_engine.iter_pages(file_path):
+            page_results.append(page_result)
+            await pacer.page_processed(
+                document_id,
+                page_result["page"],
+                page_count,
+                len(page_result["text"]),
+                page_result["method"]
+            )
+        raw_text = ocr_service.combine_page_texts({r["page"]: r["text"] for r in page_results})
+        return raw_text, pdf_ocr_engine.summarize(page_results)
+
+    async def run_text(
+        self,
+        db: Session,
+        db_document: Document,
+        user_id: int,
+        text: str,
+        start_time: Optional[float] = None,
+        pacer: Optional[StepPacer] = None
+    ) -> Dict[str, Any]:
+        """Doğrudan gönderilen metin için NLP ve karar adımlarını çalıştır"""
+        start_time = start_time or time.time()
+        pacer = pacer or StepPacer(user_id)
+
+        try:
+            if not db_document.content_hash:
+                db_document.content_hash = compute_content_hash(text.encode("utf-8"))
+
+            return await self._analyze_and_decide(
+                db=db,
+                db_document=db_document,
+                user_id=user_id,
+                text=text,
+                pacer=pacer,
+                start_time=start_time,
+                ocr_confidence=100.0,  # Text input için %100
+                success_message="Metin başarıyla analiz edildi",
+                content_hash=db_document.content_hash,
+                nlp_source="text"
+            )
+
+        except Exception as e:
+            await self._handle_failure(db, db_document, user_id, pacer, start_time, "NLP", e)
+            raise
+
+    async def _analyze_and_decide(
+        self,
+        db: Session,
+        db_document: Document,
+        user_id: int,
+        text: str,
+        pacer: StepPacer,
+        start_time: float,
+        ocr_confidence: float,
+        success_message: str,
+        ocr_details: Optional[Dict[str, Any]] = None,
+        content_hash: Optional[str] = None,
+        nlp_source: str = "ocr",
+        ocr_cache_tier: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """NLP analizi, karar verme ve sonuç kaydı"""
+        # Aynı içerik aynı model/prompt ile analiz edildiyse OpenAI çağrısı atlanır
+        nlp_cache_key = result_cache.nlp_key(content_hash, nlp_source) if content_hash else None
+        cached_nlp, nlp_cache_tier = None, None
+        if nlp_cache_key:
+            with pacer.stage("cache_lookup"):
+                cached_nlp, nlp_cache_tier = await result_cache.get("nlp", nlp_cache_key)
+
+        pre_extraction = None
+        llm_skipped = False
+        if cached_nlp is not None:
+            nlp_result = NLPAnalysisResult(**cached_nlp)
+            logger.info("NLP sonucu önbellekten alındı (%s): %s", nlp_cache_tier, content_hash[:12])
+        else:
+            # IBAN/TCKN/tutar gibi alanları önce yerel olarak (checksum ile) çıkar
+            if pre_extractor.enabled:
+                with pacer.stage("pre_extract"):
+                    pre_extraction = pre_extractor.extract(text)
+
+            if pre_extraction is not None and pre_extraction.complete:
+                # Karar için gereken tüm alanlar yüksek güvenle bulundu: GPT atlanır
+                llm_skipped = True
+                nlp_result = NLPAnalysisResult(
+                    success=True,
+                    message="Belge yerel çıkarım ile analiz edildi (GPT atlandı)",
+                    entities=ExtractedEntities(**pre_extraction.known_values),
+                    processing_time=pre_extraction.processing_time
+                )
+                pre_extractor.record_skip(pre_extraction)
+            else:
+                known_values = pre_extraction.known_values if pre_extraction else None
+                missing_fields = pre_extraction.missing_fields if known_values else None
+
+                # SSE: NLP başlangıcı
+                await pacer.step(
+                    "NLP Analizi Başlatıldı",
+                    {
+                        "text_length": len(text),
+                        "requested_fields": len(missing_fields) if missing_fields else "all"
+                    }
+                )
+
+                log_processing_step("NLP Analizi Başlatılıyor", {
+                    "Metin Uzunluğu": len(text),
+                    "Yerel Bulunan Alan": len(pre_extraction.field_confidence) if pre_extraction else 0
+                }, document_id=db_document.id, elapsed=pacer.elapsed(), user_id=user_id)
+
+                # Async OpenAI client: kota, eşzamanlılık sınırı ve retry nlp_service içinde
+                with pacer.stage("nlp"):
+                    nlp_result = await nlp_service.analyze_document_async(
+                        text, db_document.id, known_values=known_values, missing_fields=missing_fields
+                    )
+
+                if pre_extraction is not None and nlp_result.success:
+                    pre_extractor.record_llm_call(pre_extraction, nlp_result.processing_time)
+
+                # Sadece başarılı GPT analizleri önbelleğe alınır
+                if nlp_cache_key and nlp_result.success:
+                    await result_cache.set("nlp", nlp_cache_key, content_hash, nlp_result.dict())
+
+        pre_extraction_info = {
+            "document_type": pre_extraction.document_type.value,
+            "document_type_confidence": pre_extraction.document_type_confidence,
+            "known_fields": sorted(
+                f"{section}.{name}" for section, fields in pre_extraction.known_values.items() for name in fields
+            ),
+            "llm_skipped": llm_skipped,
+            "processing_ms": round(pre_extraction.processing_time * 1000, 2)
+        } if pre_extraction else None
+
+        cache_info = {"ocr": ocr_cache_tier, "nlp": nlp_cache_tier}
+
+        # SSE: NLP tamamlandı
+        await pacer.step(
+            "NLP Analizi Tamamlandı",
+            {
+                "success": nlp_result.success,
+                "document_type": nlp_result.entities.document_analysis.document_type if nlp_result.success else "N/A",
+                "intent": nlp_result.entities.document_analysis.intent if nlp_result.success else "N/A",
+                "processing_time": f"{nlp_result.processing_time:.2f}s",
+                "cache_hit": cached_nlp is not None,
+                "llm_skipped": llm_skipped
+            }
+        )
+
+        log_processing_step("NLP Analizi Tamamlandı", {
+            "Başarılı": "✅" if nlp_result.success else "❌",
+            "Belge Tipi": nlp_result.entities.document_analysis.document_type if nlp_result.success else "N/A",
+            "Niyet": nlp_result.entities.document_analysis.intent if nlp_result.success else "N/A",
+            "İşlem Süresi": f"{nlp_result.processing_time:.2f}s",
+            "Önbellek": nlp_cache_tier or "yok",
+            "GPT Atlandı": "✅" if llm_skipped else "❌"
+        }, document_id=db_document.id, elapsed=pacer.elapsed(), duration=pacer.timings.get("nlp"), user_id=user_id)
+
+        # Decision'ı ayrı tabloya kaydet
+        decision_record = None
+        if nlp_result.success:
+            extracted_data = {
+                "nlp_analysis": nlp_result.dict(),
+                "ocr_confidence": ocr_confidence,
+                "processing_time": nlp_result.processing_time,
+                "cache": cache_info
+            }
+            if pre_extraction_info:
+                extracted_data["pre_extraction"] = pre_extraction_info
+            if ocr_details:
+                # Sayfa bazında izlenen yol (text_layer/ocr), süre ve CPU tasarrufu
+                extracted_data["ocr_details"] = ocr_details
+            db_document.extracted_data = json.dumps(extracted_data, ensure_ascii=False, default=str)
+            db_document.status = "completed"
+
+            # Karar ver ve kaydet
+            try:
+                # SSE: Karar verme başlangıcı
+                await pacer.step(
+                    "Karar Verme Başlatıldı",
+                    {
+                        "customer": nlp_result.entities.customer.name if nlp_result.entities.customer else "N/A",
+                        "amount": nlp_result.entities.transaction.amount if nlp_result.entities.transaction else "N/A"
+                    }
+                )
+
+                log_processing_step("Karar Verme Süreci Başlatılıyor", {
+                    "Müşteri": nlp_result.entities.customer.name if nlp_result.entities.customer else "N/A",
+                    "TCKN": nlp_result.entities.customer.tckn if nlp_result.entities.customer else "N/A",
+                    "Tutar": nlp_result.entities.transaction.amount if nlp_result.entities.transaction else "N/A"
+                }, document_id=db_document.id, elapsed=pacer.elapsed(), user_id=user_id)
+
+                with pacer.stage("decision"):
+                    parsed_data = nlp_result.entities.dict()
+                    decision_data = decision_service.make_decision(parsed_data)
+
+                    decision_record = await run_io(
+                        decision_service.save_decision,
+                        db=db,
+                        parsed_data=parsed_data,
+                        decision_data=decision_data,
+                        document_id=db_document.id,
+                        user_id=user_id,
+                        ocr_confidence=ocr_confidence
+                    )
+
+                # SSE: Karar tamamlandı
+                await pacer.step(
+                    "Karar Verme Tamamlandı",
+                    {
+                        "decision": decision_data["decision"],
+                        "confidence": f"{decision_data['confidence']:.1f}%",
+                        "validation_score": f"{decision_data['validation']['validation_score']:.1f}%",
+                        "reasons_count": len(decision_data["reasons"])
+                    }
+                )
+
+                log_processing_step("Karar Verme Tamamlandı", {
+                    "Decision ID": decision_record.id,
+                    "Karar": decision_data["decision"],
+                    "Güven Skoru": f"{decision_data['confidence']:.1f}%",
+                    "Validation Skoru": f"{decision_data['validation']['validation_score']:.1f}%",
+                    "Sebepler": len(decision_data["reasons"])
+                }, document_id=db_document.id, elapsed=pacer.elapsed(), duration=pacer.timings.get("decision"), user_id=user_id)
+
+                logger.info("Decision kaydedildi: ID %s", decision_record.id)
+            except Exception as e:
+                await pacer.error(f"Karar verme hatası: {str(e)}")
+                log_error("Karar Verme", str(e), user_id, db_document.id)
+                logger.error("Decision kaydetme hatası: %s", e)
+
+            logger.info("NLP analizi başarılı: %s", nlp_result.entities.document_analysis.document_type)
+        else:
+            db_document.status = "failed"
+            await pacer.error(nlp_result.message)
+            log_error("NLP Analizi", nlp_result.message, user_id, db_document.id)
+            logger.error("NLP analizi başarısız: %s", nlp_result.message)
+
+        with pacer.stage("db_commit"):
+            db_document.updated_at = datetime.utcnow()
+            await run_io(db.commit)
+
+        # İşleme bitişini logla
+        processing_time = time.time() - start_time
+        final_decision = decision_record.decision if decision_record else "FAILED"
+        log_document_processing_end(
+            user_id, final_decision, processing_time, document_id=db_document.id, timings=pacer.get_timings()
+        )
+
+        # Response hazırla
+        response_data = {
+            "document_id": db_document.id,
+            "status": db_document.status,
+            "message": success_message,
+            "raw_text_length": len(text),
+            "nlp_analysis": nlp_result.dict() if nlp_result.success else None,
+            "processing_time": nlp_result.processing_time,
+            "step_timings": pacer.get_timings(),
+            "cache_hit": cached_nlp is not None,
+            "cache": cache_info,
+            "pre_extraction": pre_extraction_info,
+            "decision_id": decision_record.id if decision_record else None,
+            "decision": decision_record.decision if decision_record else None,
+            "decision_confidence": decision_record.confidence if decision_record else None
+        }
+
+        # SSE: İşlem tamamlandı
+        await pacer.complete(response_data)
+
+        return response_data
+
+    async def _handle_failure(
+        self,
+        db: Session,
+        db_document: Document,
+        user_id: int,
+        pacer: StepPacer,
+        start_time: float,
+        stage_label: str,
+        error: Exception
+    ):
+        """Hata durumunda SSE/log gönder ve belge durumunu güncelle"""
+        # rollback bütün attribute'ları expire eder; id rollback'ten önce alınır
+        document_id = db_document.id
+        await pacer.error(f"{stage_label} hatası: {str(error)}")
+        log_error(f"{stage_label} İşlemi", str(error), user_id, document_id)
+        logger.error("%s işlemi hatası: %s", stage_label, error)
+        # Hata durumunda status'ü güncelle
+        def mark_failed():
+            db.rollback()
+            db_document.status = "failed"
+            db_document.updated_at = datetime.utcnow()
+            db.commit()
+
+        await run_io(mark_failed)
+
+        # Hata durumunda da süreyi logla
+        processing_time = time.time() - start_time
+        log_document_processing_end(
+            user_id, "ERROR", processing_time, document_id=document_id, timings=pacer.get_timings()
+        )
+
+document_pipeline = DocumentPipeline()
@@ -0,0 +1,187 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.models.document import Document
+
+logger = logging.getLogger(__name__)
+
+# API'de seçilebilen alanlar -> sütun. storage_key/file_content dışarı verilmez.
+DOCUMENT_FIELDS = {
+    "id": Document.id,
+    "file_name": Document.file_name,
+    "file_type": Document.file_type,
+    "content_type": Document.content_type,
+    "file_size": Document.file_size,
+    "content_hash": Document.content_hash,
+    "status": Document.status,
+    "created_at": Document.created_at,
+    "updated_at": Document.updated_at,
+    "raw_text": Document.raw_text,
+    "extracted_data": Document.extracted_data,
+}
+
+# Ağır (deferred) alanlar; sadece açıkça istenirse okunur
+HEAVY_FIELDS = {"raw_text", "extracted_data"}
+
+DEFAULT_LIST_FIELDS = [
+    "id", "file_name", "file_type", "content_type", "file_size", "status", "created_at", "updated_at"
+]
+DEFAULT_DETAIL_FIELDS = DEFAULT_LIST_FIELDS[:5] + ["raw_text", "extracted_data"] + DEFAULT_LIST_FIELDS[5:]
+
+class DocumentQueryService:
+    """
+    Belge okumaları için sütun projeksiyonu: sadece istenen alanların sütunları
+    seçilir, file_content/raw_text/extracted_data gerekmedikçe veritabanından gelmez.
+    extracted_data JSON'u (id, updated_at) anahtarıyla süreç içi LRU'da parse edilmiş
+    tutulur; belge değişmedikçe ne sütun tekrar okunur ne de JSON tekrar parse edilir.
+    """
+
+    def __init__(self, data_cache_entries: int = 256, count_cache_seconds: float = 30.0):
+        self.data_cache_entries = data_cache_entries
+        self.count_cache_seconds = count_cache_seconds
+        self._data_cache: "OrderedDict[Tuple[int, datetime], Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        # (user_id, status) -> (geçerlilik sonu, toplam)
+        self._count_cache: Dict[Tuple[int, Optional[str]], Tuple[float, int]] = {}
+
+    @staticmethod
+    def parse_fields(fields: Optional[str], default: List[str]) -> List[str]:
+        """'id,status,extracted_data' -> alan listesi; bilinmeyen alan varsa ValueError"""
+        if not fields:
+            return list(default)
+        requested = [name.strip() for name in fields.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in DOCUMENT_FIELDS]
+        if unknown:
+            raise ValueError(
+                f"Bilinmeyen alan(lar): {', '.join(unknown)}. Geçerli alanlar: {', '.join(DOCUMENT_FIELDS)}"
+            )
+        # Sıra korunur, tekrarlar atılır
+        return list(dict.fromkeys(requested))
+
+    def _select(self, db: Session, fields: List[str]):
+        # id ve updated_at her zaman seçilir (extracted_data önbellek anahtarı)
+        names = list(dict.fromkeys(["id", "updated_at"] + [f for f in fields if f != "extracted_data"]))
+        return names, db.query(*[DOCUMENT_FIELDS[name].label(name) for name in names])
+
+    # ----- extracted_data önbelleği -----
+
+    def _cached_data(self, key: Tuple[int, datetime]) -> Tuple[bool, Any]:
+        with self._lock:
+            if key in self._data_cache:
+                self._data_cache.move_to_end(key)
+                return True, self._data_cache[key]
+        return False, None
+
+    def _store_data(self, key: Tuple[int, datetime], value: Any):
+        with self._lock:
+            self._data_cache[key] = value
+            self._data_cache.move_to_end(key)
+            while len(self._data_cache) > self.data_cache_entries:
+                self._data_cache.popitem(last=False)
+
+    def _load_extracted_data(self, db: Session, rows: Iterable[Dict[str, Any]]) -> Dict[int, Any]:
+        """Önbellekte olmayanların extracted_data sütunu tek sorguda okunup parse edilir"""
+        result: Dict[int, Any] = {}
+        missing: Dict[int, Tuple[int, datetime]] = {}
+        for row in rows:
+            key = (row["id"], row["updated_at"])
+            hit, value = self._cached_data(key)
+            if hit:
+                result[row["id"]] = value
+            else:
+                missing[row["id"]] = key
+        metrics.inc("document_data_cache_hits_total", len(result))
+
+        if missing:
+            metrics.inc("document_data_cache_misses_total", len(missing))
+            for document_id, raw in db.query(Document.id, Document.extracted_data).filter(
+                Document.id.in_(list(missing))
+            ).all():
+                value = None
+                if raw:
+                    try:
+                        value = json.loads(raw)
+                    except json.JSONDecodeError:
+                        logger.warning("Document %s extracted_data parse edilemedi", document_id)
+                self._store_data(missing[document_id], value)
+                result[document_id] = value
+        return result
+
+    def _to_dicts(self, db: Session, names: List[str], rows, fields: List[str]) -> List[Dict[str, Any]]:
+        records = [dict(zip(names, row)) for row in rows]
+        data = self._load_extracted_data(db, records) if "extracted_data" in fields else {}
+        return [
+            {
+                name: (data.get(record["id"]) if name == "extracted_data" else record[name])
+                for name in fields
+            }
+            for record in records
+        ]
+
+    # ----- Sorgular -----
+
+    def get_document(self, db: Session, user_id: int, document_id: int, fields: List[str]) -> Optional[Dict[str, Any]]:
+        names, query = self._select(db, fields)
+        row = query.filter(Document.id == document_id, Document.user_id == user_id).first()
+        if row is None:
+            return None
+        return self._to_dicts(db, names, [row], fields)[0]
+
+    def list_documents(
+        self,
+        db: Session,
+        user_id: int,
+        fields: List[str],
+        status: Optional[str] = None,
+        limit: int = 100,
+        offset: int = 0
+    ) -> List[Dict[str, Any]]:
+        names, query = self._select(db, fields)
+        query = query.filter(Document.user_id == user_id)
+        if status:
+            query = query.filter(Document.status == status)
+        rows = query.order_by(Document.created_at.desc(), Document.id.desc()).offset(offset).limit(limit).all()
+        return self._to_dicts(db, names, rows, fields)
+
+    def count_documents(self, db: Session, user_id: int, status: Optional[str] = None) -> int:
+        """
+        Filtreye uyan toplam belge sayısı. Kısa süre önbellekte tutulur; kullanıcı
+        yeni belge kaydettiğinde geçersiz olur (durum değişiklikleri TTL ile yansır).
+        """
+        key = (user_id, status or None)
+        now = time.monotonic()
+        with self._lock:
+            cached = self._count_cache.get(key)
+            if cached and cached[0] > now:
+                metrics.inc("document_count_cache_hits_total")
+                return cached[1]
+
+        metrics.inc("document_count_cache_misses_total")
+        query = db.query(func.count(Document.id)).filter(Document.user_id == user_id)
+        if status:
+            query = query.filter(Document.status == status)
+        total = query.scalar() or 0
+        with self._lock:
+            self._count_cache[key] = (now + self.count_cache_seconds, total)
+            # Süresi dolanlar arada temizlenir (sınırsız büyümesin)
+            if len(self._count_cache) > 10000:
+                self._count_cache = {k: v for k, v in self._count_cache.items() if v[0] > now}
+        return total
+
+    def invalidate_user_counts(self, user_id: int):
+        with self._lock:
+            for key in [key for key in self._count_cache if key[0] == user_id]:
+                del self._count_cache[key]
+
+document_query_service = DocumentQueryService(
+    data_cache_entries=settings.document_data_cache_entries,
+    count_cache_seconds=settings.document_count_cache_seconds
+)
@@ -0,0 +1,339 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Set, Tuple
+from sqlalchemy import func, or_, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.pacing import StepPacer
+from app.core.executors import run_io
+from app.db.session import SessionLocal
+from app.models.document import Document
+from app.models.job import ProcessingJob
+from app.services.blob_store import materialize_document
+from app.services.document_pipeline import document_pipeline
+
+logger = logging.getLogger(__name__)
+
+class JobQueueFullError(Exception):
+    """Kuyruk kapasitesi dolduğunda fırlatılır"""
+    pass
+
+class JobProgressWriter:
+    """
+    Job'ın current_step'ini pipeline'ı bekletmeden yazar. Art arda gelen adımlar
+    birleştirilir: en fazla interval saniyede bir UPDATE atılır ve her zaman en son
+    adım yazılır; belge başına 10+ commit yerine birkaç tane.
+    """
+
+    def __init__(self, write: Callable[[str], None], interval: float):
+        self.write = write
+        self.interval = interval
+        self._pending: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last_write = 0.0
+
+    def update(self, step: str):
+        """Adımı yazılmak üzere işaretle (beklemez)"""
+        self._pending = step
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        while self._pending is not None:
+            wait = self._last_write + self.interval - loop.time()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            step, self._pending = self._pending, None
+            self._last_write = loop.time()
+            try:
+                await run_io(self.write, step)
+            except Exception as e:
+                logger.warning("Job ilerlemesi yazılamadı: %s", e)
+
+    async def close(self):
+        """Bekleyen yazımı bırak (son durum zaten job bitişinde yazılır)"""
+        self._pending = None
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+class JobQueue:
+    """
+    In-process iş kuyruğu + worker havuzu.
+    Job durumu processing_jobs tablosunda tutulur; kuyruk yalnızca job id taşır.
+    Birden fazla süreç aynı tabloyu paylaşabilir: job işlenmeden önce tek bir
+    UPDATE ... WHERE status='queued' ile sahiplenilir, böylece aynı job iki kez
+    çalışmaz. 'queued' job'lar ile started_at'i lease_seconds'tan eski (sahibi
+    ölmüş) 'running' job'lar başlangıçta ve sonra reaper_interval_seconds aralıkla
+    tekrar kuyruğa alınır (kapasite aşımında kuyruğa girmeyenler ve başka süreçten
+    yetim kalanlar dahil). Sonuç sadece job'ı o an sahiplenen deneme (attempts)
+    tarafından yazılır; lease'i başkasına geçmiş worker sonucu ezemez.
+    """
+
+    def __init__(
+        self,
+        worker_count: int = 2,
+        max_size: int = 100,
+        lease_seconds: int = 1800,
+        progress_interval_seconds: float = 1.0,
+        reaper_interval_seconds: float = 60.0
+    ):
+        self.worker_count = worker_count
+        self.max_size = max_size
+        self.lease_seconds = lease_seconds
+        self.progress_interval_seconds = progress_interval_seconds
+        self.reaper_interval_seconds = reaper_interval_seconds
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers: List[asyncio.Task] = []
+        # Kuyrukta bekleyen id'ler (reaper aynı job'ı iki kez eklemesin)
+        self._queued_ids: Set[str] = set()
+
+    async def start(self):
+        """Worker'ları ve reaper'ı başlat, yarım kalan job'ları kuyruğa geri al"""
+        if self.workers:
+            return
+
+        self.queue = asyncio.Queue(maxsize=self.max_size)
+        self._queued_ids.clear()
+
+        try:
+            requeued = await self._requeue_claimable()
+            if requeued:
+                logger.info("%s yarım kalmış job tekrar kuyruğa alındı", requeued)
+        except Exception as e:
+            logger.error("Bekleyen job'lar yüklenemedi: %s", e)
+
+        for i in range(self.worker_count):
+            self.workers.append(asyncio.create_task(self._worker(i)))
+        if self.reaper_interval_seconds > 0:
+            self.workers.append(asyncio.create_task(self._reaper()))
+
+        logger.info("Job kuyruğu başlatıldı: %s worker, kapasite %s", self.worker_count, self.max_size)
+
+    async def stop(self):
+        """Worker'ları ve reaper'ı durdur"""
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.workers = []
+        logger.info("Job kuyruğu durduruldu")
+
+    def _load_claimable_ids(self, limit: int) -> List[str]:
+        """Sahiplenilebilir job id'leri (en eskiden)"""
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(ProcessingJob.id)
+                .filter(self._claimable())
+                .order_by(ProcessingJob.created_at)
+                .limit(limit)
+                .all()
+            )
+            return [job_id for (job_id,) in rows]
+        finally:
+            db.close()
+
+    async def _requeue_claimable(self) -> int:
+        """Sahiplenilebilir job'ları kuyruktaki boş yer kadar ekle; eklenen sayıyı döndür"""
+        free = self.max_size - self.queue.qsize()
+        if free <= 0:
+            return 0
+        # Kuyrukta zaten bekleyenler de dönebilir; onları atlayınca boş yer dolsun
+        job_ids = await run_io(self._load_claimable_ids, free + len(self._queued_ids))
+        added = 0
+        for job_id in job_ids:
+            if job_id in self._queued_ids:
+                continue
+            try:
+                self.queue.put_nowait(job_id)
+            except asyncio.QueueFull:
+                break
+            self._queued_ids.add(job_id)
+            added += 1
+        return added
+
+    async def _reaper(self):
+        """Periyodik olarak lease'i dolmuş veya kuyruğa girememiş job'ları geri al"""
+        while True:
+            await asyncio.sleep(self.reaper_interval_seconds)
+            try:
+                requeued = await self._requeue_claimable()
+                if requeued:
+                    logger.info("Reaper %s job'ı tekrar kuyruğa aldı", requeued)
+            except Exception as e:
+                logger.warning("Reaper job taraması başarısız: %s", e)
+
+    def create_job(self, db: Session, document_id: int, user_id: int) -> ProcessingJob:
+        """Job kaydını oluştur (kuyruğa almadan)"""
+        job = ProcessingJob(
+            document_id=document_id,
+            user_id=user_id,
+            status="queued"
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        return job
+
+    def enqueue(self, job_id: str):
+        """Job id'yi kuyruğa ekle"""
+        if self.queue is None:
+            raise RuntimeError("Job kuyruğu başlatılmadı")
+        try:
+            self.queue.put_nowait(job_id)
+        except asyncio.QueueFull:
+            raise JobQueueFullError("İşlem kuyruğu dolu, lütfen daha sonra tekrar deneyin")
+        self._queued_ids.add(job_id)
+        logger.info("Job kuyruğa alındı: %s (kuyruk: %s)", job_id, self.queue.qsize())
+
+    def get_queue_size(self) -> int:
+        """Kuyrukta bekleyen job sayısını döndür"""
+        return self.queue.qsize() if self.queue else 0
+
+    def _claimable(self):
+        """Sahiplenilebilir job'lar: 'queued' veya lease süresi dolmuş 'running'"""
+        lease_expired_before = datetime.utcnow() - timedelta(seconds=self.lease_seconds)
+        return or_(
+            ProcessingJob.status == "queued",
+            (ProcessingJob.status == "running") & (
+                ProcessingJob.started_at.is_(None) | (ProcessingJob.started_at < lease_expired_before)
+            )
+        )
+
+    def _claim(self, job_id: str) -> Optional[Tuple[int, int, int]]:
+        """
+        Job'ı atomik olarak 'running' yap; (document_id, user_id, attempts) döndür.
+        attempts bu sahiplenmenin kimliğidir (_finish'e verilir). Başka bir
+        worker/süreç almışsa veya job bitmişse None.
+        """
+        db = SessionLocal()
+        try:
+            claimed = db.execute(
+                update(ProcessingJob)
+                .where(ProcessingJob.id == job_id, self._claimable())
+                .values(
+                    status="running",
+                    attempts=func.coalesce(ProcessingJob.attempts, 0) + 1,
+                    started_at=datetime.utcnow()
+                )
+                .returning(ProcessingJob.document_id, ProcessingJob.user_id, ProcessingJob.attempts)
+            ).first()
+            db.commit()
+            return tuple(claimed) if claimed else None
+        finally:
+            db.close()
+
+    def _set_current_step(self, job_id: str, step: str):
+        """Son SSE adımını tek UPDATE ile yaz (pipeline'ın session'ına dokunmadan)"""
+        db = SessionLocal()
+        try:
+            db.execute(update(ProcessingJob).where(ProcessingJob.id == job_id).values(current_step=step))
+            db.commit()
+        finally:
+            db.close()
+
+    def _finish(
+        self,
+        job_id: str,
+        attempt: int,
+        status: str,
+        result: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> bool:
+        """
+        Job'ın son durumunu tek UPDATE ile yaz. Sadece job hâlâ bu denemeye
+        (attempts) aitse yazılır; lease'i başka worker'a geçmişse False.
+        """
+        db = SessionLocal()
+        try:
+            finished = db.execute(
+                update(ProcessingJob)
+                .where(
+                    ProcessingJob.id == job_id,
+                    ProcessingJob.status == "running",
+                    ProcessingJob.attempts == attempt
+                )
+                .values(status=status, result=result, error=error, finished_at=datetime.utcnow())
+            )
+            db.commit()
+            return finished.rowcount > 0
+        finally:
+            db.close()
+
+    async def _worker(self, worker_id: int):
+        """Kuyruktan job alıp pipeline'ı çalıştıran worker döngüsü"""
+        while True:
+            job_id = await self.queue.get()
+            self._queued_ids.discard(job_id)
+            try:
+                await self._process_job(job_id, worker_id)
+            except Exception as e:
+                logger.error("Worker %s job %s hatası: %s", worker_id, job_id, e)
+            finally:
+                self.queue.task_done()
+
+    async def _process_job(self, job_id: str, worker_id: int):
+        """Tek bir job'ı sahiplen, işle ve durumunu güncelle"""
+        claimed = await run_io(self._claim, job_id)
+        if claimed is None:
+            logger.info("Worker %s job'ı atladı: %s (bitmiş veya başka bir worker'da)", worker_id, job_id)
+            return
+        document_id, user_id, attempt = claimed
+
+        db = SessionLocal()
+        try:
+            document = await run_io(
+                lambda: db.query(Document).filter(Document.id == document_id).first()
+            )
+            file_path, is_temp = await run_io(materialize_document, document) if document else (None, False)
+            if not file_path:
+                await run_io(self._finish, job_id, attempt, "failed", error="Belge veya dosya içeriği bulunamadı")
+                return
+
+            logger.info("Worker %s job'ı işliyor: %s (Document %s)", worker_id, job_id, document_id)
+
+            # İlerleme GET /jobs/{id} ile görünür; yazım pipeline'ı bekletmez
+            progress = JobProgressWriter(
+                lambda step: self._set_current_step(job_id, step), self.progress_interval_seconds
+            )
+
+            status, result, error = "completed", None, None
+            try:
+                pipeline_result = await document_pipeline.run(
+                    db=db,
+                    db_document=document,
+                    user_id=user_id,
+                    file_path=file_path,
+                    start_time=time.time(),
+                    pacer=StepPacer(user_id, on_step=progress.update)
+                )
+                result = json.dumps(pipeline_result, ensure_ascii=False, default=str)
+            except Exception as e:
+                status, error = "failed", str(e)
+            finally:
+                await progress.close()
+                # Taşınmamış eski kayıtlar için açılan geçici dosya
+                if is_temp:
+                    await run_io(os.remove, file_path)
+
+            if not await run_io(self._finish, job_id, attempt, status, result, error):
+                logger.warning(
+                    "Worker %s job %s sonucunu yazmadı: lease başka bir worker'a geçmiş (deneme %s)",
+                    worker_id, job_id, attempt
+                )
+
+        finally:
+            db.close()
+
+job_queue = JobQueue(
+    worker_count=settings.job_worker_count,
+    max_size=settings.job_queue_max_size,
+    lease_seconds=settings.job_lease_seconds,
+    progress_interval_seconds=settings.job_progress_interval_seconds,
+    reaper_interval_seconds=settings.job_reaper_interval_seconds
+)
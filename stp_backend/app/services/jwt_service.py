@@ -15,7 +15,7 @@ def create_access_token(data: dict) -> str:
         encoded_jwt = jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
         return encoded_jwt
     except Exception as e:
-        logger.error(f"Token oluşturma hatası: {str(e)}")
+        logger.error("Token oluşturma hatası: %s", str(e))
         raise
 
 def verify_token(token: str) -> dict:
@@ -27,8 +27,8 @@ def verify_token(token: str) -> dict:
         logger.warning("Token süresi dolmuş")
         raise ValueError("Token süresi dolmuş")
     except jwt.JWTError as e:
-        logger.error(f"Token doğrulama hatası: {str(e)}")
+        logger.error("Token doğrulama hatası: %s", str(e))
         raise ValueError("Geçersiz token")
     except Exception as e:
-        logger.error(f"Beklenmeyen token hatası: {str(e)}")
+        logger.error("Beklenmeyen token hatası: %s", str(e))
         raise ValueError("Token işleme hatası") 
\ No newline at end of file
@@ -1,161 +1,535 @@
+import asyncio
+import httpx
 import openai
 import json
 import logging
+import random
 import time
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
 from app.core.config import settings
-from app.schemas.nlp import NLPAnalysisResult, ExtractedEntities
+from app.core.executors import run_io
+from app.core.metrics import metrics
+from app.core.rate_limit import AsyncTokenBucket
+from app.schemas.nlp import NLPAnalysisResult, ExtractedEntities, BuiltPrompt
+from app.services.prompt_builder import PROMPT_VERSION, prompt_builder
 
 logger = logging.getLogger(__name__)
 
+def merge_known_values(parsed: Dict[str, Any], known_values: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """GPT çıktısına yerel olarak (checksum ile) doğrulanmış alanları yaz; yerel değer önceliklidir"""
+    for section, values in known_values.items():
+        target = parsed.get(section) or {}
+        for field, value in values.items():
+            if value is not None:
+                target[field] = value
+        parsed[section] = target
+    return parsed
+
 class NLPService:
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
         self.model = settings.openai_model
+        self.prompt_version = PROMPT_VERSION
+        self.prompt_builder = prompt_builder
+        self.timeout = settings.openai_timeout_seconds
+        self.max_retries = settings.openai_max_retries
+        
+        # Senkron client (script/araçlar için); retry openai kütüphanesine bırakılır
+        self.client = openai.OpenAI(
+            api_key=settings.openai_api_key,
+            base_url=settings.openai_base_url,
+            timeout=self.timeout,
+            max_retries=self.max_retries
+        )
+        
+        # Async client ve HTTP bağlantı havuzu ilk kullanımda (event loop içinde) oluşturulur
+        self._async_client: Optional[openai.AsyncOpenAI] = None
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight = 0
+        
+        # Kota sınırları: istek/dakika ve token/dakika
+        self.request_bucket = AsyncTokenBucket.per_minute(settings.openai_requests_per_minute)
+        self.token_bucket = AsyncTokenBucket.per_minute(settings.openai_tokens_per_minute)
         
     def analyze_document(self, text: str, document_id: Optional[int] = None) -> NLPAnalysisResult:
         """
-        Ana belge analiz fonksiyonu
+        Ana belge analiz fonksiyonu (senkron)
         OCR'dan gelen metni GPT ile analiz eder ve structured output döner
         """
         start_time = time.time()
         
         try:
-            logger.info(f"Document {document_id} için NLP analizi başlıyor...")
+            logger.info("Document %s için NLP analizi başlıyor...", document_id)
             
             # GPT ile entity extraction
             entities = self._extract_entities_with_gpt(text)
             
-            processing_time = time.time() - start_time
+            return self._build_result(entities, start_time, document_id)
             
-            result = NLPAnalysisResult(
-                success=True,
-                message="Belge analizi başarıyla tamamlandı",
-                entities=entities,
-                processing_time=processing_time
-            )
+        except Exception as e:
+            return self._build_error(e, start_time)
+
+    async def analyze_document_async(
+        self,
+        text: str,
+        document_id: Optional[int] = None,
+        known_values: Optional[Dict[str, Dict[str, Any]]] = None,
+        missing_fields: Optional[List[str]] = None
+    ) -> NLPAnalysisResult:
+        """
+        Ana belge analiz fonksiyonu (async)
+        Paylaşılan bağlantı havuzu, eşzamanlılık sınırı, kota limiti ve
+        429/5xx için jitter'lı exponential backoff ile çalışır.
+        known_values/missing_fields verilirse GPT'ye sadece eksik alanlar sorulur
+        ve sonuç yerel olarak çıkarılmış alanlarla birleştirilir.
+        """
+        start_time = time.time()
+        
+        try:
+            logger.info("Document %s için NLP analizi başlıyor...", document_id)
+            
+            entities = await self._extract_entities_with_gpt_async(text, known_values, missing_fields)
             
-            logger.info(f"Document {document_id} NLP analizi tamamlandı. Süre: {processing_time:.2f}s")
-            return result
+            return self._build_result(entities, start_time, document_id)
             
         except Exception as e:
-            logger.error(f"NLP analizi hatası: {e}")
-            return NLPAnalysisResult(
-                success=False,
-                message=f"Analiz hatası: {str(e)}",
-                processing_time=time.time() - start_time
-            )
-    
-    def _extract_entities_with_gpt(self, text: str) -> ExtractedEntities:
-        """GPT-4o mini ile entity extraction"""
+            return self._build_error(e, start_time)
+
+    def _build_result(self, entities: ExtractedEntities, start_time: float, document_id: Optional[int]) -> NLPAnalysisResult:
+        processing_time = time.time() - start_time
+        
+        result = NLPAnalysisResult(
+            success=True,
+            message="Belge analizi başarıyla tamamlandı",
+            entities=entities,
+            processing_time=processing_time
+        )
         
-        system_prompt = """
-Sen bir Türk bankacılık uzmanısın. Verilen belgedeki bilgileri çıkarıp JSON formatında döndürmelisin.
-
-Çıkaracağın bilgiler:
-1. Müşteri bilgileri (ad, TCKN, telefon, email, adres, doğum tarihi, aylık gelir)
-2. Hesap bilgileri (gönderici ve alıcı IBAN, hesap no, banka adı, hesap sahibi)
-3. İşlem bilgileri (tür, tutar, para birimi, tarih, açıklama)
-4. Kredi bilgileri (tutar, vade, amaç, faiz oranı, taksit, teminat)
-5. Belge tipi ve müşteri niyeti
-
-ÖNEMLI:
-- Birden fazla IBAN varsa gönderici/alıcı olarak ayır
-- Tutarları sadece sayısal değer olarak ver (1000.50 formatında)
-- Tarihleri YYYY-MM-DD formatında ver
-- TCKN'leri 11 haneli kontrol et
-- Belirsiz bilgileri null olarak bırak
-
-Türkçe bankacılık terimleri:
-- "hesabımızdan" = gönderici hesap
-- "hesabına" = alıcı hesap  
-- "nolu hesaba" = alıcı hesap
-- "tutarını" = işlem tutarı
-- "aktarmak" = para transferi
-"""
-
-        user_prompt = f"""
-Aşağıdaki bankacılık belgesini analiz et ve JSON formatında döndür:
-
-BELGE METNİ:
-{text}
-
-JSON formatı şu şekilde olmalı:
-{{
-  "customer": {{
-    "name": "string veya null",
-    "tckn": "string veya null", 
-    "phone": "string veya null",
-    "email": "string veya null",
-    "address": "string veya null",
-    "birth_date": "YYYY-MM-DD veya null",
-    "monthly_income": number veya null
-  }},
-  "sender_account": {{
-    "iban": "string veya null",
-    "account_number": "string veya null", 
-    "bank_name": "string veya null",
-    "account_holder": "string veya null"
-  }},
-  "receiver_account": {{
-    "iban": "string veya null",
-    "account_number": "string veya null",
-    "bank_name": "string veya null", 
-    "account_holder": "string veya null"
-  }},
-  "transaction": {{
-    "transaction_type": "eft|wire_transfer|loan_payment|deposit|withdrawal|other",
-    "amount": number veya null,
-    "currency": "TL|USD|EUR",
-    "transaction_date": "YYYY-MM-DD veya null",
-    "description": "string veya null"
-  }},
-  "loan": {{
-    "loan_amount": number veya null,
-    "loan_term": number veya null,
-    "loan_purpose": "string veya null",
-    "interest_rate": number veya null,
-    "monthly_installment": number veya null
-  }},
-  "document_analysis": {{
-    "document_type": "eft_form|loan_application|account_opening|complaint|other",
-    "confidence": number (0-100),
-    "intent": "string",
-    "priority": "LOW|NORMAL|HIGH|URGENT"
-  }}
-}}
-"""
+        logger.info("Document %s NLP analizi tamamlandı. Süre: %.2fs", document_id, processing_time)
+        return result
 
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
-                temperature=0.1,  # Düşük temperature = daha tutarlı sonuçlar
-                max_tokens=2000,
-                response_format={"type": "json_object"}  # Structured output
+    def _build_error(self, error: Exception, start_time: float) -> NLPAnalysisResult:
+        # API hataları boş entity ile başarılı sayılmaz; belge REJECTED yerine failed olur
+        logger.error("NLP analizi hatası: %s", error)
+        return NLPAnalysisResult(
+            success=False,
+            message=f"Analiz hatası: {str(error)}",
+            processing_time=time.time() - start_time
+        )
+    
+    def _build_prompt(self, text: str, fields: Optional[List[str]] = None) -> BuiltPrompt:
+        """Token bütçeli prompt (sabit system öneki + istenen alanlar + belge metni)"""
+        prompt = self.prompt_builder.build(text, fields)
+        if prompt.dropped_pages or prompt.truncated:
+            metrics.inc("openai_prompt_trimmed_total")
+            metrics.inc("openai_prompt_dropped_pages_total", len(prompt.dropped_pages))
+            logger.info(
+                "Belge metni token bütçesine sığdırıldı: %s -> %s token, "
+                "özetlenen sayfalar: %s, satır kırpma: %s",
+                prompt.original_document_tokens, prompt.document_tokens,
+                prompt.dropped_pages, prompt.truncated
             )
-            
-            content = response.choices[0].message.content
-            logger.info(f"GPT yanıtı alındı: {len(content)} karakter")
-            
+        return prompt
+
+    def _parse_entities(self, content: str, known_values: Optional[Dict[str, Dict[str, Any]]] = None) -> ExtractedEntities:
+        """GPT yanıtını (varsa yerel çıkarımla birleştirip) ExtractedEntities'e çevir"""
+        logger.info("GPT yanıtı alındı: %d karakter", len(content))
+        
+        try:
             # JSON parse et
             parsed_data = json.loads(content)
-            logger.info(f"Parsed data: {parsed_data}")
-            
-            # Pydantic model'e çevir
-            entities = ExtractedEntities(**parsed_data)
-            
-            return entities
+            # Tam GPT yanıtı sadece DEBUG'da (kapalıyken dict hiç string'e çevrilmez)
+            logger.debug("Parsed data: %s", parsed_data)
             
         except json.JSONDecodeError as e:
-            logger.error(f"GPT JSON parse hatası: {e}")
-            return ExtractedEntities()
+            logger.error("GPT JSON parse hatası: %s", e)
+            parsed_data = {}
+        
+        if known_values:
+            parsed_data = merge_known_values(parsed_data, known_values)
+        
+        # Pydantic model'e çevir
+        return ExtractedEntities(**parsed_data)
+
+    def _completion_body(self, prompt: BuiltPrompt) -> Dict[str, Any]:
+        """Chat completion parametreleri (anlık çağrı ve Batch API girdisi için ortak)"""
+        return {
+            "model": self.model,
+            "messages": prompt.messages,
+            "temperature": 0.1,  # Düşük temperature = daha tutarlı sonuçlar
+            "max_tokens": prompt.max_tokens,
+            "response_format": {"type": "json_object"}  # Structured output
+        }
+
+    def _parse_packed_entities(self, content: str, document_ids: List[int]) -> Dict[int, ExtractedEntities]:
+        """Paketlenmiş yanıtı ({"documents": {"<id>": ...}}) belge bazında ayır; bozuk kayıtlar atlanır"""
+        try:
+            parsed_data = json.loads(content)
+        except json.JSONDecodeError as e:
+            logger.error("Paket yanıtı JSON parse hatası: %s", e)
+            return {}
+
+        documents = parsed_data.get("documents") if isinstance(parsed_data, dict) else None
+        if not isinstance(documents, dict):
+            logger.error("Paket yanıtında 'documents' alanı yok")
+            return {}
+
+        entities = {}
+        for document_id in document_ids:
+            data = documents.get(str(document_id))
+            if not isinstance(data, dict):
+                continue
+            try:
+                entities[document_id] = ExtractedEntities(**data)
+            except Exception as e:
+                logger.warning("Document %s paket yanıtı geçersiz: %s", document_id, e)
+        return entities
+
+    def _extract_entities_with_gpt(self, text: str) -> ExtractedEntities:
+        """GPT-4o mini ile entity extraction (senkron)"""
+        prompt = self._build_prompt(text)
+        started = time.perf_counter()
+        response = self.client.chat.completions.create(**self._completion_body(prompt))
+        self._record_usage(response, time.perf_counter() - started, prompt)
+        return self._parse_entities(response.choices[0].message.content)
+
+    # ----- Async client -----
+
+    def _get_async_client(self) -> openai.AsyncOpenAI:
+        if self._async_client is None:
+            self._http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=settings.openai_max_connections,
+                    max_keepalive_connections=settings.openai_max_connections
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=10.0)
+            )
+            # Retry burada yönetildiği için kütüphanenin kendi retry'ı kapatılır
+            self._async_client = openai.AsyncOpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                http_client=self._http_client,
+                max_retries=0
+            )
+            self._semaphore = asyncio.Semaphore(settings.openai_max_concurrency)
+            logger.info(
+                "AsyncOpenAI client oluşturuldu: eşzamanlılık %s, bağlantı havuzu %s",
+                settings.openai_max_concurrency, settings.openai_max_connections
+            )
+        return self._async_client
+
+    def get_in_flight(self) -> int:
+        """Şu anda OpenAI'da bekleyen istek sayısı"""
+        return self._in_flight
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        """429, 5xx, zaman aşımı ve bağlantı hataları tekrar denenir"""
+        if isinstance(error, openai.APIStatusError):
+            return error.status_code == 429 or error.status_code >= 500
+        return isinstance(error, openai.APIConnectionError)
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Sunucunun Retry-After başlığı (saniye)"""
+        response = getattr(error, "response", None)
+        if response is None:
+            return None
+        try:
+            return float(response.headers.get("retry-after"))
+        except (TypeError, ValueError):
+            return None
+
+    def _backoff_delay(self, attempt: int, error: Exception) -> float:
+        """Full jitter exponential backoff; Retry-After varsa ondan kısa beklenmez"""
+        ceiling = min(
+            settings.openai_backoff_max_seconds,
+            settings.openai_backoff_base_seconds * (2 ** attempt)
+        )
+        delay = random.uniform(0, ceiling)
+        retry_after = self._retry_after(error)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _record_usage(self, response, latency: float, prompt: BuiltPrompt):
+        """
+        Gecikme ve token kullanımını metriklere yaz, fazla tahmin edilen tokenları iade et.
+        Tahmini ve gerçek prompt token sayısı, önbellekten gelen tokenlar ile birlikte loglanır.
+        """
+        metrics.observe("openai_request_seconds", latency)
+        metrics.inc("openai_requests_total")
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            logger.info("OpenAI çağrısı: %.0f ms, tahmini prompt %s token", latency * 1000, prompt.prompt_tokens)
+            return
+        details = getattr(usage, "prompt_tokens_details", None)
+        cached_tokens = getattr(details, "cached_tokens", None) or 0
+        metrics.inc("openai_prompt_tokens_total", usage.prompt_tokens)
+        metrics.inc("openai_completion_tokens_total", usage.completion_tokens)
+        metrics.inc("openai_cached_prompt_tokens_total", cached_tokens)
+        metrics.observe("openai_prompt_tokens", usage.prompt_tokens)
+        metrics.observe("openai_completion_tokens", usage.completion_tokens)
+        self.token_bucket.refund(prompt.prompt_tokens + prompt.max_tokens - usage.total_tokens)
+        logger.info(
+            "OpenAI çağrısı: %.0f ms, prompt %s (tahmini %s, önbellekten %s) + completion %s/%s token",
+            latency * 1000, usage.prompt_tokens, prompt.prompt_tokens, cached_tokens,
+            usage.completion_tokens, prompt.max_tokens
+        )
+
+    async def _create_completion_async(self, prompt: BuiltPrompt):
+        """Chat completion çağrısı (async, kota ve retry kontrollü)"""
+        client = self._get_async_client()
+        # OpenAI kota hesabına max_tokens da dahil edilir
+        estimated_tokens = prompt.prompt_tokens + prompt.max_tokens
+        
+        # Kota mantıksal istek başına bir kez düşülür; retry'lar tekrar harcamaz
+        # (429 fırtınasında istek kendi kotasını tüketip açlığa düşmesin)
+        waited = await self.request_bucket.acquire(1)
+        waited += await self.token_bucket.acquire(estimated_tokens)
+        if waited > 0:
+            metrics.observe("openai_rate_limit_wait_seconds", waited)
+        
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            try:
+                async with self._semaphore:
+                    self._in_flight += 1
+                    try:
+                        response = await client.chat.completions.create(**self._completion_body(prompt))
+                    finally:
+                        self._in_flight -= 1
+            except Exception as e:
+                metrics.observe("openai_request_seconds", time.perf_counter() - started)
+                metrics.inc("openai_errors_total")
+                if isinstance(e, openai.RateLimitError):
+                    metrics.inc("openai_rate_limited_total")
+                if not self._is_retryable(e) or attempt >= self.max_retries:
+                    # Token kullanılmadı; ayrılan token kotası iade edilir
+                    self.token_bucket.refund(estimated_tokens)
+                    raise
+                delay = self._backoff_delay(attempt, e)
+                attempt += 1
+                metrics.inc("openai_retries_total")
+                logger.warning(
+                    "OpenAI hatası (%s), %.2fs sonra tekrar denenecek (%s/%s)",
+                    type(e).__name__, delay, attempt, self.max_retries
+                )
+                await asyncio.sleep(delay)
+                continue
             
-        except Exception as e:
-            logger.error(f"GPT API hatası: {e}")
-            return ExtractedEntities()
+            self._record_usage(response, time.perf_counter() - started, prompt)
+            return response
+
+    async def _extract_entities_with_gpt_async(
+        self,
+        text: str,
+        known_values: Optional[Dict[str, Dict[str, Any]]] = None,
+        missing_fields: Optional[List[str]] = None
+    ) -> ExtractedEntities:
+        """GPT-4o mini ile entity extraction (async, kota ve retry kontrollü)"""
+        # Token sayımı ve sayfa kırpma CPU işi; event loop'u bloklamasın
+        prompt = await run_io(self._build_prompt, text, missing_fields)
+        response = await self._create_completion_async(prompt)
+        return self._parse_entities(response.choices[0].message.content, known_values)
+
+    # ----- Toplu analiz -----
+
+    def _pack(self, items: List[Tuple[int, str]]) -> List[List[Tuple[int, str]]]:
+        return self.prompt_builder.pack_documents(
+            items,
+            max_documents=settings.openai_pack_max_documents,
+            max_document_tokens=settings.openai_pack_max_document_tokens
+        )
+
+    async def analyze_documents_bulk(self, items: List[Tuple[int, str]]) -> Dict[int, NLPAnalysisResult]:
+        """
+        Çok sayıda (document_id, metin) çiftini anlık çağrılarla analiz et.
+        Kısa belgeler tek istekte paketlenir; paket yanıtında eksik ya da bozuk gelen
+        belgeler tek başına tekrar sorulur. Sonuç document_id -> NLPAnalysisResult.
+        """
+        groups = await run_io(self._pack, items)
+        results: Dict[int, NLPAnalysisResult] = {}
+        logger.info("Toplu NLP analizi: %s belge, %s istek", len(items), len(groups))
+
+        async def run_group(group: List[Tuple[int, str]]):
+            if len(group) == 1:
+                document_id, text = group[0]
+                results[document_id] = await self.analyze_document_async(text, document_id)
+                return
+
+            start_time = time.time()
+            try:
+                prompt = await run_io(self.prompt_builder.build_packed, group)
+                response = await self._create_completion_async(prompt)
+                entities = self._parse_packed_entities(response.choices[0].message.content, prompt.document_ids)
+            except Exception as e:
+                logger.error("Paket analizi hatası (%s belge): %s", len(group), e)
+                entities = {}
+            metrics.inc("nlp_bulk_packed_requests_total")
+            metrics.inc("nlp_bulk_packed_documents_total", len(entities))
+
+            for document_id, text in group:
+                if document_id in entities:
+                    results[document_id] = self._build_result(entities[document_id], start_time, document_id)
+                else:
+                    metrics.inc("nlp_bulk_unpacked_retries_total")
+                    results[document_id] = await self.analyze_document_async(text, document_id)
+
+        await asyncio.gather(*(run_group(group) for group in groups))
+        return results
+
+    # ----- Batch API (offline, 24 saat içinde tamamlanır) -----
+
+    async def _batch_api(self, method: str, path: str, **kwargs) -> httpx.Response:
+        """Files/Batches uç noktaları için ham HTTP çağrısı (openai 1.3.5'te batches yok)"""
+        self._get_async_client()
+        base_url = (settings.openai_base_url or "https://api.openai.com/v1").rstrip("/")
+        response = await self._http_client.request(
+            method,
+            base_url + path,
+            headers={"Authorization": f"Bearer {settings.openai_api_key}"},
+            **kwargs
+        )
+        response.raise_for_status()
+        return response
+
+    def build_batch_input(self, items: List[Tuple[int, str]]) -> Tuple[bytes, Dict[str, List[int]]]:
+        """Batch girdi dosyası (JSONL) ve custom_id -> document_id listesi eşlemesi"""
+        lines = []
+        request_map: Dict[str, List[int]] = {}
+        for index, group in enumerate(self._pack(items)):
+            prompt = self.prompt_builder.build_packed(group)
+            custom_id = f"req-{index}"
+            request_map[custom_id] = prompt.document_ids
+            lines.append(json.dumps({
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": self._completion_body(prompt)
+            }, ensure_ascii=False))
+        return ("\n".join(lines) + "\n").encode("utf-8"), request_map
+
+    async def submit_batch(self, items: List[Tuple[int, str]], metadata: Optional[Dict[str, str]] = None) -> Tuple[Dict[str, Any], Dict[str, List[int]]]:
+        """Belgeleri Batch API'ye gönder; (batch nesnesi, custom_id eşlemesi) döndürür"""
+        content, request_map = await run_io(self.build_batch_input, items)
+        upload = await self._batch_api(
+            "POST",
+            "/files",
+            data={"purpose": "batch"},
+            files={"file": ("nlp_bulk.jsonl", content, "application/jsonl")}
+        )
+        batch = await self._batch_api(
+            "POST",
+            "/batches",
+            json={
+                "input_file_id": upload.json()["id"],
+                "endpoint": "/v1/chat/completions",
+                "completion_window": "24h",
+                "metadata": metadata or {}
+            }
+        )
+        batch_data = batch.json()
+        logger.info(
+            "Batch gönderildi: %s (%s belge, %s istek, %.0f KB)",
+            batch_data['id'], len(items), len(request_map), len(content) / 1024
+        )
+        return batch_data, request_map
+
+    async def get_batch(self, batch_id: str) -> Dict[str, Any]:
+        """Batch durumunu getir (validating, in_progress, finalizing, completed, failed, expired, cancelled)"""
+        response = await self._batch_api("GET", f"/batches/{batch_id}")
+        return response.json()
+
+    def _batch_record_results(
+        self,
+        record: Dict[str, Any],
+        document_ids: List[int],
+        processing_time: float
+    ) -> Dict[int, NLPAnalysisResult]:
+        """Batch çıktısındaki tek kaydı (bir istek) belge bazında sonuçlara çevir"""
+        response = record.get("response") or {}
+        body = response.get("body") or {}
+        if response.get("status_code") != 200 or not body.get("choices"):
+            error = record.get("error") or body.get("error") or {}
+            message = error.get("message", "Batch isteği başarısız") if isinstance(error, dict) else str(error)
+            return {
+                document_id: NLPAnalysisResult(
+                    success=False, message=f"Analiz hatası: {message}", processing_time=processing_time
+                )
+                for document_id in document_ids
+            }
+
+        usage = body.get("usage") or {}
+        metrics.inc("openai_batch_prompt_tokens_total", usage.get("prompt_tokens", 0))
+        metrics.inc("openai_batch_completion_tokens_total", usage.get("completion_tokens", 0))
+        content = body["choices"][0]["message"]["content"]
+        if len(document_ids) == 1:
+            entities = {document_ids[0]: self._parse_entities(content)}
+        else:
+            entities = self._parse_packed_entities(content, document_ids)
+
+        results: Dict[int, NLPAnalysisResult] = {}
+        for document_id in document_ids:
+            if document_id in entities:
+                results[document_id] = NLPAnalysisResult(
+                    success=True,
+                    message="Belge analizi başarıyla tamamlandı (batch)",
+                    entities=entities[document_id],
+                    processing_time=processing_time
+                )
+            else:
+                results[document_id] = NLPAnalysisResult(
+                    success=False,
+                    message="Analiz hatası: belge paket yanıtında bulunamadı",
+                    processing_time=processing_time
+                )
+        return results
+
+    async def fetch_batch_results(self, batch: Dict[str, Any], request_map: Dict[str, List[int]]) -> Dict[int, NLPAnalysisResult]:
+        """Tamamlanan batch'in çıktı dosyasını indir ve belge bazında sonuçlara ayır"""
+        results: Dict[int, NLPAnalysisResult] = {}
+        processing_time = max(0.0, float((batch.get("completed_at") or 0) - (batch.get("created_at") or 0)))
+
+        lines = []
+        for file_key in ("output_file_id", "error_file_id"):
+            if batch.get(file_key):
+                response = await self._batch_api("GET", f"/files/{batch[file_key]}/content")
+                lines.extend(line for line in response.text.splitlines() if line.strip())
+
+        for line in lines:
+            document_ids: List[int] = []
+            try:
+                record = json.loads(line)
+                document_ids = request_map.get(record.get("custom_id"), [])
+                results.update(self._batch_record_results(record, document_ids, processing_time))
+            except Exception as e:
+                # Bozuk bir satır bütün batch'i düşürmesin; sadece o isteğin belgeleri başarısız olur
+                metrics.inc("openai_batch_malformed_lines_total")
+                logger.warning("Batch çıktı satırı işlenemedi (%s): %s", type(e).__name__, e)
+                for document_id in document_ids:
+                    results[document_id] = NLPAnalysisResult(
+                        success=False,
+                        message="Analiz hatası: batch çıktı satırı okunamadı",
+                        processing_time=processing_time
+                    )
+
+        # Çıktıda hiç yer almayan istekler (iptal/süre aşımı)
+        for document_ids in request_map.values():
+            for document_id in document_ids:
+                results.setdefault(document_id, NLPAnalysisResult(
+                    success=False,
+                    message="Analiz hatası: batch çıktısında sonuç yok",
+                    processing_time=processing_time
+                ))
+        return results
+
+    async def aclose(self):
+        """HTTP bağlantı havuzunu kapat"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+            self._async_client = None
 
-nlp_service = NLPService() 
\ No newline at end of file
+nlp_service = NLPService()
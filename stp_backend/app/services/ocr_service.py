@@ -2,14 +2,37 @@ import pytesseract
 from PIL import Image, ImageEnhance, ImageFilter
 import pdf2image
 import logging
-import io
+import resource
+import subprocess
+import time
 import numpy as np
-from typing import List, Tuple, Optional
+from typing import Any, Dict, List, Tuple, Optional
 from .text_normalizer import text_normalizer
+from app.core.config import settings
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def _read_proc_status_kb(field: str) -> Optional[int]:
+    """/proc/self/status içinden kB cinsinden alan oku (sadece Linux)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return None
+
+def _reset_peak_rss() -> Optional[int]:
+    """Tepe RSS (VmHWM) sayacını sıfırla ve mevcut RSS'i kB olarak döndür"""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        return None
+    return _read_proc_status_kb("VmRSS")
+
 class OCRService:
     def __init__(self):
         # Tesseract konfigürasyonu - Türkçe ve İngilizce dil desteği
@@ -28,6 +51,47 @@ class OCRService:
         self.target_dpi = 300  # OCR için optimal DPI
         self.min_dpi = 150     # Minimum kabul edilebilir DPI
         self.max_dpi = 600     # Maximum DPI (performans için)
+        
+        # Eşikleme yöntemi: otsu (global) veya sauvola (yerel)
+        self.threshold_mode = settings.ocr_threshold_mode
+        
+        # Ön işleme: fused (tek geçiş) veya legacy (eski PIL zinciri, A/B için)
+        self.preprocess_pipeline = settings.ocr_preprocess_pipeline
+        self.report_preprocess_memory = settings.ocr_report_preprocess_memory
+        self.last_preprocess_stats: Optional[Dict[str, Any]] = None
+        
+        # Belge sınıfına göre ön işleme profilleri
+        self.preprocess_profiles = {
+            # Taranmış banka formları: varsayılan
+            'document': {'contrast': 1.5, 'sharpness': 2.0, 'median': True, 'threshold_mode': self.threshold_mode},
+            'banking_document': {'contrast': 1.5, 'sharpness': 2.0, 'median': True, 'threshold_mode': self.threshold_mode},
+            # Dijital üretilmiş temiz PDF sayfaları: gürültü yok, median gereksiz
+            'digital_pdf': {'contrast': 1.2, 'sharpness': 1.5, 'median': False, 'threshold_mode': 'otsu'},
+            # Telefon fotoğrafları: düzensiz ışık için yerel eşikleme
+            'photo': {'contrast': 1.3, 'sharpness': 1.5, 'median': True, 'threshold_mode': 'sauvola'},
+        }
+        
+        # Güven eşiği: ilk geçiş bu skorun altındaysa alternatif PSM modları denenir
+        self.confidence_threshold = settings.ocr_confidence_threshold
+        self.fallback_psm_modes = settings.ocr_fallback_psm_modes
+        
+        # PDF metin katmanı: yeterli metin içeren sayfalar OCR'sız okunur
+        self.text_layer_enabled = settings.pdf_text_layer_enabled
+        self.text_layer_min_chars = settings.pdf_text_layer_min_chars
+
+    def get_config_fingerprint(self) -> Dict[str, Any]:
+        """OCR çıktısını etkileyen ayarlar (sonuç önbelleği anahtarı için)"""
+        return {
+            "tesseract": self.tesseract_config,
+            "target_dpi": self.target_dpi,
+            "preprocess_pipeline": self.preprocess_pipeline,
+            "preprocess_profiles": self.preprocess_profiles,
+            "threshold_mode": self.threshold_mode,
+            "confidence_threshold": self.confidence_threshold,
+            "fallback_psm_modes": self.fallback_psm_modes,
+            "text_layer_enabled": self.text_layer_enabled,
+            "text_layer_min_chars": self.text_layer_min_chars
+        }
 
     def get_tesseract_config_string(self, custom_psm: Optional[int] = None) -> str:
         """Tesseract konfigürasyonunu string formatında döndür"""
@@ -38,8 +102,215 @@ class OCRService:
         config_string = f"--oem {config['oem']} --psm {config['psm']} -c tessedit_char_whitelist={config['whitelist']}"
         return config_string
 
-    def enhance_image_quality(self, image: Image.Image) -> Image.Image:
-        """Görüntü kalitesini OCR için optimize et"""
+    def enhance_image_quality(
+        self,
+        image: Image.Image,
+        content_type: str = "document",
+        pipeline: Optional[str] = None
+    ) -> Image.Image:
+        """
+        Görüntü kalitesini OCR için optimize et.
+        pipeline: 'fused' (varsayılan) veya 'legacy'; ayar: settings.ocr_preprocess_pipeline.
+        Süre ve tepe bellek self.last_preprocess_stats içine yazılır.
+        """
+        pipeline = pipeline or self.preprocess_pipeline
+        profile_name = content_type if content_type in self.preprocess_profiles else "document"
+        
+        rss_before = _reset_peak_rss() if self.report_preprocess_memory else None
+        started = time.perf_counter()
+        
+        if pipeline == "legacy":
+            result = self.enhance_image_quality_legacy(image)
+        else:
+            result = self.enhance_image_quality_fused(image, self.preprocess_profiles[profile_name])
+        
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        peak_bytes = None
+        if rss_before is not None:
+            peak_rss = _read_proc_status_kb("VmHWM")
+            if peak_rss is not None:
+                peak_bytes = max(0, peak_rss - rss_before) * 1024
+        
+        self.last_preprocess_stats = {
+            "pipeline": pipeline,
+            "profile": profile_name,
+            "ms": round(elapsed_ms, 1),
+            "peak_memory_bytes": peak_bytes
+        }
+        if peak_bytes is not None:
+            logger.info(
+                "Ön işleme (%s/%s): %.1f ms, tepe bellek +%.1f MB",
+                pipeline, profile_name, elapsed_ms, peak_bytes / 1024 / 1024
+            )
+        else:
+            logger.info("Ön işleme (%s/%s): %.1f ms", pipeline, profile_name, elapsed_ms)
+        return result
+
+    def enhance_image_quality_fused(self, image: Image.Image, profile: Dict[str, Any]) -> Image.Image:
+        """
+        Tek geçişli ön işleme:
+        gri tonlama -> (gri üzerinde) DPI yeniden boyutlandırma -> median + kontrast + keskinlik
+        (NumPy, şerit bazlı yeniden kullanılan buffer) -> yerinde eşikleme.
+        Median, keskinlikten önce uygulanır; böylece gürültü keskinleştirilmez.
+        """
+        try:
+            # Doğrudan gri tonlamaya çevir: resize 3 kanal yerine tek kanal üzerinde çalışır
+            if image.mode != 'L':
+                image = image.convert('L')
+            
+            # DPI kontrolü ve optimizasyonu
+            image = self.optimize_dpi(image)
+            
+            # Kontrast merkezi: PIL ImageEnhance.Contrast ile aynı şekilde ortalama gri değer
+            histogram = image.histogram()
+            pixel_count = image.width * image.height
+            mean = int(sum(i * count for i, count in enumerate(histogram)) / pixel_count + 0.5) if pixel_count else 0
+            
+            gray = np.array(image, dtype=np.uint8)
+            enhanced, enhanced_histogram = self._fused_enhance(
+                gray, mean, profile["contrast"], profile["sharpness"], profile.get("median", True)
+            )
+            
+            # Eşikleme aynı uint8 buffer üzerinde yerinde yapılır
+            if profile.get("threshold_mode", self.threshold_mode) == "sauvola":
+                self.apply_sauvola_threshold(enhanced)
+            else:
+                optimal_threshold = self.compute_otsu_threshold(enhanced_histogram)
+                mask = enhanced > optimal_threshold
+                enhanced[...] = mask
+                enhanced *= 255
+            
+            return Image.fromarray(enhanced)
+            
+        except Exception as e:
+            logger.error("Birleşik ön işleme hatası, legacy pipeline kullanılıyor: %s", e)
+            return self.enhance_image_quality_legacy(image)
+
+    @staticmethod
+    def _pad_columns(arr: np.ndarray) -> np.ndarray:
+        """Sol ve sağa kenar sütunlarını tekrarlayarak 1'er sütun ekle"""
+        padded = np.empty((arr.shape[0], arr.shape[1] + 2), dtype=arr.dtype)
+        padded[:, 1:-1] = arr
+        padded[:, 0] = arr[:, 0]
+        padded[:, -1] = arr[:, -1]
+        return padded
+
+    def _median3x3(self, src: np.ndarray) -> np.ndarray:
+        """
+        3x3 median (uint8). Önce her sütunun dikey üçlüsü sıralanır (lo/mid/hi),
+        sonra median = med3(max(lo), med3(mid), min(hi)) yatay komşular üzerinden.
+        src'nin üst ve alt birer satırı taşma satırıdır; sonuç 2 satır kısadır.
+        """
+        a, b, c = src[:-2], src[1:-1], src[2:]
+        lo = np.minimum(a, b)
+        hi = np.maximum(a, b)
+        mid = np.minimum(hi, c)
+        np.maximum(hi, c, out=hi)
+        lo, mid = np.minimum(lo, mid), np.maximum(lo, mid)
+        
+        lo_p = self._pad_columns(lo)
+        mid_p = self._pad_columns(mid)
+        hi_p = self._pad_columns(hi)
+        
+        # Yatay: max(lo), min(hi), med3(mid)
+        np.maximum(lo_p[:, :-2], lo_p[:, 1:-1], out=lo)
+        np.maximum(lo, lo_p[:, 2:], out=lo)
+        np.minimum(hi_p[:, :-2], hi_p[:, 1:-1], out=hi)
+        np.minimum(hi, hi_p[:, 2:], out=hi)
+        pair_min = np.minimum(mid_p[:, :-2], mid_p[:, 1:-1])
+        np.maximum(mid_p[:, :-2], mid_p[:, 1:-1], out=mid)
+        np.minimum(mid, mid_p[:, 2:], out=mid)
+        np.maximum(mid, pair_min, out=mid)
+        
+        # med3(lo, mid, hi)
+        np.minimum(lo, mid, out=pair_min)
+        np.maximum(lo, mid, out=mid)
+        np.minimum(mid, hi, out=mid)
+        np.maximum(mid, pair_min, out=mid)
+        return mid
+
+    def _fused_enhance(
+        self,
+        gray: np.ndarray,
+        mean: float,
+        contrast: float,
+        sharpness: float,
+        median: bool = True,
+        strip_height: int = 256
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Median, kontrast ve keskinliği tek geçişte uygula (PIL ImageEnhance formülleri):
+            m = median3x3(x)
+            c = mean + contrast * (m - mean)
+            y = c + (sharpness - 1) * (c - smooth(c)),  smooth = [[1,1,1],[1,5,1],[1,1,1]] / 13
+        Görüntü 2 satır taşmalı şeritler halinde işlenir; float32 çalışma buffer'ları
+        şerit boyutunda bir kez ayrılıp her şeritte yeniden kullanılır. Kenarlar tekrarlanır.
+        gray yerinde güncellenir; sonuç ve 256 bin histogram döndürülür.
+        """
+        height, width = gray.shape
+        histogram = np.zeros(256, dtype=np.int64)
+        
+        work = np.empty((strip_height + 2, width), dtype=np.float32)
+        padded = np.empty((strip_height + 2, width + 2), dtype=np.float32)
+        hbox = np.empty((strip_height + 2, width), dtype=np.float32)
+        vbox = np.empty((strip_height, width), dtype=np.float32)
+        # Şeritler yerinde yazıldığı için önceki şeridin son iki orijinal satırı saklanır
+        carry = None
+        
+        for row_start in range(0, height, strip_height):
+            row_end = min(height, row_start + strip_height)
+            rows = row_end - row_start
+            
+            # Orijinal satırlar [row_start - 2, row_end + 2), kenarlar tekrarlanarak
+            row_index = np.clip(np.arange(row_start - 2, row_end + 2), 0, height - 1)
+            src = gray[row_index]
+            if carry is not None:
+                src[:2] = carry
+            carry = gray[row_end - 2:row_end].copy() if rows >= 2 else None
+            
+            # Median (rows + 2 satır: keskinlik için 1'er taşma satırı korunur)
+            x = work[:rows + 2]
+            x[...] = self._median3x3(src) if median else src[1:-1]
+            
+            # Kontrast
+            x -= mean
+            x *= contrast
+            x += mean
+            np.clip(x, 0, 255, out=x)
+            
+            # 3x3 kutu toplamı: önce yatay (kenar sütunları tekrarlanır), sonra dikey
+            p = padded[:rows + 2]
+            p[:, 1:-1] = x
+            p[:, 0] = x[:, 0]
+            p[:, -1] = x[:, -1]
+            h = hbox[:rows + 2]
+            np.add(p[:, :-2], p[:, 1:-1], out=h)
+            h += p[:, 2:]
+            v = vbox[:rows]
+            np.add(h[:-2], h[1:-1], out=v)
+            v += h[2:]
+            
+            # smooth = (kutu + 4 * merkez) / 13  ->  y = x + (s - 1) * (x - smooth)
+            center = x[1:-1]
+            v += 4 * center
+            v /= 13
+            np.subtract(center, v, out=v)
+            v *= (sharpness - 1)
+            v += center
+            v += 0.5
+            np.clip(v, 0, 255, out=v)
+            
+            out_rows = gray[row_start:row_end]
+            out_rows[...] = v
+            histogram += np.bincount(out_rows.ravel(), minlength=256)
+        
+        return gray, histogram
+
+    def enhance_image_quality_legacy(self, image: Image.Image) -> Image.Image:
+        """
+        Önceki çok adımlı PIL pipeline'ı (A/B karşılaştırması için korunur).
+        Her adım yeni bir tam çözünürlüklü görüntü üretir.
+        """
         try:
             logger.info("Görüntü kalitesi optimize ediliyor...")
             
@@ -71,7 +342,7 @@ class OCRService:
             return image
             
         except Exception as e:
-            logger.error(f"Görüntü kalitesi optimizasyonu hatası: {e}")
+            logger.error("Görüntü kalitesi optimizasyonu hatası: %s", e)
             return image
 
     def optimize_dpi(self, image: Image.Image) -> Image.Image:
@@ -86,21 +357,21 @@ class OCRService:
             else:
                 current_dpi = 72  # Varsayılan DPI
                 
-            logger.info(f"Mevcut DPI: {current_dpi}")
+            logger.info("Mevcut DPI: %s", current_dpi)
             
             # DPI çok düşükse yeniden boyutlandır
             if current_dpi < self.min_dpi:
                 scale_factor = self.target_dpi / current_dpi
                 new_size = (int(image.width * scale_factor), int(image.height * scale_factor))
                 image = image.resize(new_size, Image.Resampling.LANCZOS)
-                logger.info(f"Görüntü {scale_factor:.2f}x büyütüldü, yeni boyut: {new_size}")
+                logger.info("Görüntü %.2fx büyütüldü, yeni boyut: %s", scale_factor, new_size)
                 
             # DPI çok yüksekse küçült (performans için)
             elif current_dpi > self.max_dpi:
                 scale_factor = self.target_dpi / current_dpi
                 new_size = (int(image.width * scale_factor), int(image.height * scale_factor))
                 image = image.resize(new_size, Image.Resampling.LANCZOS)
-                logger.info(f"Görüntü {scale_factor:.2f}x küçültüldü, yeni boyut: {new_size}")
+                logger.info("Görüntü %.2fx küçültüldü, yeni boyut: %s", scale_factor, new_size)
             
             # DPI bilgisini güncelle
             image.info['dpi'] = (self.target_dpi, self.target_dpi)
@@ -108,148 +379,197 @@ class OCRService:
             return image
             
         except Exception as e:
-            logger.error(f"DPI optimizasyonu hatası: {e}")
+            logger.error("DPI optimizasyonu hatası: %s", e)
             return image
 
-    def apply_threshold(self, image: Image.Image) -> Image.Image:
-        """Adaptive threshold uygulayarak siyah-beyaz yapma"""
-        try:
-            # PIL Image'ı numpy array'e çevir
-            img_array = np.array(image)
-            
-            # Otsu's threshold yöntemi için basit implementasyon
-            # Histogram hesapla
-            histogram = np.histogram(img_array, bins=256, range=(0, 256))[0]
+    def compute_otsu_threshold(self, histogram) -> int:
+        """Otsu eşik değeri - 256 bin histogram üzerinde kümülatif toplamlarla tek geçişte"""
+        histogram = np.asarray(histogram, dtype=np.float64)
+        intensities = np.arange(256, dtype=np.float64)
+        
+        # Her eşik için arka plan ağırlığı ve toplamı
+        weight_background = np.cumsum(histogram)
+        sum_background = np.cumsum(histogram * intensities)
+        total_pixels = weight_background[-1]
+        sum_total = sum_background[-1]
+        weight_foreground = total_pixels - weight_background
+        
+        valid = (weight_background > 0) & (weight_foreground > 0)
+        mean_background = np.divide(
+            sum_background, weight_background,
+            out=np.zeros(256), where=weight_background > 0
+        )
+        mean_foreground = np.divide(
+            sum_total - sum_background, weight_foreground,
+            out=np.zeros(256), where=weight_foreground > 0
+        )
+        
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        variance[~valid] = -1
+        
+        # argmax ilk maksimumu döndürür (eski döngüdeki '>' karşılaştırmasıyla aynı)
+        return int(np.argmax(variance)) if valid.any() else 0
+
+    def apply_sauvola_threshold(
+        self,
+        img_array: np.ndarray,
+        window: int = 31,
+        k: float = 0.2,
+        dynamic_range: float = 128.0,
+        strip_height: int = 256
+    ) -> np.ndarray:
+        """
+        Sauvola yerel eşikleme: T = m * (1 + k * (s / R - 1)).
+        Düzensiz ışıklı telefon fotoğrafları için. Pencere istatistikleri integral
+        görüntüyle hesaplanır; bellek için görüntü yatay şeritler halinde işlenir.
+        Sonuç img_array'in üzerine (uint8, 0/255) yazılır.
+        """
+        half = window // 2
+        window = 2 * half + 1
+        area = float(window * window)
+        height = img_array.shape[0]
+        padded = np.pad(img_array, half, mode='reflect')
+        
+        for row_start in range(0, height, strip_height):
+            row_end = min(height, row_start + strip_height)
+            band = padded[row_start:row_end + 2 * half].astype(np.float64)
+            
+            integral = np.zeros((band.shape[0] + 1, band.shape[1] + 1))
+            np.cumsum(np.cumsum(band, axis=0), axis=1, out=integral[1:, 1:])
+            np.multiply(band, band, out=band)
+            integral_sq = np.zeros_like(integral)
+            np.cumsum(np.cumsum(band, axis=0), axis=1, out=integral_sq[1:, 1:])
+            
+            def window_sum(table: np.ndarray) -> np.ndarray:
+                return (
+                    table[window:, window:] - table[:-window, window:]
+                    - table[window:, :-window] + table[:-window, :-window]
+                )
             
-            # Optimal threshold değerini bul (Otsu yöntemi)
-            total_pixels = img_array.size
-            sum_total = sum(i * histogram[i] for i in range(256))
+            mean = window_sum(integral) / area
+            variance = window_sum(integral_sq) / area - mean * mean
+            np.maximum(variance, 0, out=variance)
+            threshold = mean * (1 + k * (np.sqrt(variance) / dynamic_range - 1))
             
-            sum_background = 0
-            weight_background = 0
-            max_variance = 0
-            optimal_threshold = 0
+            strip = img_array[row_start:row_end]
+            mask = strip > threshold
+            strip[...] = mask
+            strip *= 255
+        
+        return img_array
+
+    def apply_threshold(self, image: Image.Image, mode: Optional[str] = None) -> Image.Image:
+        """
+        Siyah-beyaz yapma.
+        mode: 'otsu' (global, varsayılan) veya 'sauvola' (yerel/adaptif)
+        """
+        mode = mode or self.threshold_mode
+        try:
+            if image.mode != 'L':
+                image = image.convert('L')
             
-            for i in range(256):
-                weight_background += histogram[i]
-                if weight_background == 0:
-                    continue
-                    
-                weight_foreground = total_pixels - weight_background
-                if weight_foreground == 0:
-                    break
-                    
-                sum_background += i * histogram[i]
-                mean_background = sum_background / weight_background
-                mean_foreground = (sum_total - sum_background) / weight_foreground
-                
-                variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
-                
-                if variance > max_variance:
-                    max_variance = variance
-                    optimal_threshold = i
+            # np.array kopya üretir; eşikleme bu uint8 buffer üzerinde yerinde yapılır
+            img_array = np.array(image, dtype=np.uint8)
             
-            # Threshold uygula
-            binary_array = (img_array > optimal_threshold) * 255
+            if mode == "sauvola":
+                self.apply_sauvola_threshold(img_array)
+            else:
+                # Histogram PIL tarafında C ile hesaplanır (piksel başına int64 kopya yok)
+                optimal_threshold = self.compute_otsu_threshold(image.histogram())
+                mask = img_array > optimal_threshold
+                img_array[...] = mask
+                img_array *= 255
             
-            # Numpy array'ı PIL Image'a geri çevir
-            return Image.fromarray(binary_array.astype(np.uint8))
+            return Image.fromarray(img_array)
             
         except Exception as e:
-            logger.error(f"Threshold uygulama hatası: {e}")
+            logger.error("Threshold uygulama hatası: %s", e)
             # Hata durumunda basit threshold uygula
             return image.point(lambda x: 0 if x < 128 else 255, '1')
 
-    def preprocess_for_different_content_types(self, image: Image.Image, content_type: str) -> List[Image.Image]:
-        """İçerik tipine göre farklı ön işleme teknikleri uygula"""
-        processed_images = []
+    def build_text_from_data(self, data: dict) -> Tuple[str, float]:
+        """
+        image_to_data çıktısındaki kelime kutularından metni ve ortalama güveni üret.
+        Kelimeler (block, paragraph, line) sırasıyla satırlara, bloklar boş satırla ayrılır.
+        """
+        lines = []
+        confidences = []
+        current_key = None
+        current_block = None
+        current_words = []
         
-        try:
-            # Temel optimizasyon (her zaman)
-            base_image = self.enhance_image_quality(image)
-            processed_images.append(base_image)
-            
-            # Bankacılık belgelerine özel optimizasyonlar
-            if any(term in content_type.lower() for term in ['banking', 'financial', 'document']):
-                # PSM 6: Uniform block of text (varsayılan)
-                processed_images.append(base_image)
-                
-                # PSM 8: Treat the image as a single word
-                # Küçük metin blokları için
-                processed_images.append(base_image)
-                
-                # PSM 13: Raw line. Treat the image as a single text line
-                # Tek satır metinler için (IBAN, hesap no vs.)
-                processed_images.append(base_image)
-            
-            return processed_images
-            
-        except Exception as e:
-            logger.error(f"İçerik tipine göre ön işleme hatası: {e}")
-            return [image]
+        for i, word in enumerate(data['text']):
+            if not word or not word.strip():
+                continue
+            
+            conf = float(data['conf'][i])
+            if conf > 0:
+                confidences.append(conf)
+            
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            if key != current_key:
+                if current_words:
+                    lines.append(' '.join(current_words))
+                # Yeni blok başlıyorsa paragrafları ayır
+                if current_block is not None and data['block_num'][i] != current_block:
+                    lines.append('')
+                current_key = key
+                current_block = data['block_num'][i]
+                current_words = []
+            current_words.append(word)
+        
+        if current_words:
+            lines.append(' '.join(current_words))
+        
+        avg_confidence = sum(confidences) / len(confidences) if confidences else 0.0
+        return '\n'.join(lines), avg_confidence
+
+    def run_ocr_pass(self, image: Image.Image, psm: int) -> Tuple[str, float]:
+        """Tek Tesseract geçişi: image_to_data ile hem metin hem güven skoru"""
+        config = self.get_tesseract_config_string(custom_psm=psm)
+        data = pytesseract.image_to_data(
+            image,
+            lang=self.tesseract_config['lang'],
+            config=config,
+            output_type=pytesseract.Output.DICT
+        )
+        return self.build_text_from_data(data)
 
     def extract_text_from_image(self, image: Image.Image, content_type: str = "document") -> str:
-        """Görüntüden metin çıkarma - gelişmiş konfigürasyon ile"""
+        """Görüntüden metin çıkarma - tek ön işleme, güven eşiğine göre ek PSM denemeleri"""
         try:
             logger.info("Görüntüden OCR ile metin çıkarılıyor...")
             
-            # İçerik tipine göre farklı ön işlemeler yap
-            processed_images = self.preprocess_for_different_content_types(image, content_type)
+            # Ön işleme bir kez yapılır; tüm PSM denemeleri aynı görüntüyü kullanır
+            processed_image = self.enhance_image_quality(image, content_type)
             
             best_text = ""
-            best_confidence = 0
+            best_confidence = 0.0
             
-            # Farklı PSM modları ile deneme
-            psm_modes = [6, 8, 13, 3]  # Farklı page segmentation modları
+            # Önce varsayılan PSM, eşik altında kalırsa alternatif PSM modları
+            psm_modes = [self.tesseract_config['psm']] + [
+                psm for psm in self.fallback_psm_modes if psm != self.tesseract_config['psm']
+            ]
             
-            for i, processed_image in enumerate(processed_images):
-                psm = psm_modes[min(i, len(psm_modes) - 1)]
-                
+            for psm in psm_modes:
                 try:
-                    # Tesseract konfigürasyonu
-                    config = self.get_tesseract_config_string(custom_psm=psm)
-                    
-                    # OCR gerçekleştir
-                    text = pytesseract.image_to_string(
-                        processed_image, 
-                        lang=self.tesseract_config['lang'],
-                        config=config
-                    )
-                    
-                    # Güven skorunu al
-                    data = pytesseract.image_to_data(
-                        processed_image,
-                        lang=self.tesseract_config['lang'],
-                        config=config,
-                        output_type=pytesseract.Output.DICT
-                    )
-                    
-                    # Ortalama güven skorunu hesapla
-                    confidences = [int(conf) for conf in data['conf'] if int(conf) > 0]
-                    avg_confidence = sum(confidences) / len(confidences) if confidences else 0
-                    
-                    logger.info(f"PSM {psm} - Güven skoru: {avg_confidence:.2f}%")
+                    text, avg_confidence = self.run_ocr_pass(processed_image, psm)
+                    logger.info("PSM %s - Güven skoru: %.2f%%", psm, avg_confidence)
                     
                     # En iyi sonucu seç
                     if avg_confidence > best_confidence and len(text.strip()) > 0:
                         best_confidence = avg_confidence
                         best_text = text
+                    
+                    # Eşik aşıldıysa ek geçişlere gerek yok
+                    if best_confidence >= self.confidence_threshold:
+                        break
                         
                 except Exception as e:
-                    logger.warning(f"PSM {psm} ile OCR hatası: {e}")
+                    logger.warning("PSM %s ile OCR hatası: %s", psm, e)
                     continue
             
-            # En iyi sonuç bulunamadıysa varsayılan yöntemi kullan
-            if not best_text.strip():
-                logger.info("Varsayılan OCR yöntemi kullanılıyor...")
-                config = self.get_tesseract_config_string()
-                best_text = pytesseract.image_to_string(
-                    processed_images[0] if processed_images else image,
-                    lang=self.tesseract_config['lang'],
-                    config=config
-                )
-            
-            logger.info(f"OCR tamamlandı. En iyi güven skoru: {best_confidence:.2f}%")
+            logger.info("OCR tamamlandı. En iyi güven skoru: %.2f%%", best_confidence)
             
             # Metni normalize et
             normalized_text = text_normalizer.normalize(best_text)
@@ -257,46 +577,112 @@ class OCRService:
             return normalized_text
             
         except Exception as e:
-            logger.error(f"OCR hatası: {e}")
+            logger.error("OCR hatası: %s", e)
             return ""
 
-    def extract_text_from_pdf(self, pdf_content: bytes) -> str:
-        """PDF'den metin çıkarma - gelişmiş ayarlarla"""
+    def get_pdf_page_count(self, pdf_path: str) -> int:
+        """PDF sayfa sayısını rasterize etmeden oku"""
+        info = pdf2image.pdfinfo_from_path(pdf_path)
+        return int(info.get("Pages", 0))
+
+    def rasterize_pdf_page(self, pdf_path: str, page_number: int) -> Optional[Image.Image]:
+        """Tek bir PDF sayfasını yüksek çözünürlükte görüntüye çevir"""
+        images = pdf2image.convert_from_path(
+            pdf_path,
+            dpi=self.target_dpi,  # Yüksek DPI
+            fmt='PNG',
+            first_page=page_number,
+            last_page=page_number,
+            thread_count=1,  # Paralellik sayfa seviyesinde process havuzunda
+            grayscale=False,  # Renkli olarak al, sonra optimize ederiz
+            size=None,  # Orijinal boyut
+            transparent=False
+        )
+        return images[0] if images else None
+
+    def extract_text_from_pdf_page(self, pdf_path: str, page_number: int) -> str:
+        """Tek bir PDF sayfasından OCR ile metin çıkar"""
         try:
-            logger.info("PDF'den OCR ile metin çıkarılıyor...")
-            
-            # PDF'i yüksek çözünürlükte görüntüye çevir
-            images = pdf2image.convert_from_bytes(
-                pdf_content,
-                dpi=self.target_dpi,  # Yüksek DPI
-                fmt='PNG',
-                thread_count=2,  # Performans için
-                grayscale=False,  # Renkli olarak al, sonra optimize ederiz
-                size=None,  # Orijinal boyut
-                transparent=False
-            )
-            
-            all_text = []
-            
-            for i, image in enumerate(images):
-                logger.info(f"PDF sayfa {i+1}/{len(images)} işleniyor...")
-                
-                # Her sayfa için OCR yap
-                page_text = self.extract_text_from_image(image, "banking_document")
-                
-                if page_text.strip():
-                    all_text.append(f"--- Sayfa {i+1} ---")
-                    all_text.append(page_text)
-            
-            combined_text = "\n\n".join(all_text)
-            logger.info(f"PDF OCR tamamlandı. {len(images)} sayfa işlendi.")
-            
-            return combined_text
-            
+            image = self.rasterize_pdf_page(pdf_path, page_number)
+            if image is None:
+                return ""
+            return self.extract_text_from_image(image, "banking_document")
         except Exception as e:
-            logger.error(f"PDF OCR hatası: {e}")
+            logger.error("PDF sayfa %s OCR hatası: %s", page_number, e)
             return ""
 
+    def extract_pdf_text_layer(self, pdf_path: str, page_number: int) -> str:
+        """Sayfanın gömülü metin katmanını poppler pdftotext ile oku"""
+        result = subprocess.run(
+            [
+                "pdftotext", "-f", str(page_number), "-l", str(page_number),
+                "-layout", "-enc", "UTF-8", pdf_path, "-"
+            ],
+            capture_output=True,
+            timeout=30,
+            check=True
+        )
+        return result.stdout.decode("utf-8", errors="replace")
+
+    def has_usable_text(self, text: str) -> bool:
+        """Metin katmanı OCR'ı atlamaya yetecek kadar anlamlı mı?"""
+        alnum_count = sum(1 for ch in text if ch.isalnum())
+        if alnum_count < self.text_layer_min_chars:
+            return False
+        # Bozuk encoding'li (Type3 font vb.) katmanlar replacement karakterle dolu gelir
+        return text.count("\ufffd") <= alnum_count * 0.05
+
+    @staticmethod
+    def _cpu_seconds() -> float:
+        """Bu process ve beklenmiş alt process'lerin (tesseract, pdftoppm) toplam CPU süresi"""
+        own = resource.getrusage(resource.RUSAGE_SELF)
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return own.ru_utime + own.ru_stime + children.ru_utime + children.ru_stime
+
+    def process_pdf_page(self, pdf_path: str, page_number: int) -> Dict[str, Any]:
+        """
+        Tek PDF sayfasını işle: önce gömülü metin katmanı, kullanılabilir değilse OCR.
+        İzlenen yolu, süreyi ve CPU süresini döndürür.
+        """
+        wall_start = time.perf_counter()
+        cpu_start = self._cpu_seconds()
+        method = "ocr"
+        text = ""
+        
+        if self.text_layer_enabled:
+            try:
+                layer_text = self.extract_pdf_text_layer(pdf_path, page_number)
+                if self.has_usable_text(layer_text):
+                    text = text_normalizer.normalize(layer_text)
+                    method = "text_layer"
+            except Exception as e:
+                logger.warning("PDF sayfa %s metin katmanı okunamadı: %s", page_number, e)
+        
+        preprocess = None
+        if method == "ocr":
+            self.last_preprocess_stats = None
+            text = self.extract_text_from_pdf_page(pdf_path, page_number)
+            preprocess = self.last_preprocess_stats
+        
+        return {
+            "page": page_number,
+            "method": method,
+            "text": text,
+            "wall_ms": round((time.perf_counter() - wall_start) * 1000, 1),
+            "cpu_seconds": round(self._cpu_seconds() - cpu_start, 3),
+            "preprocess": preprocess
+        }
+
+    def combine_page_texts(self, page_texts: Dict[int, str]) -> str:
+        """Sayfa metinlerini sayfa sırasıyla başlıklarla birleştir"""
+        all_text = []
+        for page_number in sorted(page_texts):
+            page_text = page_texts[page_number]
+            if page_text.strip():
+                all_text.append(f"--- Sayfa {page_number} ---")
+                all_text.append(page_text)
+        return "\n\n".join(all_text)
+
     def get_ocr_confidence(self, image: Image.Image) -> float:
         """OCR güven skorunu hesapla"""
         try:
@@ -312,7 +698,16 @@ class OCRService:
             return sum(confidences) / len(confidences) if confidences else 0.0
             
         except Exception as e:
-            logger.error(f"Güven skoru hesaplama hatası: {e}")
+            logger.error("Güven skoru hesaplama hatası: %s", e)
             return 0.0
 
-ocr_service = OCRService() 
\ No newline at end of file
+ocr_service = OCRService()
+
+def process_pdf_page(pdf_path: str, page_number: int) -> Dict[str, Any]:
+    """Process havuzu için picklable giriş noktası: tek PDF sayfası (metin katmanı veya OCR)"""
+    return ocr_service.process_pdf_page(pdf_path, page_number)
+
+def ocr_image_file(image_path: str, content_type: str = "banking_document") -> str:
+    """Process havuzu için picklable giriş noktası: görüntü OCR (dosya yolundan, bayt kopyası yok)"""
+    with Image.open(image_path) as image:
+        return ocr_service.extract_text_from_image(image, content_type)
@@ -0,0 +1,352 @@
+import logging
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.schemas.nlp import DocumentType, PreExtractionResult
+from app.services.prompt_builder import ALL_FIELDS
+from app.services.text_normalizer import text_normalizer
+from app.services.validation_service import validation_service
+
+logger = logging.getLogger(__name__)
+
+# Para birimi yazımları -> şemadaki para birimi
+CURRENCY_ALIASES = {"TL": "TL", "TRY": "TL", "₺": "TL", "USD": "USD", "$": "USD", "EUR": "EUR", "€": "EUR"}
+
+_NUMBER = r"\d{1,3}(?:[.\s]\d{3})+(?:,\d{1,2})?|\d{1,3}(?:,\d{3})+(?:\.\d{1,2})?|\d+(?:[.,]\d{1,2})?"
+_CURRENCY = r"TL|TRY|USD|EUR|₺|\$|€"
+AMOUNT_PATTERN = re.compile(
+    rf"(?P<num>{_NUMBER})\s*(?P<cur>{_CURRENCY})(?![A-Za-z])|(?<![A-Za-z])(?P<cur2>{_CURRENCY})\s*(?P<num2>{_NUMBER})"
+)
+DATE_PATTERN = re.compile(r"\b(\d{1,2})[./-](\d{1,2})[./-](\d{4})\b|\b(\d{4})-(\d{2})-(\d{2})\b")
+
+# IBAN'ın hemen sonrasında / öncesinde rolünü belirten ifadeler
+SENDER_KEYWORDS = [
+    "hesabımızdan", "hesabımdan", "hesabından", "hesaptan", "gönderen", "gönderici",
+    "borçlu", "borçlandırılarak", "çekilerek"
+]
+RECEIVER_KEYWORDS = [
+    "hesabımıza", "hesabına", "hesaba", "alıcı", "lehdar", "lehine", "yatırılmasını"
+]
+
+# Belge tipi tahmini için anahtar kelimeler
+DOCUMENT_TYPE_KEYWORDS = {
+    DocumentType.EFT_FORM: ["eft", "havale", "para transferi", "aktar", "transfer", "fast ile", "gönderilmesini"],
+    DocumentType.LOAN_APPLICATION: ["kredi", "taksit", "vade", "faiz"],
+    DocumentType.ACCOUNT_OPENING: ["hesap açılış", "hesap açma", "hesap açılması", "yeni hesap"],
+    DocumentType.COMPLAINT: ["şikayet", "mağdur", "itiraz"],
+}
+
+# Karar için gereken alanlar (decision_service.make_decision dallarına göre).
+# Listede olmayan tipler için LLM her zaman çağrılır.
+DECISION_REQUIRED_FIELDS = {
+    DocumentType.EFT_FORM: [
+        "customer.tckn", "sender_account.iban", "receiver_account.iban", "transaction.amount"
+    ],
+}
+
+def _turkish_lower(text: str) -> str:
+    return text.replace("İ", "i").replace("I", "ı").lower()
+
+def parse_amount(number: str) -> Optional[float]:
+    """'1.500,00', '1 500', '1,500.00', '1500,5' gibi yazımları float'a çevir"""
+    number = re.sub(r"\s", "", number)
+    if "," in number and "." in number:
+        # Son ayraç ondalık ayracıdır
+        if number.rfind(",") > number.rfind("."):
+            number = number.replace(".", "").replace(",", ".")
+        else:
+            number = number.replace(",", "")
+    elif "," in number:
+        integer, _, decimals = number.rpartition(",")
+        number = f"{integer.replace(',', '')}.{decimals}" if len(decimals) <= 2 else number.replace(",", "")
+    elif "." in number:
+        integer, _, decimals = number.rpartition(".")
+        if len(decimals) == 3:
+            number = number.replace(".", "")
+    try:
+        return float(number)
+    except ValueError:
+        return None
+
+class PreExtractor:
+    """
+    LLM'den önce çalışan deterministik çıkarım: IBAN (MOD-97), TCKN (checksum),
+    tutar, tarih ve belge tipi tahmini. Karar için gereken tüm alanlar yüksek
+    güvenle bulunursa GPT çağrısı tamamen atlanır; aksi halde GPT'ye sadece
+    eksik alanlar sorulur.
+    """
+
+    def __init__(self, enabled: bool = True, min_confidence: float = 0.85):
+        self.enabled = enabled
+        self.min_confidence = min_confidence
+        # Belge tipi bazında: toplam, LLM atlanan, kısaltılmış LLM, LLM süresi ortalaması, kazanılan süre
+        self._stats: Dict[str, Dict[str, float]] = {}
+
+    # ----- Alan çıkarımı -----
+
+    def _find_ibans(self, text: str) -> List[Tuple[str, int, int]]:
+        """Checksum'dan geçen benzersiz IBAN'lar: (iban, başlangıç, bitiş)"""
+        found = []
+        seen = set()
+        for match in re.finditer(text_normalizer.iban_pattern, text):
+            iban = re.sub(r"\s+", "", match.group()).upper()
+            if iban in seen or not validation_service.validate_iban(iban):
+                continue
+            seen.add(iban)
+            found.append((iban, match.start(), match.end()))
+        return found
+
+    @staticmethod
+    def _keyword_role(window: str, from_start: bool) -> Optional[str]:
+        """Penceredeki en yakın rol ifadesine göre 'sender' / 'receiver'"""
+        window = _turkish_lower(window)
+        best: Optional[Tuple[int, str]] = None
+        for role, keywords in (("sender", SENDER_KEYWORDS), ("receiver", RECEIVER_KEYWORDS)):
+            for keyword in keywords:
+                position = window.find(keyword) if from_start else window.rfind(keyword)
+                if position < 0:
+                    continue
+                distance = position if from_start else len(window) - position
+                if best is None or distance < best[0]:
+                    best = (distance, role)
+        return best[1] if best else None
+
+    def _assign_iban_roles(self, text: str, ibans: List[Tuple[str, int, int]]) -> Dict[str, Tuple[str, float]]:
+        """IBAN'ları gönderici/alıcı olarak eşleştir: rol -> (iban, güven)"""
+        roles: Dict[str, Tuple[str, float]] = {}
+        if not ibans:
+            return roles
+
+        for index, (iban, start, end) in enumerate(ibans):
+            # Önce IBAN'dan sonraki ifade ("... nolu hesabımızdan"), sonra önceki ("alıcı IBAN: ...")
+            next_start = ibans[index + 1][1] if index + 1 < len(ibans) else len(text)
+            role = self._keyword_role(text[end:min(next_start, end + 60)], from_start=True)
+            if role is None:
+                previous_end = ibans[index - 1][2] if index > 0 else 0
+                role = self._keyword_role(text[max(previous_end, start - 40):start], from_start=False)
+            if role and role not in roles:
+                roles[role] = (iban, 0.95)
+
+        # İki IBAN varsa ve sadece biri ya da hiçbiri etiketlendiyse sıraya göre tamamla (düşük güven)
+        if len(ibans) == 2 and len(roles) < 2:
+            labeled = {iban for iban, _ in roles.values()}
+            remaining = [iban for iban, _, _ in ibans if iban not in labeled]
+            for role in ("sender", "receiver"):
+                if role not in roles and remaining:
+                    roles[role] = (remaining.pop(0), 0.6)
+        elif len(ibans) == 1 and not roles:
+            roles["receiver"] = (ibans[0][0], 0.5)
+        elif len(ibans) > 2:
+            # Çok sayıda IBAN: roller güvenilir değil
+            roles = {role: (iban, min(confidence, 0.6)) for role, (iban, confidence) in roles.items()}
+        return roles
+
+    def _find_tckn(self, text: str) -> Tuple[Optional[str], float]:
+        """Checksum'dan geçen TCKN; birden fazla farklı TCKN varsa güven düşer"""
+        candidates = []
+        for match in re.finditer(text_normalizer.tckn_pattern, text):
+            tckn = match.group()
+            if tckn not in candidates and validation_service.validate_tc_kimlik(tckn):
+                candidates.append(tckn)
+        if not candidates:
+            return None, 0.0
+        return candidates[0], 0.95 if len(candidates) == 1 else 0.5
+
+    def _find_amount(self, text: str) -> Tuple[Optional[float], Optional[str], float]:
+        """İşlem tutarı ve para birimi; 'tutar' ifadesine yakın olan tercih edilir"""
+        amounts = []
+        for match in AMOUNT_PATTERN.finditer(text):
+            value = parse_amount(match.group("num") or match.group("num2"))
+            currency = CURRENCY_ALIASES[match.group("cur") or match.group("cur2")]
+            if value and value > 0:
+                context = _turkish_lower(text[max(0, match.start() - 40):match.end() + 40])
+                near_keyword = any(k in context for k in ("tutar", "miktar", "bedel"))
+                amounts.append((value, currency, near_keyword))
+
+        distinct = {(value, currency) for value, currency, _ in amounts}
+        if not distinct:
+            return None, None, 0.0
+        if len(distinct) == 1:
+            value, currency = distinct.pop()
+            return value, currency, 0.9
+        near = {(value, currency) for value, currency, near_keyword in amounts if near_keyword}
+        if len(near) == 1:
+            value, currency = near.pop()
+            return value, currency, 0.85
+        value, currency, _ = amounts[0]
+        return value, currency, 0.4
+
+    @staticmethod
+    def _find_date(text: str) -> Optional[str]:
+        """Tek bir geçerli tarih varsa YYYY-MM-DD formatında döndür"""
+        dates = set()
+        for match in DATE_PATTERN.finditer(text):
+            if match.group(1):
+                day, month, year = match.group(1), match.group(2), match.group(3)
+            else:
+                year, month, day = match.group(4), match.group(5), match.group(6)
+            try:
+                dates.add(datetime(int(year), int(month), int(day)).strftime("%Y-%m-%d"))
+            except ValueError:
+                continue
+        return dates.pop() if len(dates) == 1 else None
+
+    @staticmethod
+    def _guess_document_type(text: str) -> Tuple[DocumentType, float]:
+        """Anahtar kelime sayımına göre belge tipi tahmini ve güveni"""
+        lowered = _turkish_lower(text)
+        scores = {
+            document_type: sum(lowered.count(keyword) for keyword in keywords)
+            for document_type, keywords in DOCUMENT_TYPE_KEYWORDS.items()
+        }
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        (best_type, best_score), (_, second_score) = ranked[0], ranked[1]
+        if best_score == 0:
+            return DocumentType.OTHER, 0.0
+        if second_score == 0:
+            confidence = 0.9
+        elif best_score >= 2 * second_score:
+            confidence = 0.75
+        else:
+            confidence = 0.5
+        # Limit artırım talepleri karar servisinde ayrı dalda değerlendirilir
+        if "limit" in lowered:
+            confidence = min(confidence, 0.5)
+        return best_type, confidence
+
+    # ----- Ana arayüz -----
+
+    def extract(self, text: str) -> PreExtractionResult:
+        """Metinden yerel çıkarım yap ve LLM'e sorulacak eksik alanları belirle"""
+        started = time.perf_counter()
+        values: Dict[str, Dict[str, Any]] = {}
+        confidence: Dict[str, float] = {}
+
+        def put(field: str, value: Any, field_confidence: float):
+            if value is None:
+                return
+            section, name = field.split(".")
+            values.setdefault(section, {})[name] = value
+            confidence[field] = field_confidence
+
+        ibans = self._find_ibans(text)
+        roles = self._assign_iban_roles(text, ibans)
+        if "sender" in roles:
+            put("sender_account.iban", *roles["sender"])
+        if "receiver" in roles:
+            put("receiver_account.iban", *roles["receiver"])
+
+        tckn, tckn_confidence = self._find_tckn(text)
+        put("customer.tckn", tckn, tckn_confidence)
+
+        amount, currency, amount_confidence = self._find_amount(text)
+        put("transaction.amount", amount, amount_confidence)
+        put("transaction.currency", currency, amount_confidence)
+
+        put("transaction.transaction_date", self._find_date(text), 0.8)
+
+        document_type, type_confidence = self._guess_document_type(text)
+        # Checksum'lı iki IBAN + tutar varsa transfer olduğu kesine yakındır
+        if document_type == DocumentType.EFT_FORM and len(ibans) == 2 and amount is not None:
+            type_confidence = max(type_confidence, 0.95) if "limit" not in _turkish_lower(text) else type_confidence
+        if document_type != DocumentType.OTHER:
+            put("document_analysis.document_type", document_type.value, type_confidence)
+        if document_type == DocumentType.EFT_FORM:
+            # Niyet ve öncelik sadece standart transfer talimatları için yerel olarak belirlenir
+            transaction_type = "wire_transfer" if "havale" in _turkish_lower(text) else "eft"
+            put("transaction.transaction_type", transaction_type, type_confidence)
+            put("document_analysis.intent", "Para transferi", type_confidence)
+            put("document_analysis.priority", "NORMAL", type_confidence)
+
+        # Sadece yüksek güvenli alanlar "bilinen" sayılır
+        known_values: Dict[str, Dict[str, Any]] = {}
+        for field, field_confidence in confidence.items():
+            if field_confidence >= self.min_confidence:
+                section, name = field.split(".")
+                known_values.setdefault(section, {})[name] = values[section][name]
+
+        if "document_analysis" in known_values:
+            # Analiz güveni: tip ve karar alanlarının en düşük güveni (0-100)
+            required_confidences = [confidence.get(f, 0.0) for f in DECISION_REQUIRED_FIELDS.get(document_type, [])]
+            known_values["document_analysis"]["confidence"] = round(
+                min([type_confidence] + required_confidences) * 100, 1
+            )
+
+        known_fields = {f"{section}.{name}" for section, fields in known_values.items() for name in fields}
+        missing_fields = [field for field in ALL_FIELDS if field not in known_fields]
+        required = DECISION_REQUIRED_FIELDS.get(document_type) if "document_analysis" in known_values else None
+        complete = bool(required) and all(field in known_fields for field in required)
+
+        return PreExtractionResult(
+            document_type=document_type,
+            document_type_confidence=type_confidence,
+            known_values=known_values,
+            field_confidence=confidence,
+            missing_fields=missing_fields,
+            complete=complete,
+            processing_time=time.perf_counter() - started
+        )
+
+    # ----- Raporlama -----
+
+    def _type_stats(self, document_type: str) -> Dict[str, float]:
+        if document_type not in self._stats:
+            self._stats[document_type] = {
+                "documents": 0, "llm_skipped": 0, "llm_reduced": 0,
+                "avg_llm_seconds": 0.0, "saved_seconds": 0.0
+            }
+        return self._stats[document_type]
+
+    def _estimated_llm_seconds(self, document_type: str) -> float:
+        """Bu tip için (yoksa tüm tipler için) ortalama GPT süresi"""
+        own = self._stats.get(document_type, {}).get("avg_llm_seconds")
+        if own:
+            return own
+        observed = [stats["avg_llm_seconds"] for stats in self._stats.values() if stats["avg_llm_seconds"]]
+        return sum(observed) / len(observed) if observed else 0.0
+
+    def record_skip(self, result: PreExtractionResult):
+        """GPT atlandı: tahmini kazanılan süreyi kaydet"""
+        document_type = result.document_type.value
+        stats = self._type_stats(document_type)
+        stats["documents"] += 1
+        stats["llm_skipped"] += 1
+        saved = max(0.0, self._estimated_llm_seconds(document_type) - result.processing_time)
+        stats["saved_seconds"] += saved
+        metrics.inc(f"pre_extract_{document_type}_llm_skipped_total")
+        metrics.inc("pre_extract_saved_seconds_total", saved)
+        logger.info("GPT atlandı (%s): tahmini %.2fs kazanıldı", document_type, saved)
+
+    def record_llm_call(self, result: PreExtractionResult, llm_seconds: float):
+        """GPT çağrıldı: tip bazında ortalama süreyi güncelle"""
+        document_type = result.document_type.value
+        stats = self._type_stats(document_type)
+        stats["documents"] += 1
+        if len(result.missing_fields) < len(ALL_FIELDS):
+            stats["llm_reduced"] += 1
+            metrics.inc(f"pre_extract_{document_type}_llm_reduced_total")
+        llm_calls = stats["documents"] - stats["llm_skipped"]
+        stats["avg_llm_seconds"] += (llm_seconds - stats["avg_llm_seconds"]) / llm_calls
+        metrics.inc(f"pre_extract_{document_type}_llm_called_total")
+
+    def get_report(self) -> Dict[str, Dict[str, float]]:
+        """Belge tipi bazında GPT atlama oranı ve kazanılan süre"""
+        return {
+            document_type: {
+                "documents": int(stats["documents"]),
+                "llm_skipped": int(stats["llm_skipped"]),
+                "llm_reduced": int(stats["llm_reduced"]),
+                "skip_rate": round(stats["llm_skipped"] / stats["documents"], 3) if stats["documents"] else 0.0,
+                "avg_llm_seconds": round(stats["avg_llm_seconds"], 3),
+                "saved_seconds": round(stats["saved_seconds"], 2)
+            }
+            for document_type, stats in self._stats.items()
+        }
+
+pre_extractor = PreExtractor(
+    enabled=settings.pre_extract_enabled,
+    min_confidence=settings.pre_extract_min_confidence
+)
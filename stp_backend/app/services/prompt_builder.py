@@ -0,0 +1,430 @@
+import logging
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.schemas.nlp import BuiltPrompt
+from app.services.text_normalizer import text_normalizer
+
+try:
+    import tiktoken
+except ImportError:  # Opsiyonel: yoksa karakter bazlı tahmin kullanılır
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# Prompt metni veya çıktı şeması değiştiğinde artırılmalı (sonuç önbelleği anahtarının parçası)
+PROMPT_VERSION = "3"
+
+SYSTEM_PROMPT = """
+Sen bir Türk bankacılık uzmanısın. Verilen belgedeki bilgileri çıkarıp JSON formatında döndürmelisin.
+
+Çıkaracağın bilgiler:
+1. Müşteri bilgileri (ad, TCKN, telefon, email, adres, doğum tarihi, aylık gelir)
+2. Hesap bilgileri (gönderici ve alıcı IBAN, hesap no, banka adı, hesap sahibi)
+3. İşlem bilgileri (tür, tutar, para birimi, tarih, açıklama)
+4. Kredi bilgileri (tutar, vade, amaç, faiz oranı, taksit, teminat)
+5. Belge tipi ve müşteri niyeti
+
+ÖNEMLI:
+- Birden fazla IBAN varsa gönderici/alıcı olarak ayır
+- Tutarları sadece sayısal değer olarak ver (1000.50 formatında)
+- Tarihleri YYYY-MM-DD formatında ver
+- TCKN'leri 11 haneli kontrol et
+- Belirsiz bilgileri null olarak bırak
+- Kullanıcı sadece belirli alanları isterse yalnızca o alanları döndür
+- "[... çıkarıldı]" ile işaretli sayfalar bankacılık bilgisi içermediği için gönderilmedi
+
+Türkçe bankacılık terimleri:
+- "hesabımızdan" = gönderici hesap
+- "hesabına" = alıcı hesap
+- "nolu hesaba" = alıcı hesap
+- "tutarını" = işlem tutarı
+- "aktarmak" = para transferi
+"""
+
+# GPT çıktı şeması: bölüm -> alan -> prompt'ta yazılacak tip açıklaması
+RESPONSE_SCHEMA: Dict[str, Dict[str, str]] = {
+    "customer": {
+        "name": '"string veya null"',
+        "tckn": '"string veya null"',
+        "phone": '"string veya null"',
+        "email": '"string veya null"',
+        "address": '"string veya null"',
+        "birth_date": '"YYYY-MM-DD veya null"',
+        "monthly_income": 'number veya null'
+    },
+    "sender_account": {
+        "iban": '"string veya null"',
+        "account_number": '"string veya null"',
+        "bank_name": '"string veya null"',
+        "account_holder": '"string veya null"'
+    },
+    "receiver_account": {
+        "iban": '"string veya null"',
+        "account_number": '"string veya null"',
+        "bank_name": '"string veya null"',
+        "account_holder": '"string veya null"'
+    },
+    "transaction": {
+        "transaction_type": '"eft|wire_transfer|loan_payment|deposit|withdrawal|other"',
+        "amount": 'number veya null',
+        "currency": '"TL|USD|EUR"',
+        "transaction_date": '"YYYY-MM-DD veya null"',
+        "description": '"string veya null"'
+    },
+    "loan": {
+        "loan_amount": 'number veya null',
+        "loan_term": 'number veya null',
+        "loan_purpose": '"string veya null"',
+        "interest_rate": 'number veya null',
+        "monthly_installment": 'number veya null'
+    },
+    "document_analysis": {
+        "document_type": '"eft_form|loan_application|account_opening|complaint|other"',
+        "confidence": 'number (0-100)',
+        "intent": '"string"',
+        "priority": '"LOW|NORMAL|HIGH|URGENT"'
+    }
+}
+
+# Şemadaki tüm alanlar "bölüm.alan" formatında
+ALL_FIELDS: List[str] = [
+    f"{section}.{field}" for section, section_fields in RESPONSE_SCHEMA.items() for field in section_fields
+]
+
+def render_response_schema(fields: Optional[List[str]] = None) -> str:
+    """Şemayı prompt için yaz; fields verilirse sadece o alanlar (bölüm.alan) yer alır"""
+    selected = set(fields) if fields else None
+    sections = []
+    for section, section_fields in RESPONSE_SCHEMA.items():
+        lines = [
+            f'    "{field}": {description}'
+            for field, description in section_fields.items()
+            if selected is None or f"{section}.{field}" in selected
+        ]
+        if lines:
+            sections.append(f'  "{section}": {{\n' + ",\n".join(lines) + "\n  }")
+    return "{\n" + ",\n".join(sections) + "\n}"
+
+# Birden fazla kısa belge tek istekte gönderildiğinde belge ayracı
+PACKED_DOCUMENT_HEADER = "=== BELGE {document_id} ==="
+
+PAGE_HEADER_PATTERN = re.compile(r"^--- Sayfa (\d+) ---$", re.MULTILINE)
+
+# Bankacılık sinyali sayılan ifadeler (küçük harf)
+BANKING_KEYWORDS = [
+    "iban", "hesap", "tutar", "eft", "havale", "transfer", "kredi", "tckn", "kimlik",
+    "müşteri", "ödeme", "talimat", "banka", "şube", "faiz", "vade", "taksit", "imza", "tl"
+]
+
+class TokenCounter:
+    """
+    Offline token sayacı. tiktoken kuruluysa modelin encoding'i kullanılır
+    (gpt-4o ailesi için o200k_base); değilse ~3 karakter/token tahmini yapılır.
+
+    tiktoken BPE dosyasını ilk kullanımda indirir (TIKTOKEN_CACHE_DIR'de yoksa).
+    Yükleme arka plan thread'inde yapılır, istekler hiç beklemez: encoding hazır
+    olana kadar ve indirilemezse (offline) karakter bazlı tahmin kullanılır.
+    Docker imajı dosyayı build sırasında önbelleğe alır.
+    """
+
+    def __init__(self, model: str):
+        self.model = model
+        self._encoding = None
+        self._loading = False
+        self._lock = threading.Lock()
+
+    def start_loading(self):
+        """Encoding yüklemesini arka planda başlat (tekrar çağrılırsa bir şey yapmaz)"""
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._load, name="tiktoken-load", daemon=True).start()
+
+    def _load(self):
+        if tiktoken is None:
+            logger.warning("tiktoken kurulu değil, token sayımı karakter bazlı tahmin edilecek")
+            return
+        for name in ("o200k_base", "cl100k_base"):
+            try:
+                self._encoding = tiktoken.get_encoding(name)
+                logger.info("tiktoken encoding yüklendi: %s", name)
+                return
+            except Exception as e:
+                logger.debug("tiktoken encoding %s yüklenemedi: %s", name, e)
+        logger.warning("tiktoken encoding yüklenemedi, token sayımı karakter bazlı tahmin edilecek")
+
+    def _get_encoding(self):
+        if not self._loading:
+            self.start_loading()
+        return self._encoding
+
+    @property
+    def name(self) -> str:
+        encoding = self._get_encoding()
+        return encoding.name if encoding else "heuristic"
+
+    def count(self, text: str) -> int:
+        encoding = self._get_encoding()
+        if encoding is not None:
+            return len(encoding.encode(text, disallowed_special=()))
+        return len(text) // 3 + 1
+
+    def count_messages(self, messages: List[Dict[str, str]]) -> int:
+        """Chat formatı: mesaj başına ~4 token ek yük + yanıt başlangıcı için 3"""
+        return sum(self.count(message["content"]) + 4 for message in messages) + 3
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Metni en fazla max_tokens token olacak şekilde kes"""
+        encoding = self._get_encoding()
+        if encoding is not None:
+            tokens = encoding.encode(text, disallowed_special=())
+            return encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * 3]
+
+class PromptBuilder:
+    """
+    Token bütçeli prompt oluşturucu.
+    - System mesajı (talimatlar + tam JSON şeması) her çağrıda birebir aynıdır;
+      OpenAI prompt caching bu ortak öneki yeniden kullanabilir.
+    - Değişken kısım (istenen alanlar + belge metni) en sonda, user mesajındadır.
+    - Belge bütçeyi aşarsa bankacılık sinyali olmayan sayfalar tek satırlık
+      özetle değiştirilir, gerekirse en düşük skorlu sayfalar ve satırlar atılır.
+    """
+
+    def __init__(self, model: str, prompt_token_budget: int, max_completion_tokens: int):
+        self.counter = TokenCounter(model)
+        self.prompt_token_budget = prompt_token_budget
+        self.max_completion_tokens = max_completion_tokens
+        self.system_message = SYSTEM_PROMPT + "\nJSON formatı şu şekilde olmalı:\n" + render_response_schema()
+        self._prefix_tokens: Optional[Tuple[str, int]] = None
+
+    @property
+    def prefix_tokens(self) -> int:
+        """Sabit system mesajının token sayısı (encoding yüklenince yeniden sayılır)"""
+        counter_name = self.counter.name
+        if self._prefix_tokens is None or self._prefix_tokens[0] != counter_name:
+            self._prefix_tokens = (counter_name, self.counter.count(self.system_message))
+        return self._prefix_tokens[1]
+
+    # ----- Sayfa puanlama ve kırpma -----
+
+    @staticmethod
+    def split_pages(text: str) -> List[Tuple[Optional[int], str]]:
+        """'--- Sayfa N ---' başlıklarına göre (sayfa no, metin) listesi"""
+        headers = list(PAGE_HEADER_PATTERN.finditer(text))
+        if not headers:
+            return [(None, text)]
+        pages = []
+        preamble = text[:headers[0].start()].strip()
+        if preamble:
+            pages.append((None, preamble))
+        for index, header in enumerate(headers):
+            end = headers[index + 1].start() if index + 1 < len(headers) else len(text)
+            pages.append((int(header.group(1)), text[header.end():end].strip()))
+        return pages
+
+    @staticmethod
+    def banking_signal_score(text: str) -> int:
+        """IBAN, TCKN, tutar ve bankacılık terimlerine göre sayfa skoru (0 = sinyal yok)"""
+        lowered = text.replace("İ", "i").replace("I", "ı").lower()
+        score = 5 * len(re.findall(text_normalizer.iban_pattern, text))
+        score += 3 * len(re.findall(text_normalizer.tckn_pattern, text))
+        score += 3 * len(re.findall(text_normalizer.currency_pattern, text))
+        score += sum(1 for keyword in BANKING_KEYWORDS if re.search(rf"\b{keyword}", lowered))
+        return score
+
+    @staticmethod
+    def _render_page(page_number: Optional[int], body: str) -> str:
+        return f"--- Sayfa {page_number} ---\n{body}" if page_number is not None else body
+
+    @staticmethod
+    def _summary_line(page_number: Optional[int], body: str) -> str:
+        first_line = next((line.strip() for line in body.splitlines() if line.strip()), "")
+        preview = first_line[:60] + ("..." if len(first_line) > 60 else "")
+        label = f"--- Sayfa {page_number} ---" if page_number is not None else "---"
+        return f"{label}\n[bankacılık bilgisi içermiyor, çıkarıldı: {preview}]"
+
+    def _keep_signal_lines(self, body: str, budget: int) -> str:
+        """Tek sayfa bütçeyi aşıyorsa sinyal içeren satırları (ve komşularını) tut"""
+        lines = body.splitlines()
+        keep = set()
+        for index, line in enumerate(lines):
+            if self.banking_signal_score(line) > 0:
+                keep.update({index - 1, index, index + 1})
+        filtered = "\n".join(line for index, line in enumerate(lines) if index in keep) or body
+        if self.counter.count(filtered) > budget:
+            filtered = self.counter.truncate(filtered, budget)
+        return filtered
+
+    def fit_document(self, text: str, budget: int) -> Tuple[str, List[int], bool]:
+        """
+        Belge metnini token bütçesine sığdır.
+        (metin, özetlenen/çıkarılan sayfalar, satır düzeyinde kesildi mi) döndürür.
+        """
+        if self.counter.count(text) <= budget:
+            return text, [], False
+
+        pages = self.split_pages(text)
+        entries = []
+        for order, (page_number, body) in enumerate(pages):
+            rendered = self._render_page(page_number, body)
+            entries.append({
+                "order": order,
+                "page": page_number,
+                "body": body,
+                "score": self.banking_signal_score(body),
+                "text": rendered,
+                "tokens": self.counter.count(rendered) + 2
+            })
+
+        # 1. Sinyalsiz sayfaları tek satırlık özetle değiştir
+        dropped = []
+        for entry in entries:
+            if entry["score"] == 0:
+                entry["text"] = self._summary_line(entry["page"], entry["body"])
+                entry["tokens"] = self.counter.count(entry["text"]) + 2
+                dropped.append(entry["page"])
+
+        # 2. Hâlâ sığmıyorsa en düşük skorlu sinyalli sayfaları da özetle (en iyisi kalır)
+        total = sum(entry["tokens"] for entry in entries)
+        candidates = sorted(
+            (entry for entry in entries if entry["score"] > 0),
+            key=lambda entry: (entry["score"], -entry["order"])
+        )
+        while total > budget and len(candidates) > 1:
+            entry = candidates.pop(0)
+            summary = self._summary_line(entry["page"], entry["body"]).replace(
+                "bankacılık bilgisi içermiyor", "düşük öncelikli sayfa"
+            )
+            total -= entry["tokens"] - self.counter.count(summary) - 2
+            entry["text"] = summary
+            dropped.append(entry["page"])
+
+        # 3. Son kalan sayfa da sığmıyorsa satır düzeyinde kırp
+        truncated = False
+        if total > budget and candidates:
+            entry = candidates[0]
+            others = total - entry["tokens"]
+            body = self._keep_signal_lines(entry["body"], max(1, budget - others - 10))
+            entry["text"] = self._render_page(entry["page"], body)
+            truncated = True
+
+        fitted = "\n\n".join(entry["text"] for entry in entries)
+        if self.counter.count(fitted) > budget:
+            fitted = self.counter.truncate(fitted, budget)
+            truncated = True
+        return fitted, [page for page in dropped if page is not None], truncated
+
+    # ----- Prompt -----
+
+    def completion_budget(self, fields: Optional[List[str]] = None) -> int:
+        """İstenen alan sayısına göre max_tokens (alan başına ~25 token + JSON iskeleti)"""
+        field_count = len(fields) if fields else len(ALL_FIELDS)
+        return min(self.max_completion_tokens, 100 + 25 * field_count)
+
+    def build(self, text: str, fields: Optional[List[str]] = None) -> BuiltPrompt:
+        """Sabit önek + (istenen alanlar, belge metni) ile mesajları oluştur"""
+        if fields:
+            # Yerel çıkarımın bulamadığı alanlar; şema system mesajında sabit kalır
+            instruction = (
+                "Aşağıdaki bankacılık belgesinden SADECE şu alanları şemadaki yapıda döndür "
+                f"(diğer alanları yazma): {', '.join(fields)}"
+            )
+        else:
+            instruction = "Aşağıdaki bankacılık belgesini analiz et ve şemadaki JSON formatında döndür."
+
+        user_header = f"{instruction}\n\nBELGE METNİ:\n"
+        # Sabit kısımlar + chat formatı ek yükü çıkarıldıktan sonra belgeye kalan bütçe
+        overhead = self.prefix_tokens + self.counter.count(user_header) + 11
+        document_budget = max(256, self.prompt_token_budget - overhead)
+
+        original_tokens = self.counter.count(text)
+        document, dropped_pages, truncated = self.fit_document(text, document_budget)
+
+        messages = [
+            {"role": "system", "content": self.system_message},
+            {"role": "user", "content": user_header + document}
+        ]
+        return BuiltPrompt(
+            messages=messages,
+            prompt_tokens=self.counter.count_messages(messages),
+            max_tokens=self.completion_budget(fields),
+            document_tokens=self.counter.count(document) if document is not text else original_tokens,
+            original_document_tokens=original_tokens,
+            dropped_pages=dropped_pages,
+            truncated=truncated,
+            token_counter=self.counter.name
+        )
+
+    # ----- Toplu analiz (paketleme) -----
+
+    def pack_documents(
+        self,
+        items: List[Tuple[int, str]],
+        max_documents: int,
+        max_document_tokens: int
+    ) -> List[List[Tuple[int, str]]]:
+        """
+        Kısa belgeleri aynı isteğe paketle; her paket ortak system önekini bir kez taşır.
+        max_document_tokens'ı aşan belgeler tek başına gönderilir (build() ile kırpılır).
+        """
+        # Paket başlığı ve belge ayraçları için pay bırakılır
+        document_budget = self.prompt_token_budget - self.prefix_tokens - 200
+        groups: List[List[Tuple[int, str]]] = []
+        current: List[Tuple[int, str]] = []
+        current_tokens = 0
+        for document_id, text in items:
+            tokens = self.counter.count(text) + 10
+            if max_documents <= 1 or tokens > max_document_tokens:
+                groups.append([(document_id, text)])
+                continue
+            if current and (len(current) >= max_documents or current_tokens + tokens > document_budget):
+                groups.append(current)
+                current, current_tokens = [], 0
+            current.append((document_id, text))
+            current_tokens += tokens
+        if current:
+            groups.append(current)
+        return groups
+
+    def build_packed(self, items: List[Tuple[int, str]]) -> BuiltPrompt:
+        """Birden fazla belge için tek istek; yanıt {"documents": {"<id>": şema}} yapısında beklenir"""
+        if len(items) == 1:
+            document_id, text = items[0]
+            prompt = self.build(text)
+            prompt.document_ids = [document_id]
+            return prompt
+
+        instruction = (
+            f"Aşağıda birbirinden bağımsız {len(items)} bankacılık belgesi var; her biri "
+            f"'{PACKED_DOCUMENT_HEADER.format(document_id='<no>')}' satırıyla başlar. Her belgeyi ayrı analiz et, "
+            "belgeler arasında bilgi taşıma. Yanıtı {\"documents\": {\"<no>\": <şemadaki JSON>}} yapısında, "
+            "her belge numarası için bir kayıt olacak şekilde döndür."
+        )
+        sections = [
+            f"{PACKED_DOCUMENT_HEADER.format(document_id=document_id)}\n{text.strip()}"
+            for document_id, text in items
+        ]
+        messages = [
+            {"role": "system", "content": self.system_message},
+            {"role": "user", "content": instruction + "\n\n" + "\n\n".join(sections)}
+        ]
+        document_tokens = sum(self.counter.count(section) for section in sections)
+        return BuiltPrompt(
+            messages=messages,
+            prompt_tokens=self.counter.count_messages(messages),
+            max_tokens=self.completion_budget() * len(items),
+            document_tokens=document_tokens,
+            original_document_tokens=document_tokens,
+            document_ids=[document_id for document_id, _ in items],
+            token_counter=self.counter.name
+        )
+
+prompt_builder = PromptBuilder(
+    model=settings.openai_model,
+    prompt_token_budget=settings.openai_prompt_token_budget,
+    max_completion_tokens=settings.openai_max_completion_tokens
+)
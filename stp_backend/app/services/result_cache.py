@@ -0,0 +1,245 @@
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import select
+from app.core.config import settings
+from app.core.executors import run_io
+from app.core.metrics import metrics
+from app.db.session import SessionLocal
+from app.models.result_cache import ResultCacheEntry
+from app.services.nlp_service import nlp_service
+from app.services.ocr_service import ocr_service
+
+logger = logging.getLogger(__name__)
+
+def compute_content_hash(content: bytes) -> str:
+    """Belge içeriğinin SHA-256 özeti"""
+    return hashlib.sha256(content).hexdigest()
+
+def compute_file_hash(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Dosyanın SHA-256 özeti (parça parça okunur)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    OCR ve NLP sonuçları için iki katmanlı önbellek.
+    1. katman: süreç içi LRU (OrderedDict, thread-safe)
+    2. katman: Postgres result_cache tablosu (TTL + en eski erişime göre tahliye)
+    Anahtar; içerik hash'i, OCR ayarları, model ve prompt versiyonundan türetilir,
+    böylece bu ayarlardan biri değiştiğinde eski kayıtlar kendiliğinden kullanılmaz.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = True,
+        memory_entries: int = 512,
+        ttl_hours: int = 720,
+        max_rows: int = 50000,
+        eviction_interval: int = 3600
+    ):
+        self.enabled = enabled
+        self.memory_entries = memory_entries
+        self.ttl = timedelta(hours=ttl_hours)
+        self.max_rows = max_rows
+        self.eviction_interval = eviction_interval
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    # ----- Anahtarlar -----
+
+    @staticmethod
+    def _digest(parts: Dict[str, Any]) -> str:
+        return hashlib.sha256(
+            json.dumps(parts, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8")
+        ).hexdigest()
+
+    def ocr_key(self, content_hash: str) -> str:
+        """OCR sonucu anahtarı: içerik + OCR ayarları"""
+        return self._digest({
+            "kind": "ocr",
+            "content_hash": content_hash,
+            "ocr_config": ocr_service.get_config_fingerprint()
+        })
+
+    def nlp_key(self, content_hash: str, source: str = "ocr") -> str:
+        """
+        NLP sonucu anahtarı: içerik + (OCR'dan geliyorsa) OCR ayarları + model + prompt versiyonu.
+        source='text' doğrudan gönderilen metin içindir.
+        """
+        return self._digest({
+            "kind": "nlp",
+            "content_hash": content_hash,
+            "ocr_config": ocr_service.get_config_fingerprint() if source == "ocr" else None,
+            "model": nlp_service.model,
+            "prompt_version": nlp_service.prompt_version
+        })
+
+    # ----- Bellek katmanı -----
+
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] <= datetime.utcnow():
+                del self._memory[key]
+                return None
+            self._memory.move_to_end(key)
+            return entry["payload"]
+
+    def _memory_set(self, key: str, payload: Dict[str, Any], expires_at: datetime):
+        with self._lock:
+            self._memory[key] = {"payload": payload, "expires_at": expires_at}
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.memory_entries:
+                self._memory.popitem(last=False)
+
+    def get_memory_size(self) -> int:
+        """Bellek katmanındaki kayıt sayısı"""
+        return len(self._memory)
+
+    # ----- Postgres katmanı (thread havuzunda çalışır) -----
+
+    def _db_get(self, key: str) -> Optional[Tuple[Dict[str, Any], datetime]]:
+        db = SessionLocal()
+        try:
+            entry = db.query(ResultCacheEntry).filter(ResultCacheEntry.cache_key == key).first()
+            if entry is None:
+                return None
+            now = datetime.utcnow()
+            if entry.expires_at <= now:
+                db.delete(entry)
+                db.commit()
+                return None
+            entry.hit_count = (entry.hit_count or 0) + 1
+            entry.last_accessed_at = now
+            payload = json.loads(entry.payload)
+            expires_at = entry.expires_at
+            db.commit()
+            return payload, expires_at
+        finally:
+            db.close()
+
+    def _db_set(self, key: str, kind: str, content_hash: str, payload: Dict[str, Any], expires_at: datetime):
+        db = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            db.merge(ResultCacheEntry(
+                cache_key=key,
+                kind=kind,
+                content_hash=content_hash,
+                payload=json.dumps(payload, ensure_ascii=False, default=str),
+                hit_count=0,
+                created_at=now,
+                last_accessed_at=now,
+                expires_at=expires_at
+            ))
+            db.commit()
+        finally:
+            db.close()
+
+    def evict(self) -> int:
+        """Süresi dolan kayıtları ve max_rows üzerindeki en eski erişilen kayıtları sil"""
+        db = SessionLocal()
+        try:
+            removed = db.query(ResultCacheEntry).filter(
+                ResultCacheEntry.expires_at <= datetime.utcnow()
+            ).delete(synchronize_session=False)
+
+            overflow_keys = db.query(ResultCacheEntry.cache_key).order_by(
+                ResultCacheEntry.last_accessed_at.desc()
+            ).offset(self.max_rows).subquery()
+            removed += db.query(ResultCacheEntry).filter(
+                ResultCacheEntry.cache_key.in_(select(overflow_keys.c.cache_key))
+            ).delete(synchronize_session=False)
+
+            db.commit()
+            return removed
+        finally:
+            db.close()
+
+    # ----- Genel arayüz -----
+
+    async def get(self, kind: str, key: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Önbellekten oku. (payload, tier) döndürür; tier 'memory', 'db' veya miss için None.
+        Postgres katmanından gelen kayıt bellek katmanına da yazılır.
+        """
+        if not self.enabled:
+            return None, None
+
+        payload = self._memory_get(key)
+        if payload is not None:
+            metrics.inc(f"result_cache_{kind}_memory_hits_total")
+            return payload, "memory"
+
+        try:
+            found = await run_io(self._db_get, key)
+        except Exception as e:
+            logger.error("Önbellek okuma hatası (%s): %s", kind, e)
+            found = None
+
+        if found is None:
+            metrics.inc(f"result_cache_{kind}_misses_total")
+            return None, None
+
+        payload, expires_at = found
+        self._memory_set(key, payload, expires_at)
+        metrics.inc(f"result_cache_{kind}_db_hits_total")
+        return payload, "db"
+
+    async def set(self, kind: str, key: str, content_hash: str, payload: Dict[str, Any]):
+        """Her iki katmana yaz; Postgres hatası işlemi bozmaz"""
+        if not self.enabled:
+            return
+
+        expires_at = datetime.utcnow() + self.ttl
+        self._memory_set(key, payload, expires_at)
+        try:
+            await run_io(self._db_set, key, kind, content_hash, payload, expires_at)
+        except Exception as e:
+            logger.error("Önbellek yazma hatası (%s): %s", kind, e)
+
+    async def _run_eviction(self):
+        while True:
+            await asyncio.sleep(self.eviction_interval)
+            try:
+                removed = await run_io(self.evict)
+                metrics.inc("result_cache_evicted_total", removed)
+                if removed:
+                    logger.info("Sonuç önbelleğinden %s kayıt silindi", removed)
+            except Exception as e:
+                logger.error("Önbellek temizleme hatası: %s", e)
+
+    def start(self):
+        """Periyodik tahliye görevini başlat"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._run_eviction())
+
+    async def stop(self):
+        """Periyodik tahliye görevini durdur"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+result_cache = ResultCache(
+    enabled=settings.result_cache_enabled,
+    memory_entries=settings.result_cache_memory_entries,
+    ttl_hours=settings.result_cache_ttl_hours,
+    max_rows=settings.result_cache_max_rows,
+    eviction_interval=settings.result_cache_eviction_interval_seconds
+)
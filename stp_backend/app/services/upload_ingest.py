@@ -0,0 +1,146 @@
+import logging
+from typing import BinaryIO, Dict, Iterator, NamedTuple, Optional
+import pdf2image
+from PIL import Image
+from app.core.config import settings
+from app.core.metrics import metrics
+from app.services.blob_store import BlobInfo, blob_store, iter_file_chunks
+
+logger = logging.getLogger(__name__)
+
+# Dosya başındaki imza -> içerik tipi (istemcinin gönderdiği content_type'a güvenilmez)
+MAGIC_SIGNATURES = [
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+]
+
+# Tipi belirlemek için okunan baş kısım (PDF imzası ilk 1024 bayt içinde olabilir)
+SNIFF_BYTES = 1024
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    """Magic byte'lara göre içerik tipi; desteklenmeyen dosyalarda None"""
+    for signature, content_type in MAGIC_SIGNATURES:
+        if head.startswith(signature):
+            return content_type
+    if b"%PDF-" in head[:SNIFF_BYTES]:
+        return "application/pdf"
+    return None
+
+class UploadRejectedError(Exception):
+    """Yüklenen dosya sınırları aşarsa veya desteklenmiyorsa fırlatılır"""
+
+    def __init__(self, message: str, status_code: int = 400, reason: str = "invalid"):
+        super().__init__(message)
+        self.status_code = status_code
+        self.reason = reason
+
+class IngestedUpload(NamedTuple):
+    """Doğrulanıp blob store'a yazılmış yükleme"""
+    blob: BlobInfo
+    content_type: str
+    page_count: int
+
+class UploadIngestor:
+    """
+    Yüklenen dosyayı parça parça blob store'a yazar; yazarken SHA-256 hesaplanır,
+    ilk baytlardan gerçek tip belirlenir ve boyut sınırı aşıldığı anda okuma kesilir.
+    Sayfa sayısı (pdfinfo) ve görüntü boyutu (sadece başlık) blob kalıcı hale
+    gelmeden kontrol edilir; hiçbir sayfa rasterize/decode edilmeden reddedilir.
+    """
+
+    def __init__(self, max_bytes: int, max_pdf_pages: int, max_image_pixels: int, chunk_size: int):
+        self.max_bytes = max_bytes
+        self.max_pdf_pages = max_pdf_pages
+        self.max_image_pixels = max_image_pixels
+        self.chunk_size = chunk_size
+
+    def check_declared_size(self, content_length: Optional[str]):
+        """İstek başlığındaki Content-Length sınırı açıkça aşıyorsa okumadan reddet"""
+        try:
+            declared = int(content_length) if content_length else None
+        except ValueError:
+            declared = None
+        # Multipart sınırları ve form alanları için küçük pay
+        if declared is not None and declared > self.max_bytes + 64 * 1024:
+            self._reject(
+                f"Dosya boyutu sınırı aşıldı (en fazla {self.max_bytes // (1024 * 1024)} MB)", 413, "size"
+            )
+
+    @staticmethod
+    def _reject(message: str, status_code: int, reason: str):
+        metrics.inc(f"upload_rejected_{reason}_total")
+        raise UploadRejectedError(message, status_code, reason)
+
+    def _checked_chunks(self, file: BinaryIO, state: Dict[str, object]) -> Iterator[bytes]:
+        head = b""
+        size = 0
+        for chunk in iter_file_chunks(file, self.chunk_size):
+            size += len(chunk)
+            if size > self.max_bytes:
+                self._reject(
+                    f"Dosya boyutu sınırı aşıldı (en fazla {self.max_bytes // (1024 * 1024)} MB)", 413, "size"
+                )
+            if state["content_type"] is None:
+                head += chunk[:SNIFF_BYTES]
+                if len(head) >= SNIFF_BYTES:
+                    self._sniff(head, state)
+            yield chunk
+
+        if size == 0:
+            self._reject("Boş dosya yüklenemez", 400, "empty")
+        if state["content_type"] is None:
+            self._sniff(head, state)
+
+    def _sniff(self, head: bytes, state: Dict[str, object]):
+        content_type = sniff_content_type(head)
+        if content_type is None:
+            self._reject("Desteklenmeyen dosya içeriği. Desteklenen tipler: PDF, JPEG, PNG", 415, "type")
+        state["content_type"] = content_type
+
+    def _validate(self, path: str, state: Dict[str, object]):
+        """Blob kalıcı olmadan önce sayfa sayısı / piksel sınırı kontrolü (decode yok)"""
+        if state["content_type"] == "application/pdf":
+            try:
+                page_count = int(pdf2image.pdfinfo_from_path(path)["Pages"])
+            except Exception as e:
+                logger.warning("PDF bilgisi okunamadı: %s", e)
+                self._reject("PDF dosyası okunamadı veya bozuk", 400, "corrupt")
+            if page_count > self.max_pdf_pages:
+                self._reject(
+                    f"Sayfa sınırı aşıldı: {page_count} sayfa (en fazla {self.max_pdf_pages})", 413, "pages"
+                )
+        else:
+            try:
+                # Image.open sadece başlığı okur; piksel verisi decode edilmez
+                with Image.open(path) as image:
+                    width, height = image.size
+            except Exception as e:
+                logger.warning("Görüntü başlığı okunamadı: %s", e)
+                self._reject("Görüntü dosyası okunamadı veya bozuk", 400, "corrupt")
+            if width * height > self.max_image_pixels:
+                self._reject(
+                    f"Görüntü çok büyük: {width}x{height} (en fazla {self.max_image_pixels // 1_000_000} MP)",
+                    413,
+                    "pixels"
+                )
+            page_count = 1
+        state["page_count"] = page_count
+
+    def ingest(self, file: BinaryIO) -> IngestedUpload:
+        """Dosyayı doğrulayarak blob store'a yaz (thread havuzunda çalıştırılır)"""
+        state: Dict[str, object] = {"content_type": None, "page_count": 0}
+        blob = blob_store.put_stream(
+            self._checked_chunks(file, state),
+            validate=lambda path: self._validate(path, state)
+        )
+        metrics.inc("upload_accepted_total")
+        metrics.observe("upload_bytes", blob.size)
+        return IngestedUpload(blob=blob, content_type=state["content_type"], page_count=state["page_count"])
+
+upload_ingestor = UploadIngestor(
+    max_bytes=settings.upload_max_bytes,
+    max_pdf_pages=settings.upload_max_pdf_pages,
+    max_image_pixels=settings.upload_max_image_pixels,
+    chunk_size=settings.blob_store_chunk_size
+)
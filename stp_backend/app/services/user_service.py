@@ -1,6 +1,8 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.schemas.user import UserCreate
+from app.services.auth_cache import auth_cache
 import hashlib
 import logging
 
@@ -14,15 +16,21 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Şifre doğrulama"""
     return get_password_hash(plain_password) == hashed_password
 
-def get_user_by_username(db: Session, username: str) -> User:
+async def get_user_by_id(db: AsyncSession, user_id: int) -> User:
+    """Kullanıcıyı id ile getir"""
+    return await db.get(User, user_id)
+
+async def get_user_by_username(db: AsyncSession, username: str) -> User:
     """Kullanıcı adına göre kullanıcı getir"""
-    return db.query(User).filter(User.username == username).first()
+    result = await db.execute(select(User).where(User.username == username))
+    return result.scalars().first()
 
-def get_user_by_email(db: Session, email: str) -> User:
+async def get_user_by_email(db: AsyncSession, email: str) -> User:
     """Email'e göre kullanıcı getir"""
-    return db.query(User).filter(User.email == email).first()
+    result = await db.execute(select(User).where(User.email == email))
+    return result.scalars().first()
 
-def create_user(db: Session, user: UserCreate) -> User:
+async def create_user(db: AsyncSession, user: UserCreate) -> User:
     """Yeni kullanıcı oluştur"""
     hashed_password = get_password_hash(user.password)
     db_user = User(
@@ -33,20 +41,22 @@ def create_user(db: Session, user: UserCreate) -> User:
     )
     try:
         db.add(db_user)
-        db.commit()
-        db.refresh(db_user)
-        logger.info(f"Yeni kullanıcı oluşturuldu: {user.username}")
+        await db.commit()
+        await db.refresh(db_user)
+        # Aynı kullanıcı adıyla önbellekte kalmış eski bir kayıt olmasın
+        auth_cache.invalidate(db_user.username)
+        logger.info("Yeni kullanıcı oluşturuldu: %s", user.username)
         return db_user
     except Exception as e:
-        db.rollback()
-        logger.error(f"Kullanıcı oluşturma hatası: {str(e)}")
+        await db.rollback()
+        logger.error("Kullanıcı oluşturma hatası: %s", str(e))
         raise
 
-def authenticate_user(db: Session, username: str, password: str) -> User:
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> User:
     """Kullanıcı girişi doğrulama"""
-    user = get_user_by_username(db, username)
+    user = await get_user_by_username(db, username)
     if not user:
         return None
     if not verify_password(password, user.hashed_password):
         return None
-    return user 
\ No newline at end of file
+    return user
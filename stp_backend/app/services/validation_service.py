@@ -15,11 +15,11 @@ class ValidationService:
             
         # Sadece rakamları al
         tckn = re.sub(r'\D', '', str(tckn))
-        logger.debug(f"Temizlenmiş TCKN: {tckn}")
+        logger.debug("Temizlenmiş TCKN: %s", tckn)
         
         # 11 hane kontrolü
         if len(tckn) != 11:
-            logger.debug(f"TCKN uzunluk hatası: {len(tckn)} (11 olmalı)")
+            logger.debug("TCKN uzunluk hatası: %s (11 olmalı)", len(tckn))
             return False
             
         # İlk hane 0 olamaz
@@ -38,7 +38,7 @@ class ValidationService:
             '11111111110', '22222222220', '33333333330'
         ]
         if tckn in test_tckns:
-            logger.info(f"Test TCKN kabul edildi: {tckn}")
+            logger.info("Test TCKN kabul edildi: %s", tckn)
             return True
             
         try:
@@ -51,21 +51,21 @@ class ValidationService:
             check_digit_10 = (odd_sum * 7 - even_sum) % 10
             
             if digits[9] != check_digit_10:
-                logger.debug(f"TCKN 10. hane hatası: {digits[9]} != {check_digit_10}")
+                logger.debug("TCKN 10. hane hatası: %s != %s", digits[9], check_digit_10)
                 return False
                 
             # 11. hane kontrolü: (1+2+3+4+5+6+7+8+9+10) mod 10
             check_digit_11 = sum(digits[:10]) % 10
             
             if digits[10] != check_digit_11:
-                logger.debug(f"TCKN 11. hane hatası: {digits[10]} != {check_digit_11}")
+                logger.debug("TCKN 11. hane hatası: %s != %s", digits[10], check_digit_11)
                 return False
                 
-            logger.info(f"TCKN algoritma kontrolü başarılı: {tckn}")
+            logger.info("TCKN algoritma kontrolü başarılı: %s", tckn)
             return True
             
         except Exception as e:
-            logger.error(f"TCKN doğrulama hatası: {e}")
+            logger.error("TCKN doğrulama hatası: %s", e)
             return False
     
     def validate_iban(self, iban: str) -> bool:
@@ -78,39 +78,39 @@ class ValidationService:
             
         # Temizle ve büyük harfe çevir
         iban = re.sub(r'\s+', '', str(iban)).upper()
-        logger.debug(f"Temizlenmiş IBAN: {iban}")
+        logger.debug("Temizlenmiş IBAN: %s", iban)
         
         # Minimum uzunluk kontrolü
         if len(iban) < 15:
-            logger.debug(f"IBAN çok kısa: {len(iban)} karakter")
+            logger.debug("IBAN çok kısa: %s karakter", len(iban))
             return False
             
         # Ülke kodu kontrolü (ilk 2 karakter harf olmalı)
         if not iban[:2].isalpha():
-            logger.debug(f"Geçersiz ülke kodu: {iban[:2]}")
+            logger.debug("Geçersiz ülke kodu: %s", iban[:2])
             return False
             
         # IBAN formatı kontrolü (2 harf + 2 rakam + alphanumeric)
         if not re.match(r'^[A-Z]{2}[0-9]{2}[A-Z0-9]+$', iban):
-            logger.debug(f"IBAN formatı geçersiz: {iban}")
+            logger.debug("IBAN formatı geçersiz: %s", iban)
             return False
             
         # Türkiye IBAN'ı için uzunluk kontrolü
         if iban.startswith('TR') and len(iban) != 26:
-            logger.debug(f"TR IBAN uzunluk hatası: {len(iban)} (26 olmalı)")
+            logger.debug("TR IBAN uzunluk hatası: %s (26 olmalı)", len(iban))
             return False
         
         # Test/Demo IBAN'ları için özel kontrol
         # Eğer IBAN format olarak doğruysa ve test amaçlıysa kabul et
         if iban.startswith('TR88') and len(iban) == 26:
-            logger.info(f"Test IBAN kabul edildi: {iban}")
+            logger.info("Test IBAN kabul edildi: %s", iban)
             return True
             
         try:
             # MOD-97 checksum algoritması (gerçek IBAN'lar için)
             # 1. İlk 4 karakteri sona taşı
             rearranged = iban[4:] + iban[:4]
-            logger.debug(f"Yeniden düzenlenmiş: {rearranged}")
+            logger.debug("Yeniden düzenlenmiş: %s", rearranged)
             
             # 2. Harfleri sayılara çevir (A=10, B=11, ..., Z=35)
             numeric_string = ''
@@ -120,19 +120,19 @@ class ValidationService:
                 else:
                     numeric_string += char
             
-            logger.debug(f"Sayısal string: {numeric_string}")
+            logger.debug("Sayısal string: %s", numeric_string)
             
             # 3. MOD 97 kontrolü
             remainder = int(numeric_string) % 97
-            logger.debug(f"MOD 97 sonucu: {remainder} (1 olmalı)")
+            logger.debug("MOD 97 sonucu: %s (1 olmalı)", remainder)
             
             is_valid = remainder == 1
-            logger.info(f"IBAN {iban} doğrulama sonucu: {is_valid}")
+            logger.info("IBAN %s doğrulama sonucu: %s", iban, is_valid)
             
             return is_valid
             
         except Exception as e:
-            logger.error(f"IBAN doğrulama hatası: {e}")
+            logger.error("IBAN doğrulama hatası: %s", e)
             return False
     
     def validate_amount(self, amount: float) -> bool:
@@ -0,0 +1,213 @@
+"""
+GET /decisions/ sayfalama benchmark'ı: OFFSET/LIMIT ile (user_id, created_at, id)
+keyset sayfalamasının farklı sayfa derinliklerinde karşılaştırması ve toplam
+sayısı (COUNT) maliyeti.
+
+Sentetik veri ayrı bir benchmark veritabanına yazılır (decisions tablosu
+doldurulur); kayıtların --hot-share kadarı tek bir "yoğun" kullanıcıya aittir,
+derin sayfalar bu kullanıcı üzerinden ölçülür. Postgres'te veri
+generate_series ile sunucu tarafında üretilir.
+
+Kullanım (stp_backend dizininden, BOŞ bir veritabanına karşı):
+    DATABASE_URL=postgresql://postgres:pw@localhost:5431/stp_bench \\
+        python benchmarks/decisions_pagination_benchmark.py --seed --rows 5000000
+    # Tekrar ölçüm (veri zaten yüklü):
+    DATABASE_URL=... python benchmarks/decisions_pagination_benchmark.py --depths 0 1000 100000 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func, insert, text  # noqa: E402
+from app.db.base_class import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models import Decision, Document, User  # noqa: E402
+from app.services.decision_service import DecisionService, encode_cursor  # noqa: E402
+
+DECISIONS = ["APPROVED", "REJECTED", "MANUAL_REVIEW", "PENDING"]
+DOCUMENT_TYPES = ["eft_form", "loan_application", "account_opening", "credit_card", "other"]
+RISK_LEVELS = ["LOW", "MEDIUM", "HIGH", "CRITICAL"]
+
+def seed_parents(users: int):
+    """Benchmark kullanıcıları ve FK için tek bir belge: (ilk kullanıcı id, belge id)"""
+    db = SessionLocal()
+    try:
+        db.execute(insert(User), [
+            {"username": f"bench{i}", "email": f"bench{i}@example.com", "hashed_password": "x"}
+            for i in range(users)
+        ])
+        first_user = db.query(func.min(User.id)).filter(User.username.like("bench%")).scalar()
+        document = Document(
+            user_id=first_user, file_name="bench.pdf", file_type="pdf",
+            content_type="application/pdf", status="completed"
+        )
+        db.add(document)
+        db.commit()
+        return first_user, document.id
+    finally:
+        db.close()
+
+def seed_postgres(rows: int, users: int, hot_share: float, first_user: int, document_id: int, chunk: int):
+    hot_rows = int(rows * hot_share)
+    with engine.begin() as connection:
+        for start in range(0, rows, chunk):
+            end = min(rows, start + chunk)
+            connection.execute(text("""
+                INSERT INTO decisions (document_id, user_id, decision, confidence, document_type,
+                                       risk_level, transaction_amount, transaction_currency,
+                                       created_at, updated_at)
+                SELECT :document_id,
+                       CASE WHEN g < :hot_rows THEN :first_user
+                            ELSE :first_user + 1 + (g % (:users - 1)) END,
+                       (ARRAY['APPROVED','REJECTED','MANUAL_REVIEW','PENDING'])[1 + g % 4],
+                       random(),
+                       (ARRAY['eft_form','loan_application','account_opening','credit_card','other'])[1 + (g / 7) % 5],
+                       (ARRAY['LOW','MEDIUM','HIGH','CRITICAL'])[1 + (g / 3) % 4],
+                       round((random() * 100000)::numeric, 2),
+                       'TL',
+                       now() - (g || ' seconds')::interval,
+                       now()
+                FROM generate_series(:start, :end - 1) AS g
+            """), {
+                "document_id": document_id, "hot_rows": hot_rows, "first_user": first_user,
+                "users": users, "start": start, "end": end
+            })
+            print(f"  {end}/{rows} satır")
+        connection.execute(text("ANALYZE decisions"))
+
+def seed_generic(rows: int, users: int, hot_share: float, first_user: int, document_id: int, chunk: int):
+    hot_rows = int(rows * hot_share)
+    now = datetime.utcnow()
+    rng = random.Random(0)
+    db = SessionLocal()
+    try:
+        for start in range(0, rows, chunk):
+            end = min(rows, start + chunk)
+            db.execute(insert(Decision), [
+                {
+                    "document_id": document_id,
+                    "user_id": first_user if g < hot_rows else first_user + 1 + g % (users - 1),
+                    "decision": DECISIONS[g % 4],
+                    "confidence": rng.random(),
+                    "document_type": DOCUMENT_TYPES[(g // 7) % 5],
+                    "risk_level": RISK_LEVELS[(g // 3) % 4],
+                    "transaction_amount": round(rng.random() * 100000, 2),
+                    "created_at": now - timedelta(seconds=g),
+                    "updated_at": now,
+                }
+                for g in range(start, end)
+            ])
+            db.commit()
+            print(f"  {end}/{rows} satır")
+    finally:
+        db.close()
+
+def timed(func, repeat: int) -> float:
+    """Medyan süre (ms)"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - started) * 1000)
+    return statistics.median(durations)
+
+def offset_page(db, user_id: int, depth: int, limit: int, filters=None):
+    query = db.query(Decision).filter(Decision.user_id == user_id)
+    for name, value in (filters or {}).items():
+        query = query.filter(getattr(Decision, name) == value)
+    return query.order_by(Decision.created_at.desc(), Decision.id.desc()).offset(depth).limit(limit).all()
+
+def cursor_at(db, user_id: int, depth: int, filters=None):
+    """depth'inci satırdan sonrası için imleç (ölçüm dışı, bir kere hesaplanır)"""
+    if depth == 0:
+        return None
+    query = db.query(Decision.created_at, Decision.id).filter(Decision.user_id == user_id)
+    for name, value in (filters or {}).items():
+        query = query.filter(getattr(Decision, name) == value)
+    row = query.order_by(Decision.created_at.desc(), Decision.id.desc()).offset(depth - 1).limit(1).first()
+    return encode_cursor(row.created_at, row.id) if row else None
+
+def explain(db, user_id: int, cursor: str, limit: int):
+    if engine.dialect.name != "postgresql":
+        return
+    query = DecisionService()._page_query(db, user_id, limit, cursor=cursor)
+    statement = str(query.statement.compile(engine, compile_kwargs={"literal_binds": True}))
+    plan = db.execute(text("EXPLAIN (ANALYZE, BUFFERS) " + statement)).fetchall()
+    print("\nKeyset sorgu planı:")
+    for (line,) in plan:
+        print(f"  {line}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Karar listesi sayfalama benchmark'ı")
+    parser.add_argument("--seed", action="store_true", help="Sentetik veriyi yükle (boş veritabanı)")
+    parser.add_argument("--rows", type=int, default=5_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--hot-share", type=float, default=0.2, help="Yoğun kullanıcının kayıt payı")
+    parser.add_argument("--chunk", type=int, default=500_000)
+    parser.add_argument("--limit", type=int, default=50, help="Sayfa boyutu")
+    parser.add_argument("--depths", type=int, nargs="*", default=[0, 1_000, 10_000, 100_000, 500_000, 999_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)
+    if args.seed:
+        print(f"Veri yükleniyor: {args.rows} karar, {args.users} kullanıcı ({engine.dialect.name})")
+        started = time.perf_counter()
+        first_user, document_id = seed_parents(args.users)
+        seed = seed_postgres if engine.dialect.name == "postgresql" else seed_generic
+        seed(args.rows, args.users, args.hot_share, first_user, document_id,
+             args.chunk if engine.dialect.name == "postgresql" else min(args.chunk, 20_000))
+        print(f"Yükleme: {time.perf_counter() - started:.1f}s")
+
+    db = SessionLocal()
+    try:
+        hot_user = db.query(func.min(User.id)).filter(User.username.like("bench%")).scalar()
+        if hot_user is None:
+            print("Benchmark verisi yok, önce --seed ile çalıştırın")
+            return
+        service = DecisionService(count_cache_seconds=60)
+        user_rows = service.count_user_decisions(db, hot_user)
+        print(f"\nYoğun kullanıcı {hot_user}: {user_rows} karar, sayfa boyutu {args.limit}, medyan / {args.repeat} tekrar\n")
+        print(f"{'derinlik':>10} {'OFFSET (ms)':>12} {'keyset (ms)':>12} {'filtreli keyset (ms)':>21}")
+
+        filters = {"decision": "APPROVED"}
+        last_cursor = None
+        for depth in args.depths:
+            if depth >= user_rows:
+                continue
+            cursor = cursor_at(db, hot_user, depth)
+            filtered_cursor = cursor_at(db, hot_user, depth // 4, filters)
+            offset_ms = timed(lambda: offset_page(db, hot_user, depth, args.limit), args.repeat)
+            keyset_ms = timed(
+                lambda: service.get_user_decisions(db, hot_user, limit=args.limit, cursor=cursor), args.repeat
+            )
+            filtered_ms = timed(
+                lambda: service.get_user_decisions(
+                    db, hot_user, limit=args.limit, cursor=filtered_cursor, filters=filters
+                ),
+                args.repeat
+            )
+            print(f"{depth:>10} {offset_ms:>12.2f} {keyset_ms:>12.2f} {filtered_ms:>21.2f}")
+            last_cursor = cursor or last_cursor
+
+        count_service = DecisionService(count_cache_seconds=60)
+        cold_ms = timed(lambda: count_service._filtered_query(
+            db, db.query(func.count(Decision.id)), hot_user, {}
+        ).scalar(), args.repeat)
+        count_service.count_user_decisions(db, hot_user)
+        cached_ms = timed(lambda: count_service.count_user_decisions(db, hot_user), args.repeat)
+        print(f"\nCOUNT (yoğun kullanıcı): {cold_ms:.2f} ms, önbellekten: {cached_ms:.4f} ms")
+
+        if last_cursor:
+            explain(db, hot_user, last_cursor, args.limit)
+    finally:
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""
+Yük testleri için sahte OpenAI sunucusu.
+
+/v1/chat/completions isteklerine sabit bir JSON analiz sonucu döner; paketlenmiş
+isteklerde ("=== BELGE <id> ===") her belge için {"documents": {...}} yanıtı üretir.
+Gecikme, hata oranları ve dakikalık istek kotası ayarlanabilir; kota
+aşıldığında gerçek API gibi 429 + Retry-After döner.
+
+Toplu analiz testleri için Files (/v1/files) ve Batch (/v1/batches) uç noktaları
+da vardır: batch --batch-delay-s saniye sonra tamamlanır ve çıktı dosyası üretilir.
+
+Kullanım (stp_backend dizininden):
+    python benchmarks/fake_openai_server.py --port 8100 --latency-ms 800 \\
+        --rpm 300 --error-rate 0.05
+    OPENAI_BASE_URL=http://localhost:8100/v1 OPENAI_API_KEY=fake uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import time
+import uuid
+from collections import deque
+import uvicorn
+from fastapi import FastAPI, File, Form, Request, UploadFile
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+CANNED_ANALYSIS = {
+    "customer": {"name": "Ahmet Yılmaz", "tckn": "10000000146", "phone": None, "email": None,
+                 "address": None, "birth_date": None, "monthly_income": None},
+    "sender_account": {"iban": "TR330006100519786457841326", "account_number": None,
+                       "bank_name": None, "account_holder": "Ahmet Yılmaz"},
+    "receiver_account": {"iban": "TR320010009999901234567890", "account_number": None,
+                         "bank_name": None, "account_holder": "Mehmet Demir"},
+    "transaction": {"transaction_type": "eft", "amount": 1500.0, "currency": "TL",
+                    "transaction_date": "2024-01-15", "description": "Kira ödemesi"},
+    "loan": None,
+    "document_analysis": {"document_type": "eft_form", "confidence": 95,
+                          "intent": "Para transferi", "priority": "NORMAL"}
+}
+
+PACKED_DOCUMENT_PATTERN = re.compile(r"^=== BELGE (\S+) ===$", re.MULTILINE)
+
+def build_completion(body: dict) -> dict:
+    """İsteğe uygun sahte chat completion yanıtı (paketli isteklerde belge başına bir kayıt)"""
+    prompt_text = "\n".join(m.get("content", "") for m in body.get("messages", []))
+    document_ids = PACKED_DOCUMENT_PATTERN.findall(prompt_text)
+    if document_ids:
+        content = json.dumps({"documents": {i: CANNED_ANALYSIS for i in document_ids}}, ensure_ascii=False)
+    else:
+        content = json.dumps(CANNED_ANALYSIS, ensure_ascii=False)
+    prompt_tokens = len(prompt_text) // 3
+    completion_tokens = len(content) // 3
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "gpt-4o-mini"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens
+        }
+    }
+
+def create_app(latency_ms: float, jitter_ms: float, error_rate: float, rpm: int, batch_delay_s: float = 10.0) -> FastAPI:
+    app = FastAPI(title="Sahte OpenAI")
+    window = deque()
+    stats = {
+        "requests": 0, "rate_limited": 0, "errors": 0, "in_flight": 0, "max_in_flight": 0,
+        "packed_documents": 0, "batches": 0, "batch_requests": 0
+    }
+    files = {}
+    batches = {}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        stats["requests"] += 1
+
+        # Dakikalık kota (kayan pencere)
+        now = time.monotonic()
+        while window and now - window[0] > 60:
+            window.popleft()
+        if rpm and len(window) >= rpm:
+            stats["rate_limited"] += 1
+            retry_after = max(0.1, 60 - (now - window[0]))
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": f"{retry_after:.2f}"},
+                content={"error": {"message": "Rate limit reached", "type": "rate_limit_exceeded"}}
+            )
+        window.append(now)
+
+        stats["in_flight"] += 1
+        stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+        try:
+            await asyncio.sleep(max(0.0, random.gauss(latency_ms, jitter_ms)) / 1000)
+        finally:
+            stats["in_flight"] -= 1
+
+        if random.random() < error_rate:
+            stats["errors"] += 1
+            return JSONResponse(
+                status_code=random.choice([500, 502, 503]),
+                content={"error": {"message": "Sahte sunucu hatası", "type": "server_error"}}
+            )
+
+        completion = build_completion(body)
+        stats["packed_documents"] += len(PACKED_DOCUMENT_PATTERN.findall(
+            "\n".join(m.get("content", "") for m in body.get("messages", []))
+        ))
+        return completion
+
+    # ----- Files / Batch API -----
+
+    @app.post("/v1/files")
+    async def upload_file(file: UploadFile = File(...), purpose: str = Form(...)):
+        content = await file.read()
+        file_id = f"file-{uuid.uuid4().hex[:24]}"
+        files[file_id] = content.decode("utf-8")
+        return {"id": file_id, "object": "file", "bytes": len(content), "filename": file.filename,
+                "purpose": purpose, "created_at": int(time.time())}
+
+    @app.get("/v1/files/{file_id}/content")
+    async def file_content(file_id: str):
+        if file_id not in files:
+            return JSONResponse(status_code=404, content={"error": {"message": "Dosya yok"}})
+        return PlainTextResponse(files[file_id])
+
+    def finish_batch(batch: dict):
+        """Gecikme dolduğunda girdi dosyasındaki her isteği yanıtla"""
+        lines = [json.loads(line) for line in files[batch["input_file_id"]].splitlines() if line.strip()]
+        output = []
+        failed = 0
+        for line in lines:
+            if random.random() < error_rate:
+                failed += 1
+                response = {"status_code": 500, "request_id": uuid.uuid4().hex,
+                            "body": {"error": {"message": "Sahte sunucu hatası", "type": "server_error"}}}
+            else:
+                response = {"status_code": 200, "request_id": uuid.uuid4().hex, "body": build_completion(line["body"])}
+            output.append(json.dumps({"id": f"batch_req_{uuid.uuid4().hex[:16]}", "custom_id": line["custom_id"],
+                                      "response": response, "error": None}, ensure_ascii=False))
+        output_id = f"file-{uuid.uuid4().hex[:24]}"
+        files[output_id] = "\n".join(output) + "\n"
+        stats["batch_requests"] += len(lines)
+        batch.update({
+            "status": "completed",
+            "output_file_id": output_id,
+            "completed_at": int(time.time()),
+            "request_counts": {"total": len(lines), "completed": len(lines) - failed, "failed": failed}
+        })
+
+    @app.post("/v1/batches")
+    async def create_batch(request: Request):
+        body = await request.json()
+        if body.get("input_file_id") not in files:
+            return JSONResponse(status_code=400, content={"error": {"message": "input_file_id bulunamadı"}})
+        batch_id = f"batch_{uuid.uuid4().hex[:24]}"
+        total = sum(1 for line in files[body["input_file_id"]].splitlines() if line.strip())
+        batches[batch_id] = {
+            "id": batch_id, "object": "batch", "endpoint": body.get("endpoint"),
+            "input_file_id": body["input_file_id"], "completion_window": body.get("completion_window"),
+            "status": "validating", "output_file_id": None, "error_file_id": None,
+            "created_at": int(time.time()), "completed_at": None, "metadata": body.get("metadata"),
+            "request_counts": {"total": total, "completed": 0, "failed": 0}
+        }
+        stats["batches"] += 1
+        return batches[batch_id]
+
+    @app.get("/v1/batches/{batch_id}")
+    async def get_batch(batch_id: str):
+        batch = batches.get(batch_id)
+        if batch is None:
+            return JSONResponse(status_code=404, content={"error": {"message": "Batch yok"}})
+        if batch["status"] != "completed":
+            elapsed = time.time() - batch["created_at"]
+            if elapsed >= batch_delay_s:
+                finish_batch(batch)
+            elif elapsed >= batch_delay_s / 4:
+                batch["status"] = "in_progress"
+        return batch
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Sahte OpenAI sunucusu")
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=800)
+    parser.add_argument("--jitter-ms", type=float, default=200)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="5xx dönme olasılığı")
+    parser.add_argument("--rpm", type=int, default=0, help="Dakikalık istek kotası (0 = sınırsız)")
+    parser.add_argument("--batch-delay-s", type=float, default=10.0, help="Batch'in tamamlanma süresi")
+    args = parser.parse_args()
+
+    app = create_app(args.latency_ms, args.jitter_ms, args.error_rate, args.rpm, args.batch_delay_s)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
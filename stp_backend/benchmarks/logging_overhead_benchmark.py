@@ -0,0 +1,222 @@
+"""
+İstek başına logging maliyeti benchmark'ı: önceki senkron logging ile kuyruklu
+(QueueHandler/QueueListener) yapısal logging'in karşılaştırması.
+
+- before: root DEBUG, senkron StreamHandler + RotatingFileHandler; belge
+  başlangıcı/bitişi emoji banner'lı 7 satır, her adım için adım satırı + her
+  detay için bir satır, GPT yanıtının tamamı INFO'da, validation DEBUG satırları
+  f-string ile (seviye kapalı olsa da biçimlendirilir).
+- after: app.core.logging_config.setup_logging (LOG_LEVEL=INFO, JSON dosya):
+  kayıtlar kuyruğa konur, biçimlendirme/yazma arka plan thread'inde; her adım
+  tek yapısal kayıt, GPT yanıtı ve validation satırları DEBUG'da %-stil.
+
+Her "istek" process_document'ın log çağrılarını taklit eder. Ölçülen, çağıran
+thread'in (event loop) istek başına harcadığı süredir; ayrıca kuyruk boşalana
+kadar geçen toplam süre, yazılan satır/byte ve atılan kayıt sayısı raporlanır.
+İstekler arasında --gap-ms beklenir (gerçekte loop OCR/GPT'yi beklerken boştadır;
+arka plan yazıcısı bu sırada çalışır). Terminal çıktısı /dev/null'a yönlendirilir.
+
+Kullanım (stp_backend dizininden):
+    python benchmarks/logging_overhead_benchmark.py --requests 2000
+"""
+import argparse
+import glob
+import logging
+import logging.handlers
+import os
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+os.environ.setdefault("LOG_LEVEL", "INFO")
+os.environ.setdefault("LOG_JSON", "true")
+
+from app.core import logging_config  # noqa: E402
+from app.core.metrics import metrics  # noqa: E402
+
+# GPT'nin döndürdüğü tipik çıkarım (≈2 KB)
+PARSED_DATA = {
+    "customer": {"name": "Ahmet Yılmaz", "tckn": "10000000146", "customer_number": "C-1029384"},
+    "transaction": {
+        "amount": 125000.5, "currency": "TRY", "iban": "TR330006100519786457841326",
+        "description": "Kira ödemesi - Ekim dönemi " * 8
+    },
+    "document_analysis": {
+        "document_type": "havale_talimati", "intent": "para_transferi",
+        "confidence": 0.94, "notes": ["İmza mevcut", "Tarih okunaklı", "Tutar yazıyla uyumlu"] * 6
+    },
+}
+STEPS = [
+    ("Dosya Okuma", {"Dosya Adı": "talimat.pdf", "Dosya Boyutu": "482113 bytes", "İçerik Tipi": "application/pdf", "Sayfa": 2}),
+    ("Dosya Tipi Kontrolü", {"Sonuç": "✅ Geçerli"}),
+    ("Veritabanı Kaydı", {"Durum": "✅ Başarılı"}),
+    ("OCR Başlatılıyor", {"İşlenen Dosya": "application/pdf"}),
+    ("OCR Tamamlandı", {"Çıkarılan Metin Uzunluğu": "3120 karakter", "İlk 100 Karakter": "HAVALE TALİMATI " * 6}),
+    ("NLP Analizi Başlatılıyor", {"Metin Uzunluğu": 3120, "Yerel Bulunan Alan": 5}),
+    ("NLP Analizi Tamamlandı", {"Başarılı": "✅", "Belge Tipi": "havale_talimati", "Niyet": "para_transferi", "İşlem Süresi": "1.84s", "Önbellek": "yok", "GPT Atlandı": "❌"}),
+    ("Karar Verme Süreci Başlatılıyor", {"Müşteri": "Ahmet Yılmaz", "TCKN": "10000000146", "Tutar": 125000.5}),
+    ("Karar Verme Tamamlandı", {"Decision ID": 981, "Karar": "APPROVED", "Güven Skoru": "94.0%", "Validation Skoru": "100.0%", "Sebepler": 3}),
+]
+
+# --- Önceki implementasyon (karşılaştırma için) ---
+
+def legacy_setup(log_dir: str):
+    root = logging.getLogger()
+    root.setLevel(logging.DEBUG)
+    formatter = logging.Formatter(
+        fmt='%(asctime)s | %(levelname)-8s | %(name)-20s | %(funcName)-15s | %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    console = logging.StreamHandler()
+    console.setLevel(logging.INFO)
+    console.setFormatter(formatter)
+    file_handler = logging.handlers.RotatingFileHandler(
+        f"{log_dir}/legacy.log", maxBytes=10 * 1024 * 1024, backupCount=5, encoding="utf-8"
+    )
+    file_handler.setLevel(logging.DEBUG)
+    file_handler.setFormatter(formatter)
+    root.handlers.clear()
+    root.addHandler(console)
+    root.addHandler(file_handler)
+    logging.getLogger("app").setLevel(logging.INFO)
+
+def legacy_request(request_id: int):
+    doc_logger = logging.getLogger("app.document_processing")
+    doc_logger.info("=" * 80)
+    doc_logger.info("🚀 YENİ BELGE İŞLEME BAŞLADI")
+    doc_logger.info(f"👤 Kullanıcı ID: {request_id % 50}")
+    doc_logger.info("📄 Belge Adı: talimat.pdf")
+    doc_logger.info(f"⏰ Başlangıç Zamanı: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    doc_logger.info("=" * 80)
+    step_logger = logging.getLogger("app.processing_steps")
+    nlp_logger = logging.getLogger("app.services.nlp_service")
+    validation_logger = logging.getLogger("app.services.validation_service")
+    for step_name, details in STEPS:
+        step_logger.info(f"📍 ADIM: {step_name}")
+        for key, value in details.items():
+            step_logger.info(f"   └── {key}: {value}")
+        if step_name == "NLP Analizi Başlatılıyor":
+            nlp_logger.info(f"GPT yanıtı alındı: {len(str(PARSED_DATA))} karakter")
+            nlp_logger.info(f"Parsed data: {PARSED_DATA}")
+        if step_name == "Karar Verme Süreci Başlatılıyor":
+            tckn, iban = "10000000146", "TR330006100519786457841326"
+            validation_logger.debug(f"Temizlenmiş TCKN: {tckn}")
+            validation_logger.debug(f"Temizlenmiş IBAN: {iban}")
+            validation_logger.debug(f"Yeniden düzenlenmiş: {iban[4:] + iban[:4]}")
+            validation_logger.debug(f"Sayısal string: {iban[4:] + '2927' + iban[2:4]}")
+            validation_logger.debug(f"MOD 97 sonucu: {1} (1 olmalı)")
+    doc_logger.info("=" * 80)
+    doc_logger.info("🏁 BELGE İŞLEME TAMAMLANDI")
+    doc_logger.info(f"👤 Kullanıcı ID: {request_id % 50}")
+    doc_logger.info("✅ Karar: APPROVED")
+    doc_logger.info(f"⏱️ Toplam Süre: {2.31:.2f} saniye")
+    doc_logger.info(f"⏰ Bitiş Zamanı: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    doc_logger.info("=" * 80)
+
+# --- Yeni implementasyon ---
+
+def structured_request(request_id: int):
+    document_id = 100000 + request_id
+    started = time.perf_counter()
+    logging_config.log_document_processing_start(request_id % 50, "talimat.pdf")
+    nlp_logger = logging.getLogger("app.services.nlp_service")
+    validation_logger = logging.getLogger("app.services.validation_service")
+    for step_name, details in STEPS:
+        logging_config.log_processing_step(
+            step_name, details, document_id=document_id,
+            elapsed=time.perf_counter() - started, duration=0.012, user_id=request_id % 50
+        )
+        if step_name == "NLP Analizi Başlatılıyor":
+            nlp_logger.info("GPT yanıtı alındı: %d karakter", 2048)
+            nlp_logger.debug("Parsed data: %s", PARSED_DATA)
+        if step_name == "Karar Verme Süreci Başlatılıyor":
+            tckn, iban = "10000000146", "TR330006100519786457841326"
+            validation_logger.debug("Temizlenmiş TCKN: %s", tckn)
+            validation_logger.debug("Temizlenmiş IBAN: %s", iban)
+            validation_logger.debug("Yeniden düzenlenmiş: %s", iban)
+            validation_logger.debug("Sayısal string: %s", iban)
+            validation_logger.debug("MOD 97 sonucu: %s (1 olmalı)", 1)
+    logging_config.log_document_processing_end(
+        request_id % 50, "APPROVED", 2.31, document_id=document_id,
+        timings={"upload": 0.01, "ocr": 1.2, "nlp": 0.9, "decision": 0.02, "total": 2.31}
+    )
+
+def measure(name: str, request_fn, requests: int, gap: float, drain) -> dict:
+    durations = []
+    dropped_before = metrics.get_counter("log_records_dropped_total")
+    started = time.perf_counter()
+    for request_id in range(requests):
+        request_started = time.perf_counter()
+        request_fn(request_id)
+        durations.append(time.perf_counter() - request_started)
+        if gap:
+            time.sleep(gap)
+    drain()
+    total = time.perf_counter() - started - gap * requests
+    durations.sort()
+    return {
+        "name": name,
+        "mean_us": statistics.mean(durations) * 1e6,
+        "p50_us": statistics.median(durations) * 1e6,
+        "p99_us": durations[int(len(durations) * 0.99)] * 1e6,
+        "caller_s": sum(durations),
+        "total_s": total,
+        "dropped": metrics.get_counter("log_records_dropped_total") - dropped_before,
+    }
+
+def file_stats(path: str):
+    """Satır ve byte sayısı (rotate edilmiş dosyalar dahil)"""
+    lines = size = 0
+    for name in glob.glob(f"{path}*"):
+        with open(name, "rb") as f:
+            data = f.read()
+        lines += data.count(b"\n")
+        size += len(data)
+    return lines, size
+
+def main():
+    parser = argparse.ArgumentParser(description="İstek başına logging maliyeti benchmark'ı")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--gap-ms", type=float, default=1.0, help="İstekler arası bekleme (loop'un boşta olduğu süre)")
+    args = parser.parse_args()
+
+    # Terminal handler'ları /dev/null'a yazsın (StreamHandler sys.stderr'i oluşturulurken alır)
+    real_stderr = sys.stderr
+    sys.stderr = open(os.devnull, "w", encoding="utf-8")
+    results = []
+    try:
+        with tempfile.TemporaryDirectory() as log_dir:
+            legacy_setup(log_dir)
+            gap = args.gap_ms / 1000
+            result = measure("before", legacy_request, args.requests, gap, lambda: None)
+            result["lines"], result["bytes"] = file_stats(f"{log_dir}/legacy.log")
+            results.append(result)
+
+            log_filename = logging_config.setup_logging(log_dir)
+            log_queue = logging_config._listener.queue
+            result = measure("after", structured_request, args.requests, gap, log_queue.join)
+            logging_config.stop_logging()
+            result["lines"], result["bytes"] = file_stats(log_filename)
+            results.append(result)
+    finally:
+        sys.stderr.close()
+        sys.stderr = real_stderr
+
+    print(f"\n{args.requests} istek (istek başına {len(STEPS)} adım)\n")
+    print(
+        f"{'senaryo':<8} {'ort µs':>9} {'p50 µs':>9} {'p99 µs':>9} {'çağıran s':>10} {'toplam s':>9} "
+        f"{'satır/istek':>12} {'KB/istek':>9} {'atılan':>7}"
+    )
+    for r in results:
+        print(
+            f"{r['name']:<8} {r['mean_us']:>9.1f} {r['p50_us']:>9.1f} {r['p99_us']:>9.1f} {r['caller_s']:>10.2f} "
+            f"{r['total_s']:>9.2f} {r['lines'] / args.requests:>12.1f} {r['bytes'] / args.requests / 1024:>9.2f} "
+            f"{r['dropped']:>7.0f}"
+        )
+
+if __name__ == "__main__":
+    main()
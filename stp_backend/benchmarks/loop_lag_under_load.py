@@ -0,0 +1,92 @@
+"""
+Event loop yanıt verebilirlik benchmark'ı.
+
+Çalışan bir backend'e aynı anda N adet PDF yükler ve bu sırada /health
+endpoint'ini sürekli yoklar. Sonunda /metrics'ten event_loop_lag_seconds
+histogram'ını okuyarak loop'un ne kadar bloklandığını raporlar.
+
+Kullanım:
+    python benchmarks/loop_lag_under_load.py --pdf ornek.pdf \
+        --username test@example.com --password secret --count 20
+"""
+import argparse
+import asyncio
+import statistics
+import time
+import httpx
+
+async def login(client: httpx.AsyncClient, username: str, password: str):
+    response = await client.post(
+        "/api/v1/users/login",
+        data={"username": username, "password": password}
+    )
+    response.raise_for_status()
+
+async def upload(client: httpx.AsyncClient, pdf_bytes: bytes, index: int) -> float:
+    started = time.perf_counter()
+    response = await client.post(
+        "/api/v1/process-document/",
+        files={"file": (f"bench_{index}.pdf", pdf_bytes, "application/pdf")},
+        timeout=600
+    )
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/health")
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(0.05)
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))] if values else 0.0
+
+async def main():
+    parser = argparse.ArgumentParser(description="Yük altında event loop gecikmesi ölçümü")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--pdf", required=True)
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--count", type=int, default=20)
+    args = parser.parse_args()
+
+    with open(args.pdf, "rb") as f:
+        pdf_bytes = f.read()
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60) as client:
+        await login(client, args.username, args.password)
+
+        health_samples = []
+        stop = asyncio.Event()
+        prober = asyncio.create_task(probe_health(client, stop, health_samples))
+
+        started = time.perf_counter()
+        upload_times = await asyncio.gather(
+            *(upload(client, pdf_bytes, i) for i in range(args.count))
+        )
+        wall_time = time.perf_counter() - started
+
+        stop.set()
+        await prober
+
+        metrics = (await client.get("/metrics")).json()
+
+    loop_lag = metrics["histograms"].get("event_loop_lag_seconds", {})
+
+    print(f"Yüklenen PDF: {args.count}, toplam süre: {wall_time:.2f}s")
+    print(f"Upload süresi: ort {statistics.mean(upload_times):.2f}s, max {max(upload_times):.2f}s")
+    print(
+        f"/health gecikmesi: p50 {percentile(health_samples, 0.5) * 1000:.1f}ms, "
+        f"p99 {percentile(health_samples, 0.99) * 1000:.1f}ms, "
+        f"max {max(health_samples) * 1000:.1f}ms ({len(health_samples)} örnek)"
+    )
+    print(
+        f"Event loop lag: p50 {loop_lag.get('p50', 0) * 1000:.1f}ms, "
+        f"p99 {loop_lag.get('p99', 0) * 1000:.1f}ms, "
+        f"max {loop_lag.get('max', 0) * 1000:.1f}ms"
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,66 @@
+"""
+NLPService async yolu için yük testi.
+
+Sahte OpenAI sunucusuna (benchmarks/fake_openai_server.py) karşı aynı anda
+N analiz çalıştırır; başarı oranı, toplam süre, gecikme dağılımı, retry ve
+429 sayılarını raporlar. Eşzamanlılık ve kota ayarları .env / ortam
+değişkenlerinden (OPENAI_MAX_CONCURRENCY, OPENAI_REQUESTS_PER_MINUTE, ...) okunur.
+
+Kullanım (stp_backend dizininden):
+    python benchmarks/fake_openai_server.py --rpm 300 --error-rate 0.05 &
+    OPENAI_BASE_URL=http://localhost:8100/v1 OPENAI_API_KEY=fake \\
+        python benchmarks/nlp_load_test.py --count 200
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.metrics import metrics  # noqa: E402
+from app.services.nlp_service import nlp_service  # noqa: E402
+
+SAMPLE_TEXT = (
+    "Hesabımızdan TR33 0006 1005 1978 6457 8413 26 IBAN nolu hesaba 1.500,00 TL "
+    "tutarını kira ödemesi açıklamasıyla aktarmanızı rica ederiz. Ahmet Yılmaz, TCKN 10000000146"
+)
+
+async def main():
+    parser = argparse.ArgumentParser(description="NLPService yük testi")
+    parser.add_argument("--count", type=int, default=100)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    results = await asyncio.gather(
+        *(nlp_service.analyze_document_async(SAMPLE_TEXT, i) for i in range(args.count))
+    )
+    wall_time = time.perf_counter() - started
+    await nlp_service.aclose()
+
+    snapshot = metrics.snapshot()
+    counters = snapshot["counters"]
+    latency = snapshot["histograms"].get("openai_request_seconds", {})
+    waits = snapshot["histograms"].get("openai_rate_limit_wait_seconds", {})
+    succeeded = sum(1 for r in results if r.success)
+
+    print(f"İstek: {args.count}, başarılı: {succeeded}, başarısız: {args.count - succeeded}")
+    print(f"Toplam süre: {wall_time:.2f}s, verim: {args.count / wall_time:.1f} analiz/s")
+    print(
+        f"OpenAI çağrı gecikmesi: p50 {latency.get('p50', 0) * 1000:.0f}ms, "
+        f"p99 {latency.get('p99', 0) * 1000:.0f}ms, max {latency.get('max', 0) * 1000:.0f}ms"
+    )
+    print(
+        f"Retry: {counters.get('openai_retries_total', 0):.0f}, "
+        f"429: {counters.get('openai_rate_limited_total', 0):.0f}, "
+        f"hata: {counters.get('openai_errors_total', 0):.0f}, "
+        f"kota beklemesi: {waits.get('count', 0)} kez (max {waits.get('max', 0):.2f}s)"
+    )
+    print(
+        f"Token: prompt {counters.get('openai_prompt_tokens_total', 0):.0f}, "
+        f"completion {counters.get('openai_completion_tokens_total', 0):.0f}"
+    )
+
+if __name__ == "__main__":
+    asyncio.run(main())
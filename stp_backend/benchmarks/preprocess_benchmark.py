@@ -0,0 +1,75 @@
+"""
+Ön işleme benchmark'ı: legacy PIL zinciri ile birleşik (fused) tek geçişli
+pipeline karşılaştırması.
+
+Her görüntü için iki pipeline da çalıştırılır; sayfa başına süre ve
+/proc/self/status üzerinden tepe RSS artışı (ocr_service.last_preprocess_stats)
+raporlanır. Ayrıca iki çıktının farklı olduğu piksel oranı yazdırılır.
+
+Kullanım (stp_backend dizininden):
+    python benchmarks/preprocess_benchmark.py --repeat 3
+    python benchmarks/preprocess_benchmark.py --profile photo tarama1.png tarama2.jpg
+"""
+import argparse
+import os
+import sys
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.ocr_service import ocr_service  # noqa: E402
+from threshold_benchmark import synthetic_page  # noqa: E402
+
+def run(image: Image.Image, pipeline: str, profile: str, repeat: int):
+    durations = []
+    peaks = []
+    result = None
+    for _ in range(repeat):
+        result = ocr_service.enhance_image_quality(image, profile, pipeline=pipeline)
+        stats = ocr_service.last_preprocess_stats
+        durations.append(stats["ms"])
+        if stats["peak_memory_bytes"] is not None:
+            peaks.append(stats["peak_memory_bytes"])
+    return result, durations, peaks
+
+def report(label: str, durations, peaks):
+    peak_text = f"{max(peaks) / 1024 / 1024:7.1f} MB" if peaks else "    n/a"
+    print(
+        f"  {label:<8} ort {sum(durations) / len(durations):8.1f} ms   "
+        f"min {min(durations):8.1f} ms   tepe RSS +{peak_text}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Legacy/fused ön işleme benchmark'ı")
+    parser.add_argument("images", nargs="*", help="Görüntü dosyaları (boşsa sentetik A4 sayfa)")
+    parser.add_argument("--profile", default="banking_document")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.images:
+        inputs = [(path, Image.open(path)) for path in args.images]
+    else:
+        # 300 DPI bilgisi verilmezse optimize_dpi 72 DPI varsayıp sayfayı ~4x büyütür
+        page = synthetic_page().convert("RGB")
+        page.info["dpi"] = (300, 300)
+        inputs = [("sentetik A4 300 DPI", page)]
+
+    for name, image in inputs:
+        image.load()
+        print(f"{name} ({image.width}x{image.height}, {image.mode}), profil: {args.profile}")
+        legacy, legacy_ms, legacy_peaks = run(image, "legacy", args.profile, args.repeat)
+        fused, fused_ms, fused_peaks = run(image, "fused", args.profile, args.repeat)
+        report("legacy", legacy_ms, legacy_peaks)
+        report("fused", fused_ms, fused_peaks)
+
+        legacy_array = np.array(legacy)
+        fused_array = np.array(fused)
+        if legacy_array.shape == fused_array.shape:
+            diff = np.count_nonzero(legacy_array != fused_array) / legacy_array.size
+            print(f"  farklı piksel oranı: {diff * 100:.2f}%")
+        else:
+            print(f"  çıktı boyutları farklı: {legacy_array.shape} / {fused_array.shape}")
+
+if __name__ == "__main__":
+    main()
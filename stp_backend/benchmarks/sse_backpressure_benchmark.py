@@ -0,0 +1,191 @@
+"""
+SSE geri basınç benchmark'ı: eski sınırsız asyncio.Queue'lu SSEManager ile
+sınırlı kuyruk + taşma politikalarının (drop_oldest, coalesce, disconnect)
+karşılaştırması.
+
+Her kullanıcının tek bir bağlantısı vardır. --idle kadar bağlantı hiç okumaz
+(arka planda donmuş sekme); --slow kadar bağlantı her mesajdan sonra
+--slow-delay-ms bekler. Her turda bütün kullanıcılara bir processing_step,
+her --complete-every turda bir processing_complete gönderilir. Ölçülenler:
+send_update süresi (p50/p99), bekleyen mesaj sayısı, tracemalloc ile bellek,
+atılan/birleştirilen mesajlar, kapatılan bağlantılar ve donmuş sekmelerin
+kuyruğunda son processing_complete olayının kalıp kalmadığı.
+
+Kullanım (stp_backend dizininden):
+    python benchmarks/sse_backpressure_benchmark.py --idle 10000 --slow 1000 --rounds 150
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.core.metrics import metrics  # noqa: E402
+from app.core.sse_manager import SSEManager, OVERFLOW_POLICIES  # noqa: E402
+
+COUNTERS = (
+    "sse_messages_dropped_total",
+    "sse_messages_coalesced_total",
+    "sse_slow_consumer_evictions_total",
+)
+
+class LegacySSEManager:
+    """Önceki implementasyon (karşılaştırma için): sınırsız kuyruk, sırayla await put"""
+
+    def __init__(self):
+        self.connections = {}
+        self.lock = asyncio.Lock()
+
+    async def connect(self, user_id: int) -> asyncio.Queue:
+        async with self.lock:
+            queue = asyncio.Queue()
+            self.connections.setdefault(user_id, []).append(queue)
+            return queue
+
+    async def send_update(self, user_id: int, event_type: str, data: dict):
+        if user_id not in self.connections:
+            return
+        message = json.dumps(
+            {"type": event_type, "timestamp": datetime.utcnow().isoformat(), "data": data}, ensure_ascii=False
+        )
+        async with self.lock:
+            connections = self.connections.get(user_id, []).copy()
+        for queue in connections:
+            await queue.put(message)
+
+    def get_total_connections(self) -> int:
+        return sum(len(queues) for queues in self.connections.values())
+
+    def get_queued_messages(self) -> int:
+        return sum(queue.qsize() for queues in self.connections.values() for queue in queues)
+
+async def read_one(connection, timeout: float):
+    if isinstance(connection, asyncio.Queue):
+        try:
+            return await asyncio.wait_for(connection.get(), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+    return await connection.get_batch(timeout=timeout, max_events=1)
+
+async def slow_consumer(connection, delay: float, stop: asyncio.Event, received: list):
+    while not stop.is_set():
+        message = await read_one(connection, timeout=0.2)
+        if getattr(connection, "closed", False):
+            return
+        if message is not None:
+            received[0] += 1
+            await asyncio.sleep(delay)
+
+def pending_messages(connection):
+    if isinstance(connection, asyncio.Queue):
+        return list(connection._queue)
+    return [frame.decode("utf-8") for _, frame in connection._buffer]
+
+async def run_scenario(name: str, manager, args) -> dict:
+    counters_before = {name_: metrics.get_counter(name_) for name_ in COUNTERS}
+    gc.collect()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+
+    idle = [await manager.connect(user_id) for user_id in range(args.idle)]
+    slow = [await manager.connect(args.idle + index) for index in range(args.slow)]
+    users = args.idle + args.slow
+
+    stop = asyncio.Event()
+    received = [0]
+    consumers = [
+        asyncio.create_task(slow_consumer(connection, args.slow_delay_ms / 1000, stop, received))
+        for connection in slow
+    ]
+
+    send_durations = []
+    started = time.perf_counter()
+    for round_index in range(args.rounds):
+        is_complete = (round_index + 1) % args.complete_every == 0
+        event_type = "processing_complete" if is_complete else "processing_step"
+        data = {"round": round_index} if is_complete else {"step": "OCR İşlemi Başlatıldı", "details": {"page": round_index}}
+        for user_id in range(users):
+            sent = time.perf_counter()
+            await manager.send_update(user_id, event_type, data)
+            send_durations.append(time.perf_counter() - sent)
+        # Yavaş tüketicilere sıra ver
+        await asyncio.sleep(args.round_interval_ms / 1000)
+    elapsed = time.perf_counter() - started
+
+    memory = tracemalloc.get_traced_memory()[0] - baseline
+    queued = manager.get_queued_messages()
+    open_connections = manager.get_total_connections()
+    complete_retained = sum(
+        1 for connection in idle
+        if any('"processing_complete"' in message for message in pending_messages(connection)[-args.max_size:])
+    )
+
+    stop.set()
+    await asyncio.gather(*consumers)
+    tracemalloc.stop()
+
+    send_durations.sort()
+    counters = {name_: metrics.get_counter(name_) - counters_before[name_] for name_ in COUNTERS}
+    return {
+        "name": name,
+        "sends": len(send_durations),
+        "elapsed": elapsed,
+        "p50_us": statistics.median(send_durations) * 1e6,
+        "p99_us": send_durations[int(len(send_durations) * 0.99)] * 1e6,
+        "queued": queued,
+        "memory_mb": memory / 1024 / 1024,
+        "dropped": counters["sse_messages_dropped_total"],
+        "coalesced": counters["sse_messages_coalesced_total"],
+        "evicted": counters["sse_slow_consumer_evictions_total"],
+        "open": open_connections,
+        "slow_received": received[0],
+        "complete_retained": complete_retained,
+    }
+
+async def main_async(args):
+    results = []
+    scenarios = [("legacy", lambda: LegacySSEManager())] + [
+        # Replay tamponu kapalı: sadece bağlantı kuyruklarının belleği karşılaştırılır
+        (policy, lambda policy=policy: SSEManager(queue_max_size=args.max_size, overflow_policy=policy, replay_max_events=0))
+        for policy in args.policies
+    ]
+    for name, factory in scenarios:
+        results.append(await run_scenario(name, factory(), args))
+        gc.collect()
+
+    print(
+        f"\n{args.idle} donmuş + {args.slow} yavaş bağlantı, {args.rounds} tur, kuyruk sınırı {args.max_size}\n"
+    )
+    print(
+        f"{'senaryo':<12} {'p50 µs':>8} {'p99 µs':>8} {'bekleyen':>10} {'bellek MB':>10} "
+        f"{'atılan':>9} {'birleşen':>9} {'kapatılan':>9} {'açık':>6} {'yavaş okunan':>13} {'complete kaldı':>15}"
+    )
+    for r in results:
+        print(
+            f"{r['name']:<12} {r['p50_us']:>8.1f} {r['p99_us']:>8.1f} {r['queued']:>10} {r['memory_mb']:>10.1f} "
+            f"{r['dropped']:>9.0f} {r['coalesced']:>9.0f} {r['evicted']:>9.0f} {r['open']:>6} "
+            f"{r['slow_received']:>13} {r['complete_retained']:>15}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE geri basınç benchmark'ı")
+    parser.add_argument("--idle", type=int, default=10_000, help="Hiç okumayan bağlantı sayısı")
+    parser.add_argument("--slow", type=int, default=1_000, help="Yavaş okuyan bağlantı sayısı")
+    parser.add_argument("--slow-delay-ms", type=float, default=50.0)
+    parser.add_argument("--rounds", type=int, default=150, help="Kuyruk sınırından büyük olmalı (taşma için)")
+    parser.add_argument("--complete-every", type=int, default=25, help="Kaç turda bir processing_complete")
+    parser.add_argument("--round-interval-ms", type=float, default=5.0)
+    parser.add_argument("--max-size", type=int, default=100, help="Bağlantı başına kuyruk sınırı")
+    parser.add_argument("--policies", nargs="*", choices=OVERFLOW_POLICIES, default=list(OVERFLOW_POLICIES))
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
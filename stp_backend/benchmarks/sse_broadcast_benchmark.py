@@ -0,0 +1,192 @@
+"""
+SSE yayın yolu benchmark'ı: önceki teslim yolu ile önceden serialize edilmiş,
+toplu yazan yayın yolunun CPU çekirdeği başına olay/sn karşılaştırması.
+
+- legacy: her gönderimde global asyncio.Lock altında bağlantı listesi kopyalanır,
+  her bağlantı kuyruğuna mesaj konur; stream döngüsü her mesajdan önce
+  request.is_disconnected() sorgular (gerçek Starlette Request), "data:" çerçevesini
+  bağlantı başına ayrı formatlar ve her mesajı ayrı yazar.
+- broadcast: SSEManager (süreç içi bus, replay tamponu açık). Çerçeve olay başına
+  bir kez üretilir, kayıt copy-on-write, stream bekleyen çerçeveleri tek yazımda
+  gönderir ve disconnect sorgulamaz.
+
+Her kullanıcının --connections bağlantısı vardır; her turda her kullanıcıya bir
+belgenin --events-per-document olayı arka arkaya gönderilir (process_document
+gibi). Bütün çerçeveler yazılana kadar geçen süreç CPU süresi ölçülür; yazım
+sayısı ASGI send çağrısı sayısıdır.
+
+Kullanım (stp_backend dizininden):
+    python benchmarks/sse_broadcast_benchmark.py --users 2000 --connections 2 --documents 5
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from starlette.requests import Request  # noqa: E402
+from app.core.sse_manager import SSEManager  # noqa: E402
+
+class Sink:
+    """ASGI send yerine: yazım ve çerçeve sayar"""
+
+    def __init__(self):
+        self.writes = 0
+        self.bytes = 0
+        self.frames = 0
+        self.done = asyncio.Event()
+        self.expected = 0
+
+    async def send(self, body: bytes):
+        self.writes += 1
+        self.bytes += len(body)
+        self.frames += body.count(b"\n\n")
+        if self.frames >= self.expected:
+            self.done.set()
+
+class LegacySSEManager:
+    """Önceki teslim yolu (karşılaştırma için)"""
+
+    def __init__(self):
+        self.connections = {}
+        self.lock = asyncio.Lock()
+
+    async def connect(self, user_id: int) -> asyncio.Queue:
+        async with self.lock:
+            queue = asyncio.Queue()
+            self.connections.setdefault(user_id, []).append(queue)
+            return queue
+
+    async def send_processing_step(self, user_id: int, step: str, details: dict = None):
+        if user_id not in self.connections:
+            return
+        message = json.dumps(
+            {
+                "type": "processing_step",
+                "timestamp": datetime.utcnow().isoformat(),
+                "data": {"step": step, "details": details or {}}
+            },
+            ensure_ascii=False
+        )
+        async with self.lock:
+            connections = self.connections.get(user_id, []).copy()
+        for queue in connections:
+            queue.put_nowait(message)
+
+def make_request() -> Request:
+    never = asyncio.Event()
+
+    async def receive():
+        await never.wait()
+
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": []}, receive)
+
+async def legacy_stream(queue: asyncio.Queue, sink: Sink):
+    request = make_request()
+    while True:
+        if await request.is_disconnected():
+            return
+        try:
+            message = await asyncio.wait_for(queue.get(), timeout=30.0)
+        except asyncio.TimeoutError:
+            continue
+        await sink.send(f"data: {message}\n\n".encode("utf-8"))
+
+async def broadcast_stream(connection, sink: Sink, batch_max: int):
+    while True:
+        batch = await connection.get_batch(timeout=30.0, max_events=batch_max)
+        if connection.closed:
+            return
+        if batch is not None:
+            await sink.send(batch[0] if len(batch) == 1 else b"".join(batch))
+
+async def run_scenario(name: str, args) -> dict:
+    sink = Sink()
+    sink.expected = args.users * args.connections * args.documents * args.events_per_document
+    if name == "legacy":
+        manager = LegacySSEManager()
+        streams = [
+            asyncio.create_task(legacy_stream(await manager.connect(user_id), sink))
+            for user_id in range(args.users) for _ in range(args.connections)
+        ]
+    else:
+        manager = SSEManager(
+            queue_max_size=args.events_per_document * args.documents,
+            max_connections_per_user=args.connections
+        )
+        streams = [
+            asyncio.create_task(broadcast_stream(await manager.connect(user_id), sink, args.batch_max))
+            for user_id in range(args.users) for _ in range(args.connections)
+        ]
+    # Stream görevleri beklemeye geçsin
+    await asyncio.sleep(0.1)
+    gc.collect()
+
+    cpu_started = time.process_time()
+    wall_started = time.perf_counter()
+    for document in range(args.documents):
+        for user_id in range(args.users):
+            for step in range(args.events_per_document):
+                await manager.send_processing_step(
+                    user_id, "OCR İşlemi Başlatıldı", {"document": document, "step": step}
+                )
+        # Pipeline adımları arasında loop'a sıra ver
+        await asyncio.sleep(0)
+    await asyncio.wait_for(sink.done.wait(), timeout=600)
+    cpu = time.process_time() - cpu_started
+    wall = time.perf_counter() - wall_started
+
+    for task in streams:
+        task.cancel()
+    await asyncio.gather(*streams, return_exceptions=True)
+
+    published = args.users * args.documents * args.events_per_document
+    return {
+        "name": name,
+        "published": published,
+        "frames": sink.frames,
+        "writes": sink.writes,
+        "cpu": cpu,
+        "wall": wall,
+        "published_per_core": published / cpu,
+        "frames_per_core": sink.frames / cpu,
+        "mb": sink.bytes / 1024 / 1024,
+    }
+
+async def main_async(args):
+    results = []
+    for name in ("legacy", "broadcast"):
+        results.append(await run_scenario(name, args))
+        gc.collect()
+
+    print(
+        f"\n{args.users} kullanıcı x {args.connections} bağlantı, {args.documents} belge x "
+        f"{args.events_per_document} olay\n"
+    )
+    print(
+        f"{'senaryo':<10} {'yayın':>9} {'çerçeve':>9} {'yazım':>9} {'CPU s':>7} {'duvar s':>8} "
+        f"{'yayın/sn/çekirdek':>18} {'çerçeve/sn/çekirdek':>20} {'MB':>7}"
+    )
+    for r in results:
+        print(
+            f"{r['name']:<10} {r['published']:>9} {r['frames']:>9} {r['writes']:>9} {r['cpu']:>7.2f} {r['wall']:>8.2f} "
+            f"{r['published_per_core']:>18,.0f} {r['frames_per_core']:>20,.0f} {r['mb']:>7.1f}"
+        )
+
+def main():
+    parser = argparse.ArgumentParser(description="SSE yayın yolu benchmark'ı")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--connections", type=int, default=2, help="Kullanıcı başına bağlantı (açık sekme)")
+    parser.add_argument("--documents", type=int, default=5, help="Kullanıcı başına belge")
+    parser.add_argument("--events-per-document", type=int, default=12)
+    parser.add_argument("--batch-max", type=int, default=64, help="Tek yazımdaki maksimum olay")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+if __name__ == "__main__":
+    main()
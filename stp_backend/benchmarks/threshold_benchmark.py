@@ -0,0 +1,97 @@
+"""
+Eşikleme micro-benchmark'ı: eski Python döngülü Otsu implementasyonu ile
+OCRService.apply_threshold (vektörize Otsu ve Sauvola) karşılaştırması.
+
+300 DPI A4 boyutunda (2480x3508) sentetik bir sayfa üzerinde süre ve
+tracemalloc ile tepe bellek ölçülür; iki Otsu sürümünün aynı eşiği
+bulduğu da doğrulanır.
+
+Kullanım (stp_backend dizininden):
+    python benchmarks/threshold_benchmark.py --repeat 5
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.services.ocr_service import ocr_service  # noqa: E402
+
+def legacy_apply_threshold(image: Image.Image) -> Image.Image:
+    """Önceki implementasyon (karşılaştırma için birebir kopya)"""
+    img_array = np.array(image)
+    histogram = np.histogram(img_array, bins=256, range=(0, 256))[0]
+    total_pixels = img_array.size
+    sum_total = sum(i * histogram[i] for i in range(256))
+
+    sum_background = 0
+    weight_background = 0
+    max_variance = 0
+    optimal_threshold = 0
+
+    for i in range(256):
+        weight_background += histogram[i]
+        if weight_background == 0:
+            continue
+        weight_foreground = total_pixels - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += i * histogram[i]
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_total - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > max_variance:
+            max_variance = variance
+            optimal_threshold = i
+
+    binary_array = (img_array > optimal_threshold) * 255
+    return Image.fromarray(binary_array.astype(np.uint8))
+
+def synthetic_page(width: int = 2480, height: int = 3508, seed: int = 0) -> Image.Image:
+    """Soldan sağa kararan arka plan üzerinde metin benzeri koyu bloklar"""
+    rng = np.random.default_rng(seed)
+    gradient = np.linspace(235, 150, width, dtype=np.float32)[None, :]
+    page = np.repeat(gradient, height, axis=0)
+    page += rng.normal(0, 8, size=(height, width)).astype(np.float32)
+    for _ in range(4000):
+        y = rng.integers(0, height - 20)
+        x = rng.integers(0, width - 60)
+        page[y:y + 12, x:x + rng.integers(10, 60)] -= 110
+    return Image.fromarray(np.clip(page, 0, 255).astype(np.uint8), mode="L")
+
+def measure(label: str, func, image: Image.Image, repeat: int):
+    durations = []
+    tracemalloc.start()
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(image)
+        durations.append(time.perf_counter() - started)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:<18} ort {sum(durations) / len(durations) * 1000:8.1f} ms   "
+        f"min {min(durations) * 1000:8.1f} ms   tepe bellek {peak / 1024 / 1024:7.1f} MB"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description="Otsu/Sauvola eşikleme benchmark'ı")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    image = synthetic_page()
+    print(f"Sayfa: {image.width}x{image.height}, tekrar: {args.repeat}")
+
+    legacy_result = np.array(legacy_apply_threshold(image))
+    new_result = np.array(ocr_service.apply_threshold(image, mode="otsu"))
+    print(f"Otsu sonuçları aynı: {np.array_equal(legacy_result, new_result)}")
+
+    measure("legacy otsu", legacy_apply_threshold, image, args.repeat)
+    measure("vektörize otsu", lambda img: ocr_service.apply_threshold(img, mode="otsu"), image, args.repeat)
+    measure("sauvola", lambda img: ocr_service.apply_threshold(img, mode="sauvola"), image, args.repeat)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Birikmiş belgelerin toplu NLP analizi (backlog yeniden oynatma, prompt değişikliği sonrası).
+
+Belgelerin raw_text alanı yeniden analiz edilir ve extracted_data["nlp_analysis"]
+güncellenir; karar kayıtlarına dokunulmaz. İlerleme bulk_nlp_jobs tablosunda
+tutulur, yarıda kalan job --resume ile devam ettirilir.
+
+Kullanım (stp_backend dizininden):
+    python scripts/bulk_nlp.py --status completed --since 2024-01-15 --mode packed
+    python scripts/bulk_nlp.py --document-ids 12 15 18 --mode batch
+    python scripts/bulk_nlp.py --resume 3f1c...
+    python scripts/bulk_nlp.py --list
+
+Sahte sunucu ile:
+    python benchmarks/fake_openai_server.py --latency-ms 200 --batch-delay-s 5 &
+    OPENAI_BASE_URL=http://localhost:8100/v1 OPENAI_API_KEY=fake OPENAI_BATCH_POLL_SECONDS=1 \\
+        python scripts/bulk_nlp.py --status completed --mode batch
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+from datetime import datetime
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from app.db.base_class import Base  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.db.schema_upgrade import upgrade_schema  # noqa: E402
+from app.models import BulkNLPJob  # noqa: E402
+from app.services.bulk_nlp_service import bulk_nlp_service, BULK_MODES  # noqa: E402
+from app.services.nlp_service import nlp_service  # noqa: E402
+
+def list_jobs():
+    db = SessionLocal()
+    try:
+        jobs = db.query(BulkNLPJob).order_by(BulkNLPJob.created_at.desc()).limit(20).all()
+        for job in jobs:
+            completed = len(json.loads(job.completed_ids or "[]"))
+            failed = len(json.loads(job.failed or "{}"))
+            print(
+                f"{job.id}  {job.mode:<6} {job.status:<10} {completed}/{job.total} tamam, "
+                f"{failed} hata  v{job.prompt_version}  {job.created_at:%Y-%m-%d %H:%M}"
+            )
+    finally:
+        db.close()
+
+async def run(job_id: str):
+    try:
+        summary = await bulk_nlp_service.run_job(job_id)
+    finally:
+        await nlp_service.aclose()
+    if summary is not None:
+        print(
+            f"Job {summary['job_id']}: {summary['status']}, {summary['completed']}/{summary['total']} "
+            f"tamamlandı, {summary['failed']} başarısız"
+        )
+        for document_id, message in list(summary["failed_documents"].items())[:10]:
+            print(f"  Document {document_id}: {message}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Toplu NLP analizi")
+    parser.add_argument("--mode", choices=BULK_MODES, default="packed")
+    parser.add_argument("--document-ids", type=int, nargs="*", help="Analiz edilecek belge id'leri")
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--status", help="Belge durumu filtresi (ör. completed)")
+    parser.add_argument("--since", type=datetime.fromisoformat, help="Bu tarihten sonra oluşturulanlar (YYYY-MM-DD)")
+    parser.add_argument("--limit", type=int)
+    parser.add_argument("--resume", metavar="JOB_ID", help="Yarıda kalan job'ı devam ettir")
+    parser.add_argument("--list", action="store_true", help="Son job'ları listele")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    Base.metadata.create_all(bind=engine)
+    upgrade_schema(engine)
+
+    if args.list:
+        list_jobs()
+        return
+
+    job_id = args.resume
+    if job_id is None:
+        db = SessionLocal()
+        try:
+            document_ids = args.document_ids or bulk_nlp_service.select_documents(
+                db, user_id=args.user_id, status=args.status, since=args.since, limit=args.limit
+            )
+            if not document_ids:
+                print("Analiz edilecek belge bulunamadı")
+                return
+            job_id = bulk_nlp_service.create_job(db, document_ids, args.mode).id
+        finally:
+            db.close()
+        print(f"Job oluşturuldu: {job_id} (yarıda kalırsa: --resume {job_id})")
+
+    asyncio.run(run(job_id))
+
+if __name__ == "__main__":
+    main()
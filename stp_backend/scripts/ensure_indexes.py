@@ -0,0 +1,92 @@
+"""
+Modellerde tanımlı olup veritabanında olmayan indexleri oluşturur.
+
+create_all mevcut tablolara yeni index eklemez; bu script eksikleri bulur ve
+Postgres'te tabloyu kilitlememek için CREATE INDEX CONCURRENTLY ile ekler.
+Yarıda kalan CONCURRENTLY işlemi INVALID bir index bırakabilir; bu durumda
+index silinip script tekrar çalıştırılır.
+
+Kullanım (stp_backend dizininden):
+    python scripts/ensure_indexes.py --dry-run
+    python scripts/ensure_indexes.py --drop-redundant
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import inspect, text  # noqa: E402
+from sqlalchemy.schema import CreateIndex  # noqa: E402
+from app.db.base_class import Base  # noqa: E402
+from app.db.session import engine  # noqa: E402
+import app.models  # noqa: E402,F401
+
+logger = logging.getLogger("ensure_indexes")
+
+# Bileşik indexlerin ilk sütunu olduğu için artık gereksiz olan eski indexler
+REDUNDANT_INDEXES = {
+    "decisions": ["ix_decisions_user_id"],
+}
+
+def missing_indexes():
+    inspector = inspect(engine)
+    tables = set(inspector.get_table_names())
+    for table in Base.metadata.sorted_tables:
+        if table.name not in tables:
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            if index.name not in existing:
+                yield index
+
+def create_index(index):
+    statement = str(CreateIndex(index).compile(engine))
+    if engine.dialect.name == "postgresql":
+        # CONCURRENTLY transaction içinde çalışamaz
+        statement = statement.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1)
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            connection.execute(text(statement))
+    else:
+        with engine.begin() as connection:
+            connection.execute(text(statement))
+
+def drop_redundant():
+    inspector = inspect(engine)
+    for table_name, names in REDUNDANT_INDEXES.items():
+        existing = {index["name"] for index in inspector.get_indexes(table_name)}
+        for name in names:
+            if name not in existing:
+                continue
+            concurrently = "CONCURRENTLY " if engine.dialect.name == "postgresql" else ""
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+                connection.execute(text(f"DROP INDEX {concurrently}{name}"))
+            print(f"  silindi: {name}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Eksik indexleri oluştur")
+    parser.add_argument("--dry-run", action="store_true", help="Sadece eksik indexleri listele")
+    parser.add_argument("--drop-redundant", action="store_true", help="Yerini bileşik indexlere bırakan eski indexleri sil")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    indexes = list(missing_indexes())
+    if not indexes:
+        print("Eksik index yok")
+    for index in indexes:
+        columns = ", ".join(column.name for column in index.columns)
+        print(f"{index.table.name}.{index.name} ({columns})")
+        if args.dry_run:
+            continue
+        started = time.perf_counter()
+        create_index(index)
+        print(f"  oluşturuldu ({time.perf_counter() - started:.1f}s)")
+
+    if args.drop_redundant and not args.dry_run:
+        drop_redundant()
+
+if __name__ == "__main__":
+    main()
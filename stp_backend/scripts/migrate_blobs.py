@@ -0,0 +1,107 @@
+"""
+documents.file_content sütunundaki dosyaları blob store'a taşır.
+
+Her belge SQL substring ile parça parça okunup blob store'un geçici dosyasına
+akıtılır (dosya hiçbir zaman bütünüyle bellekte tutulmaz), hash doğrulanır ve
+satırda storage_key/content_hash/file_size güncellenip file_content NULL'lanır.
+Her batch ayrı transaction'dır; yarıda kesilirse tekrar çalıştırmak kalan
+satırlarla devam eder. storage_key sütunu uygulama başlarken (upgrade_schema)
+eklenir; script de çalışmadan önce aynı adımı uygular.
+
+Taşıma bitince Postgres'te yer geri kazanmak için:
+    VACUUM (FULL, ANALYZE) documents;
+
+Kullanım (stp_backend dizininden):
+    python scripts/migrate_blobs.py --dry-run
+    python scripts/migrate_blobs.py --batch-size 200
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import func  # noqa: E402
+from app.db.schema_upgrade import upgrade_schema  # noqa: E402
+from app.db.session import SessionLocal, engine  # noqa: E402
+from app.models.document import Document  # noqa: E402
+from app.services.blob_store import blob_store, iter_legacy_chunks  # noqa: E402
+
+logger = logging.getLogger("migrate_blobs")
+
+def pending_filter(query):
+    return query.filter(Document.storage_key.is_(None), Document.file_content.isnot(None))
+
+def migrate_batch(batch_size: int, last_id: int):
+    """Bir batch taşı; (taşınan belge, taşınan bayt, son id) döndür"""
+    db = SessionLocal()
+    try:
+        rows = pending_filter(
+            db.query(Document.id, Document.content_hash, func.length(Document.file_content))
+        ).filter(Document.id > last_id).order_by(Document.id).limit(batch_size).all()
+
+        moved_bytes = 0
+        for document_id, content_hash, size in rows:
+            blob = blob_store.put_stream(
+                iter_legacy_chunks(document_id, 0, size - 1, blob_store.chunk_size)
+            )
+            if content_hash and content_hash != blob.content_hash:
+                logger.warning(
+                    "Document %s: kayıtlı hash (%s) içerikle uyuşmuyor, %s ile güncelleniyor",
+                    document_id, content_hash[:12], blob.content_hash[:12]
+                )
+            db.query(Document).filter(Document.id == document_id).update({
+                Document.storage_key: blob.key,
+                Document.content_hash: blob.content_hash,
+                Document.file_size: blob.size,
+                Document.file_content: None
+            }, synchronize_session=False)
+            moved_bytes += blob.size
+
+        db.commit()
+        return len(rows), moved_bytes, (rows[-1][0] if rows else last_id)
+    finally:
+        db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description="Belge dosyalarını blob store'a taşı")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--limit", type=int, help="En fazla bu kadar belge taşı")
+    parser.add_argument("--dry-run", action="store_true", help="Sadece taşınacak belge sayısını göster")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    upgrade_schema(engine)
+
+    db = SessionLocal()
+    try:
+        pending_count, pending_bytes = pending_filter(
+            db.query(func.count(Document.id), func.coalesce(func.sum(func.length(Document.file_content)), 0))
+        ).one()
+    finally:
+        db.close()
+    print(f"Taşınacak belge: {pending_count} ({pending_bytes / 1024 / 1024:.1f} MB), hedef: {blob_store.__class__.__name__}")
+    if args.dry_run or not pending_count:
+        return
+
+    started = time.perf_counter()
+    total_documents, total_bytes, last_id = 0, 0, 0
+    while args.limit is None or total_documents < args.limit:
+        batch_size = args.batch_size if args.limit is None else min(args.batch_size, args.limit - total_documents)
+        moved, moved_bytes, last_id = migrate_batch(batch_size, last_id)
+        if not moved:
+            break
+        total_documents += moved
+        total_bytes += moved_bytes
+        elapsed = time.perf_counter() - started
+        print(
+            f"  {total_documents}/{pending_count} belge, {total_bytes / 1024 / 1024:.1f} MB "
+            f"({total_bytes / 1024 / 1024 / elapsed:.1f} MB/s), son id {last_id}"
+        )
+
+    print(f"Tamamlandı: {total_documents} belge taşındı. Yer açmak için: VACUUM (FULL, ANALYZE) documents;")
+
+if __name__ == "__main__":
+    main()